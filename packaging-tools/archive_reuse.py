@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#############################################################################
+#
+# Copyright (C) 2023 The Qt Company Ltd.
+# Contact: https://www.qt.io/licensing/
+#
+# This file is part of the release tools of the Qt Toolkit.
+#
+# $QT_BEGIN_LICENSE:GPL-EXCEPT$
+# Commercial License Usage
+# Licensees holding valid commercial Qt licenses may use this file in
+# accordance with the commercial license agreement provided with the
+# Software or, alternatively, in accordance with the terms contained in
+# a written agreement between you and The Qt Company. For licensing terms
+# and conditions see https://www.qt.io/terms-conditions. For further
+# information use the contact form at https://www.qt.io/contact-us.
+#
+# GNU General Public License Usage
+# Alternatively, this file may be used under the terms of the GNU
+# General Public License version 3 as published by the Free Software
+# Foundation with exceptions as appearing in the file LICENSE.GPL3-EXCEPT
+# included in the packaging of this file. Please review the following
+# information to ensure the GNU General Public License requirements will
+# be met: https://www.gnu.org/licenses/gpl-3.0.html.
+#
+# $QT_END_LICENSE$
+#
+#############################################################################
+
+
+"""Reuse previously generated payload archives when their content has not changed"""
+
+import hashlib
+import json
+import os
+import re
+import stat
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from bldinstallercommon import clone_file
+from logging_util import init_logger
+
+log = init_logger(__name__, debug_mode=False)
+
+MANIFEST_VERSION = 1
+
+
+def file_sha256(path: Path) -> str:
+    """Return the SHA256 hex digest of the given file's content"""
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1048576), b""):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+def create_content_manifest(content_dir: Path, max_workers: int = 4) -> List[List[Any]]:
+    """
+    Create a manifest describing the content of a directory tree
+
+    Each entry contains the POSIX style relative path, the type and permission bits, and for
+    regular files the size and the SHA256 of the content, for symlinks the link target.
+
+    Args:
+        content_dir: A directory to create the manifest for
+        max_workers: Number of threads used for hashing the file contents
+
+    Returns:
+        A list of manifest entries sorted by the relative path
+    """
+    entries: List[List[Any]] = []
+    files: List[Tuple[List[Any], Path]] = []
+    for root, dirs, filenames in os.walk(content_dir):
+        for name in dirs + filenames:
+            path = Path(root, name)
+            st = path.lstat()
+            entry: List[Any] = [path.relative_to(content_dir).as_posix(), st.st_mode]
+            if stat.S_ISLNK(st.st_mode):
+                entry.append(os.readlink(path))
+            elif stat.S_ISREG(st.st_mode):
+                entry.append(st.st_size)
+                files.append((entry, path))
+            entries.append(entry)
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        for (entry, _), digest in zip(files, executor.map(file_sha256, [p for _, p in files])):
+            entry.append(digest)
+    return sorted(entries)
+
+
+class ArchiveReuseStore:
+    """
+    Persistent store for generated payload archives, addressed by the manifest of their content
+
+    The archive is stored under the digest of the manifest of the directory tree it was
+    generated from, and it can be reused by a later run if the manifest of the new content is
+    identical. As the archive path identifies the content, a run can not reuse an archive
+    replaced by a concurrent run storing it for different content.
+    """
+
+    def __init__(self, store_dir: Path) -> None:
+        self.store_dir = store_dir
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+
+    def _archive_path(self, package_name: str, archive_name: str, manifest: Dict[str, Any]) -> Path:
+        manifest_json = json.dumps(manifest, sort_keys=True).encode("utf-8")
+        digest = hashlib.sha256(manifest_json).hexdigest()
+        return self.store_dir / package_name / f"{archive_name}.{digest}"
+
+    @staticmethod
+    def create_manifest(content_dir: Path, **properties: str) -> Dict[str, Any]:
+        """
+        Create the manifest for a directory tree to be compressed
+
+        Args:
+            content_dir: The directory to compress
+            properties: Additional values affecting the generated archive, e.g. the tool used
+
+        Returns:
+            A JSON serializable manifest
+        """
+        return {
+            "version": MANIFEST_VERSION,
+            "properties": properties,
+            "entries": create_content_manifest(content_dir),
+        }
+
+    def reuse(
+        self, package_name: str, archive_name: str, manifest: Dict[str, Any], target: Path
+    ) -> bool:
+        """
+        Materialize the previously generated archive at the target path if the content matches
+
+        Args:
+            package_name: The name of the component the archive belongs to
+            archive_name: The file name of the archive
+            manifest: The manifest of the content to be compressed
+            target: A file system path for the archive, must not exist
+
+        Returns:
+            True if the previous archive was reused, otherwise False
+        """
+        try:
+            clone_file(self._archive_path(package_name, archive_name, manifest), target)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def store(
+        self, package_name: str, archive_name: str, manifest: Dict[str, Any], source: Path
+    ) -> None:
+        """
+        Store a generated archive under the digest of its manifest for later runs
+
+        Args:
+            package_name: The name of the component the archive belongs to
+            archive_name: The file name of the archive
+            manifest: The manifest of the content the archive was generated from
+            source: A file system path to the generated archive
+        """
+        archive = self._archive_path(package_name, archive_name, manifest)
+        archive.parent.mkdir(parents=True, exist_ok=True)
+        tmp_archive = archive.with_name(f"{archive.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            clone_file(source, tmp_archive)
+            os.replace(tmp_archive, archive)
+        finally:
+            with suppress(FileNotFoundError):
+                tmp_archive.unlink()
+        # keep only the latest archive, the earlier ones were generated from changed content
+        stale = re.compile(re.escape(archive_name) + r"\.[0-9a-f]{64}")
+        for path in archive.parent.iterdir():
+            if path != archive and stale.fullmatch(path.name):
+                with suppress(FileNotFoundError):
+                    path.unlink()
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#############################################################################
+#
+# Copyright (C) 2023 The Qt Company Ltd.
+# Contact: https://www.qt.io/licensing/
+#
+# This file is part of the release tools of the Qt Toolkit.
+#
+# $QT_BEGIN_LICENSE:GPL-EXCEPT$
+# Commercial License Usage
+# Licensees holding valid commercial Qt licenses may use this file in
+# accordance with the commercial license agreement provided with the
+# Software or, alternatively, in accordance with the terms contained in
+# a written agreement between you and The Qt Company. For licensing terms
+# and conditions see https://www.qt.io/terms-conditions. For further
+# information use the contact form at https://www.qt.io/contact-us.
+#
+# GNU General Public License Usage
+# Alternatively, this file may be used under the terms of the GNU
+# General Public License version 3 as published by the Free Software
+# Foundation with exceptions as appearing in the file LICENSE.GPL3-EXCEPT
+# included in the packaging of this file. Please review the following
+# information to ensure the GNU General Public License requirements will
+# be met: https://www.gnu.org/licenses/gpl-3.0.html.
+#
+# $QT_END_LICENSE$
+#
+#############################################################################
+
+
+"""Backends for writing component payload content to IFW supported archives"""
+
+import bz2
+import lzma
+import os
+import tarfile
+import threading
+import zlib
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import suppress
+from functools import partial
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Deque, Dict, Optional
+
+from logging_util import init_logger
+from runner import run_cmd
+
+log = init_logger(__name__, debug_mode=False)
+
+# archive suffixes handled by TarArchiveWriter and the compression used for each
+TAR_COMPRESSIONS: Dict[str, str] = {
+    ".tar": "",
+    ".tar.gz": "gz",
+    ".tgz": "gz",
+    ".tar.bz2": "bz2",
+    ".tar.xz": "xz",
+}
+DEFAULT_COMPRESSION_LEVELS: Dict[str, int] = {"gz": 6, "bz2": 9, "xz": 6}
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+class ArchiveWriterError(Exception):
+    pass
+
+
+class ArchiveWriter(ABC):
+    """Interface class for writing the content of a directory to a payload archive"""
+
+    name = ""
+
+    @staticmethod
+    def get_writer(name: str, **kwargs: Any) -> "ArchiveWriter":
+        """
+        A factory method to initialize an archive writer by name
+
+        Args:
+            name: The name of the writer, "archivegen" or "python"
+            **kwargs: The kwargs are passed to the constructor of the writer class
+
+        Returns:
+            A concrete ArchiveWriter matching the name
+
+        Raises:
+            ArchiveWriterError: If there is no writer with the given name
+        """
+        writers = {
+            ArchivegenWriter.name: ArchivegenWriter,
+            TarArchiveWriter.name: TarArchiveWriter,
+        }
+        if name not in writers:
+            raise ArchiveWriterError(f"Unknown archive writer: {name}")
+        return writers[name](**kwargs)  # type: ignore
+
+    @abstractmethod
+    def supports(self, archive_name: str) -> bool:
+        """Return whether the writer is able to create an archive with the given file name"""
+
+    @abstractmethod
+    def write(self, archive: Path, content_dir: Path) -> None:
+        """
+        Write the items in content_dir to the archive, relative to content_dir
+
+        Args:
+            archive: A file system path for the archive to create
+            content_dir: A directory containing the content to add to the archive
+        """
+
+    def properties(self) -> Dict[str, str]:
+        """Return the settings of the writer that affect the generated archive"""
+        return {"writer": self.name}
+
+
+class ArchivegenWriter(ArchiveWriter):
+    """ArchiveWriter implementation running the archivegen tool from Installer Framework"""
+
+    name = "archivegen"
+
+    def __init__(self, archivegen_tool: str) -> None:
+        self.archivegen_tool = archivegen_tool
+
+    def supports(self, archive_name: str) -> bool:
+        return True
+
+    def write(self, archive: Path, content_dir: Path) -> None:
+        # add content_dir in front of every item to ensure correct install paths
+        content_list = [str(content_dir / x) for x in os.listdir(content_dir)]
+        arch_format = archive.suffix.strip(".")
+        run_cmd([self.archivegen_tool, "-f", arch_format, str(archive)] + content_list, archive.parent)
+
+
+class ChunkCompressor:
+    """
+    Writable file object compressing the written data in independent chunks in parallel
+
+    Each chunk becomes a complete gzip member, bzip2 stream or xz stream. The compressed chunks
+    are written to the output in the original order and the concatenated streams form a valid
+    compressed file, similar to the output of pigz or pixz.
+    """
+
+    def __init__(
+        self,
+        output: BinaryIO,
+        compress: Callable[[bytes], bytes],
+        executor: ThreadPoolExecutor,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_pending: int = 16,
+    ) -> None:
+        self.output = output
+        self.compress = compress
+        self.executor = executor
+        self.chunk_size = chunk_size
+        self.max_pending = max_pending
+        self._buffer = bytearray()
+        self._pending: Deque["Future[bytes]"] = deque()
+
+    def _submit(self, chunk: bytes) -> None:
+        self._pending.append(self.executor.submit(self.compress, chunk))
+        # limit the memory used by the chunks waiting for their turn to be written
+        while len(self._pending) > self.max_pending:
+            self.output.write(self._pending.popleft().result())
+
+    def write(self, data: bytes) -> int:
+        self._buffer += data
+        while len(self._buffer) >= self.chunk_size:
+            chunk = bytes(self._buffer[:self.chunk_size])
+            del self._buffer[:self.chunk_size]
+            self._submit(chunk)
+        return len(data)
+
+    def close(self) -> None:
+        if self._buffer:
+            self._submit(bytes(self._buffer))
+            self._buffer.clear()
+        while self._pending:
+            self.output.write(self._pending.popleft().result())
+
+
+def _compress_gz(level: int, data: bytes) -> bytes:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: gzip header and trailer
+    return compressor.compress(data) + compressor.flush()
+
+
+def _compress_bz2(level: int, data: bytes) -> bytes:
+    return bz2.compress(data, compresslevel=level)
+
+
+def _compress_xz(level: int, data: bytes) -> bytes:
+    return lzma.compress(data, format=lzma.FORMAT_XZ, check=lzma.CHECK_CRC64, preset=level)
+
+
+COMPRESSORS: Dict[str, Callable[[int, bytes], bytes]] = {
+    "gz": _compress_gz,
+    "bz2": _compress_bz2,
+    "xz": _compress_xz,
+}
+
+
+class TarArchiveWriter(ArchiveWriter):
+    """
+    ArchiveWriter implementation creating tar based archives in-process
+
+    The compression of a single archive is spread over the shared compression thread pool,
+    the compression libraries release the GIL so the threads run in parallel.
+    """
+
+    name = "python"
+
+    def __init__(
+        self, threads: int, level: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> None:
+        self.threads = threads
+        self.level = level
+        self.chunk_size = chunk_size
+
+    def supports(self, archive_name: str) -> bool:
+        return get_tar_compression(archive_name) is not None
+
+    def properties(self) -> Dict[str, str]:
+        return {"writer": self.name, "level": str(self.level), "chunk_size": str(self.chunk_size)}
+
+    def write(self, archive: Path, content_dir: Path) -> None:
+        compression = get_tar_compression(archive.name)
+        if compression is None:
+            raise ArchiveWriterError(f"Unsupported archive format: {archive.name}")
+        log.info("Compress: %s -> %s", content_dir, archive)
+        try:
+            with open(archive, "xb") as output:
+                if not compression:
+                    self._write_tar(output, content_dir)
+                    return
+                level = DEFAULT_COMPRESSION_LEVELS[compression] if self.level is None else self.level
+                compressor = ChunkCompressor(
+                    output,
+                    partial(COMPRESSORS[compression], level),
+                    get_compression_executor(self.threads),
+                    chunk_size=self.chunk_size,
+                    max_pending=min(self.threads, 16),
+                )
+                self._write_tar(compressor, content_dir)
+                compressor.close()
+        except BaseException:
+            with suppress(FileNotFoundError):
+                archive.unlink()
+            raise
+
+    @staticmethod
+    def _write_tar(output: Any, content_dir: Path) -> None:
+        with tarfile.open(fileobj=output, mode="w|", format=tarfile.PAX_FORMAT) as tar:
+            for item in sorted(os.listdir(content_dir)):
+                tar.add(content_dir / item, arcname=item)
+
+
+def get_tar_compression(archive_name: str) -> Optional[str]:
+    """
+    Get the compression for a tar based archive
+
+    Args:
+        archive_name: The file name of the archive
+
+    Returns:
+        The compression name, an empty string for no compression, None if not a tar archive
+    """
+    for suffix, compression in TAR_COMPRESSIONS.items():
+        if archive_name.endswith(suffix):
+            return compression
+    return None
+
+
+_executors: Dict[int, ThreadPoolExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_compression_executor(threads: int) -> ThreadPoolExecutor:
+    """
+    Return the process-wide thread pool for compression, shared by all archives being written
+
+    Args:
+        threads: The number of compression threads for the whole process
+
+    Returns:
+        The ThreadPoolExecutor instance for the thread count
+    """
+    with _executors_lock:
+        if threads not in _executors:
+            _executors[threads] = ThreadPoolExecutor(
+                max_workers=max(1, threads), thread_name_prefix="compress"
+            )
+        return _executors[threads]
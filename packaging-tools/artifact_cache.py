@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#############################################################################
+#
+# Copyright (C) 2023 The Qt Company Ltd.
+# Contact: https://www.qt.io/licensing/
+#
+# This file is part of the release tools of the Qt Toolkit.
+#
+# $QT_BEGIN_LICENSE:GPL-EXCEPT$
+# Commercial License Usage
+# Licensees holding valid commercial Qt licenses may use this file in
+# accordance with the commercial license agreement provided with the
+# Software or, alternatively, in accordance with the terms contained in
+# a written agreement between you and The Qt Company. For licensing terms
+# and conditions see https://www.qt.io/terms-conditions. For further
+# information use the contact form at https://www.qt.io/contact-us.
+#
+# GNU General Public License Usage
+# Alternatively, this file may be used under the terms of the GNU
+# General Public License version 3 as published by the Free Software
+# Foundation with exceptions as appearing in the file LICENSE.GPL3-EXCEPT
+# included in the packaging of this file. Please review the following
+# information to ensure the GNU General Public License requirements will
+# be met: https://www.gnu.org/licenses/gpl-3.0.html.
+#
+# $QT_END_LICENSE$
+#
+#############################################################################
+
+
+"""Persistent on-disk cache for remote payload artifacts"""
+
+import hashlib
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+from bld_utils import download
+from bldinstallercommon import clone_file
+from logging_util import init_logger
+
+log = init_logger(__name__, debug_mode=False)
+
+DEFAULT_CACHE_SIZE_GB = 50
+
+
+class ArtifactCacheError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class ArtifactValidators:
+    """Response headers identifying a specific version of a remote artifact"""
+
+    etag: str = ""
+    last_modified: str = ""
+    content_length: int = -1
+
+    @property
+    def is_cacheable(self) -> bool:
+        """Whether the server provided enough information to detect changes in the artifact"""
+        return bool(self.etag or self.last_modified)
+
+
+class ArtifactCache:
+    """
+    Cache for remote payload artifacts, shared by all installer tasks using the same directory
+
+    Artifacts are keyed by the URL, the validators returned by the server (ETag, Last-Modified,
+    Content-Length) and optionally by the expected SHA1 of the content. When the total size of
+    the cache exceeds the size budget, the least recently used artifacts are evicted.
+    """
+
+    def __init__(self, cache_dir: Path, max_size: int) -> None:
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.objects_dir = cache_dir / "objects"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+        self._evict_lock = threading.Lock()
+
+    def _get_lock(self, key: str) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _blob_path(self, key: str) -> Path:
+        return self.objects_dir / key[:2] / key
+
+    @staticmethod
+    def get_validators(url: str) -> Optional[ArtifactValidators]:
+        """
+        Read the validators for the given URL with a HEAD request
+
+        Args:
+            url: A HTTP(S) URL pointing to the artifact
+
+        Returns:
+            The validators from the response headers, None if the request failed
+        """
+        try:
+            with requests.head(url, timeout=30, allow_redirects=True) as res:
+                res.raise_for_status()
+                return ArtifactValidators(
+                    etag=res.headers.get("etag", ""),
+                    last_modified=res.headers.get("last-modified", ""),
+                    content_length=int(res.headers.get("content-length", -1)),
+                )
+        except requests.exceptions.RequestException as err:
+            log.warning("Unable to read the validators for: %s (%s)", url, str(err))
+        return None
+
+    @staticmethod
+    def cache_key(url: str, validators: ArtifactValidators, sha1: str = "") -> str:
+        """
+        Calculate the cache key for an artifact
+
+        Args:
+            url: The URL of the artifact
+            validators: The validators for the current version of the artifact
+            sha1: The expected SHA1 of the artifact content if known
+
+        Returns:
+            A hex digest identifying the artifact version
+        """
+        key_data = [
+            url,
+            validators.etag,
+            validators.last_modified,
+            str(validators.content_length),
+            sha1,
+        ]
+        return hashlib.sha256("\n".join(key_data).encode("utf-8")).hexdigest()
+
+    def fetch(self, url: str, target: Path, sha1: str = "", allow_hardlink: bool = False) -> None:
+        """
+        Materialize the artifact from the given URL at the target path, download it if needed
+
+        Non-HTTP URLs and artifacts without validators are downloaded directly.
+
+        Args:
+            url: The URL of the artifact
+            target: A file system path for the artifact, must not exist
+            sha1: The expected SHA1 of the artifact content, verified after download if given
+            allow_hardlink: Whether the target is allowed to be a hardlink to the cached artifact
+
+        Raises:
+            ArtifactCacheError: When the target already exists or the downloaded content is invalid
+        """
+        if os.path.lexists(target):
+            raise ArtifactCacheError(f"Can not fetch '{url}' to '{target}', file already exists")
+        if not url.startswith(("http://", "https://")):
+            download(url, str(target))
+            return
+        validators = self.get_validators(url)
+        if validators is None or not (validators.is_cacheable or sha1):
+            log.info("Artifact not cacheable, downloading: %s", url)
+            download(url, str(target))
+            return
+        key = self.cache_key(url, validators, sha1)
+        blob = self._blob_path(key)
+        with self._get_lock(key):
+            if blob.is_file():
+                log.info("Artifact cache hit: %s", url)
+                os.utime(blob)  # update the LRU timestamp
+            else:
+                log.info("Artifact cache miss: %s", url)
+                self._store(url, blob, validators, sha1)
+            try:
+                clone_file(blob, target, allow_hardlink=allow_hardlink)
+            except FileNotFoundError:
+                # evicted by another process in between, don't fail the build because of that
+                log.warning("Artifact evicted from cache during use, downloading: %s", url)
+                download(url, str(target))
+        self.evict(keep=key)
+
+    def _store(self, url: str, blob: Path, validators: ArtifactValidators, sha1: str) -> None:
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        tmp_blob = blob.with_name(f"{blob.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            download(url, str(tmp_blob))
+            size = tmp_blob.stat().st_size
+            if validators.content_length >= 0 and size != validators.content_length:
+                raise ArtifactCacheError(
+                    f"Size mismatch for '{url}': {size} != {validators.content_length}"
+                )
+            if sha1:
+                digest = file_sha1(tmp_blob)
+                if digest != sha1:
+                    raise ArtifactCacheError(f"SHA1 mismatch for '{url}': {digest} != {sha1}")
+            metadata = dict(asdict(validators), url=url, sha1=sha1, size=size)
+            blob.with_suffix(".json").write_text(json.dumps(metadata), encoding="utf-8")
+            os.replace(tmp_blob, blob)
+        finally:
+            if tmp_blob.exists():
+                tmp_blob.unlink()
+
+    def _entries(self) -> List[Tuple[float, int, Path]]:
+        entries = []
+        for blob in self.objects_dir.glob("*/*"):
+            if blob.suffix:  # skip metadata and partial downloads
+                continue
+            try:
+                stat = blob.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, blob))
+        return sorted(entries)
+
+    def size(self) -> int:
+        """Return the total size of the cached artifacts in bytes"""
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self, keep: str = "") -> None:
+        """
+        Remove the least recently used artifacts until the cache fits in the size budget
+
+        Args:
+            keep: A cache key that must not be evicted, e.g. the artifact that was just stored
+        """
+        with self._evict_lock:
+            entries = self._entries()
+            total_size = sum(size for _, size, _ in entries)
+            for _, size, blob in entries:
+                if total_size <= self.max_size:
+                    break
+                with self._locks_lock:
+                    lock = self._locks.get(blob.name)
+                if blob.name == keep or (lock is not None and lock.locked()):
+                    continue  # in use
+                log.info("Evicting artifact from cache: %s", blob.name)
+                for path in (blob, blob.with_suffix(".json")):
+                    if path.exists():
+                        path.unlink()
+                total_size -= size
+
+
+def file_sha1(path: Path) -> str:
+    """Return the SHA1 hex digest of the given file's content"""
+    sha1 = hashlib.sha1()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1048576), b""):
+            sha1.update(block)
+    return sha1.hexdigest()
+
+
+_caches: Dict[Path, ArtifactCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_artifact_cache(cache_dir: str, max_size_gb: int = DEFAULT_CACHE_SIZE_GB) -> ArtifactCache:
+    """
+    Return a process-wide shared ArtifactCache instance for the given directory
+
+    Args:
+        cache_dir: A file system path to the cache directory
+        max_size_gb: The size budget for the cache in gigabytes
+
+    Returns:
+        The ArtifactCache instance for the directory
+    """
+    path = Path(cache_dir).resolve()
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = ArtifactCache(path, max_size_gb * 1024 ** 3)
+        return _caches[path]
@@ -37,30 +37,37 @@ import re
 import shutil
 import stat
 import sys
+import threading
 from argparse import Namespace
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from configparser import ConfigParser
 from contextlib import suppress
 from fnmatch import fnmatch
+from functools import partial
 from pathlib import Path
-from subprocess import CalledProcessError
+from subprocess import PIPE, STDOUT, CalledProcessError, Popen
+from tempfile import TemporaryFile, mkdtemp
 from traceback import print_exc
 from types import TracebackType
-from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from typing import Any, Callable, Dict, List, Optional, Pattern, Tuple, Union
 from urllib.parse import urlparse
-from urllib.request import url2pathname, urlcleanup, urlretrieve
+from urllib.request import url2pathname, urlcleanup, urlopen, urlretrieve
 
 import requests
 from temppathlib import TemporaryDirectory
 
 from bld_utils import download, is_linux, is_macos, is_windows, run_command
+from elf_rpath import ElfRpathError, read_elf_rpath, write_elf_rpath
 from installer_utils import PackagingError
 from logging_util import init_logger
+from resource_governor import Resource, get_governor
 from runner import run_cmd
 from threadedwork import Task, ThreadedWork
 
 log = init_logger(__name__, debug_mode=False)
 
 MAX_DEBUG_PRINT_LENGTH = 10000
+FICLONE = 0x40049409  # linux/fs.h: _IOW(0x94, 9, int)
 
 
 def is_long_path_supported() -> bool:
@@ -192,6 +199,57 @@ def search_for_files(
 ###############################
 # function
 ###############################
+def _copy_file_preserve_link(source: str, destination: str) -> int:
+    """Copy a file or a symlink with its metadata, return the number of bytes copied"""
+    if os.path.islink(source):
+        os.symlink(os.readlink(source), destination)
+        return 0
+    shutil.copy2(source, destination)
+    return os.path.getsize(destination)
+
+
+def move_across_devices(source: str, destination: str, max_workers: Optional[int] = None) -> None:
+    """
+    Move a file or a directory tree to another file system: copy in parallel, then remove
+
+    Args:
+        source: A file system path to move
+        destination: The destination path, must not exist
+        max_workers: Number of files copied in parallel, by default the disk job limit
+    """
+    if not os.path.isdir(source) or os.path.islink(source):
+        _copy_file_preserve_link(source, destination)
+        os.remove(source)
+        return
+    files: List[Tuple[str, str]] = []
+    for root, dirs, names in os.walk(source):
+        dst_root = os.path.join(destination, os.path.relpath(root, source))
+        Path(dst_root).mkdir(parents=True, exist_ok=True)
+        # symlinks to directories are copied as links
+        names.extend(name for name in dirs if os.path.islink(os.path.join(root, name)))
+        dirs[:] = [name for name in dirs if not os.path.islink(os.path.join(root, name))]
+        files.extend((os.path.join(root, name), os.path.join(dst_root, name)) for name in names)
+    log.info("Moving %s files across file systems: %s -> %s", len(files), source, destination)
+    copied_bytes = 0
+    step = max(1, len(files) // 10)
+    with ThreadPoolExecutor(max_workers=max_workers or get_governor().limit(Resource.DISK)) as pool:
+        for count, size in enumerate(pool.map(lambda f: _copy_file_preserve_link(*f), files), 1):
+            copied_bytes += size
+            if count % step == 0 or count == len(files):
+                log.info("Copied %s/%s files (%.1f MB)", count, len(files), copied_bytes / 1e6)
+    shutil.rmtree(source)
+
+
+def _move(source: str, destination: str) -> None:
+    """Rename the source to destination, copy the data if they are on different file systems"""
+    try:
+        os.rename(source, destination)
+    except OSError as err:
+        if err.errno != errno.EXDEV:
+            raise
+        move_across_devices(source, destination)
+
+
 def move_tree(srcdir: str, dstdir: str, pattern: Optional[str] = None) -> None:
     # dstdir must exist first
     srcnames = os.listdir(srcdir)
@@ -203,6 +261,11 @@ def move_tree(srcdir: str, dstdir: str, pattern: Optional[str] = None) -> None:
         if not dstfname:
             raise IOError('*** Fatal error! Unable to create destination file path, too long path name!')
         if os.path.isdir(srcfname) and not os.path.islink(srcfname):
+            # the pattern applies only to the files directly in srcdir, not to the subdirectories
+            if not os.path.lexists(dstfname):
+                # the whole subtree can be moved at once
+                _move(srcfname, dstfname)
+                continue
             Path(dstfname).mkdir(parents=True, exist_ok=True)
             move_tree(srcfname, dstfname)
         elif pattern is None or fnmatch(name, pattern):
@@ -217,20 +280,138 @@ def move_tree(srcdir: str, dstdir: str, pattern: Optional[str] = None) -> None:
 ###############################
 # function
 ###############################
-def copy_tree(source_dir: str, dest_dir: str) -> None:
-    src_files = os.listdir(source_dir)
-    for file_name in src_files:
-        full_file_name = os.path.join(source_dir, file_name)
-        if not full_file_name:
-            raise IOError('*** Fatal error! Unable to create source file path, too long path name!')
-        if is_windows():
-            if len(full_file_name) > 255:
-                raise IOError(f'given full_file_name length [{len(full_file_name)}] too long for Windows: {full_file_name}')
-        if os.path.isdir(full_file_name):
-            Path(dest_dir + os.sep + file_name).mkdir(parents=True, exist_ok=True)
-            copy_tree(full_file_name, dest_dir + os.sep + file_name)
-        if os.path.isfile(full_file_name):
-            shutil.copy(full_file_name, dest_dir)
+def copy_tree(
+    source_dir: str, dest_dir: str, max_workers: Optional[int] = None, allow_hardlink: bool = False
+) -> None:
+    """
+    Copy the contents of the source directory into the destination directory
+
+    The tree is scanned first and the files are then copied in parallel with clone_file(),
+    which uses copy-on-write clones and in-kernel copies when possible. Symlinks are copied
+    as symlinks. Existing destination files are replaced.
+
+    Args:
+        source_dir: A file system path to the directory to copy from
+        dest_dir: A file system path to the directory to copy to, created if it doesn't exist
+        max_workers: Number of files copied in parallel, by default the disk job limit
+        allow_hardlink: Whether the copied files may share the inodes with the source files
+    """
+    dirs: List[str] = [dest_dir]
+    files: List[Tuple[str, str]] = []
+    links: List[Tuple[str, str]] = []
+
+    def _scan(src: str, dst: str) -> None:
+        with os.scandir(src) as entries:
+            for entry in entries:
+                dst_path = os.path.join(dst, entry.name)
+                if is_windows() and len(entry.path) > 255:
+                    raise IOError(f'given full_file_name length [{len(entry.path)}] too long for Windows: {entry.path}')
+                if entry.is_symlink():
+                    links.append((entry.path, dst_path))
+                elif entry.is_dir():
+                    dirs.append(dst_path)
+                    _scan(entry.path, dst_path)
+                elif entry.is_file():
+                    files.append((entry.path, dst_path))
+
+    _scan(source_dir, dest_dir)
+    for directory in dirs:
+        Path(directory).mkdir(parents=True, exist_ok=True)
+
+    def _copy(src: str, dst: str) -> None:
+        if os.path.lexists(dst):
+            os.remove(dst)
+        if os.path.islink(src):
+            os.symlink(os.readlink(src), dst)
+        else:
+            clone_file(Path(src), Path(dst), allow_hardlink=allow_hardlink)
+
+    with ThreadPoolExecutor(max_workers=max_workers or get_governor().limit(Resource.DISK)) as pool:
+        # consume the results to raise the possible errors
+        list(pool.map(lambda item: _copy(*item), files + links))
+
+
+def _reflink(source: Path, destination: Path) -> bool:
+    """
+    Try to create a copy-on-write clone of the source file (Linux FICLONE ioctl)
+
+    Args:
+        source: A file system path to the file to clone
+        destination: A file system path for the clone, must not exist
+
+    Returns:
+        True if the clone was created, False if the file system doesn't support it
+    """
+    try:
+        import fcntl  # pylint: disable=import-outside-toplevel  # not available on Windows
+    except ImportError:
+        return False
+    try:
+        with open(source, "rb") as src, open(destination, "xb") as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+    except OSError:
+        with suppress(OSError):
+            destination.unlink()
+        return False
+    shutil.copystat(source, destination)
+    return True
+
+
+def _copy_file_range(source: Path, destination: Path) -> bool:
+    """
+    Try to copy the file inside the kernel with copy_file_range(), which some file systems
+    also turn into a server-side copy or a clone
+
+    Args:
+        source: A file system path to the file to copy
+        destination: A file system path for the copy, must not exist
+
+    Returns:
+        True if the file was copied, False if copy_file_range() is not supported
+    """
+    if not hasattr(os, "copy_file_range"):
+        return False
+    try:
+        with open(source, "rb") as src, open(destination, "xb") as dst:
+            remaining = os.fstat(src.fileno()).st_size
+            while remaining > 0:
+                copied = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+                if not copied:
+                    break
+                remaining -= copied
+    except OSError:
+        with suppress(OSError):
+            destination.unlink()
+        return False
+    shutil.copystat(source, destination)
+    return True
+
+
+def clone_file(source: Path, destination: Path, allow_hardlink: bool = False) -> None:
+    """
+    Materialize a copy of the source file using the cheapest method available
+
+    A copy-on-write reflink is tried first. Hardlinks are used only when explicitly allowed,
+    as any in-place modification of the destination would also change the source.
+    Falls back to an in-kernel copy and then to a regular copy.
+
+    Args:
+        source: A file system path to the file to copy
+        destination: A file system path for the new file, must not exist
+        allow_hardlink: Whether the destination is allowed to share the inode with the source
+    """
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    if is_linux() and _reflink(source, destination):
+        return
+    if allow_hardlink:
+        try:
+            os.link(source, destination)
+            return
+        except OSError:  # e.g. cross-device link, fall back to copy
+            pass
+    if is_linux() and _copy_file_range(source, destination):
+        return
+    shutil.copy2(source, destination)
 
 
 def strip_dirs(directory: Path, iterations: int = 1) -> None:
@@ -259,15 +440,20 @@ def strip_dirs(directory: Path, iterations: int = 1) -> None:
         if not dir_name.is_dir():
             raise IOError(f"Subitem is not a directory: {dir_name}, expected one subdirectory")
         iterations -= 1
-    with TemporaryDirectory() as temp_dir:
-        # first move to temp dir to avoid name collision
-        shutil.move(str(dir_name.resolve()), temp_dir.path)
-        # remove empty dirs
-        for item in directory.iterdir():
+    # stage inside the directory itself, so that only renames are needed
+    staging_dir = Path(mkdtemp(prefix=".strip_dirs-", dir=directory))
+    # first move to staging dir to avoid name collision
+    staged = staging_dir / dir_name.name
+    os.rename(dir_name, staged)
+    # remove empty dirs
+    for item in directory.iterdir():
+        if item != staging_dir:
             shutil.rmtree(item)
-        # move subitems to target dir
-        for item in temp_dir.path.joinpath(dir_name.name).iterdir():
-            shutil.move(str(item), str(directory))
+    # move subitems to target dir
+    for item in staged.iterdir():
+        os.rename(item, directory / item.name)
+    staged.rmdir()
+    staging_dir.rmdir()
 
 
 ###############################
@@ -284,7 +470,117 @@ def handle_remove_readonly(
         raise PackagingError(excvalue)
 
 
-def remove_tree(path: str) -> bool:
+def _delete_tree(path: str, max_workers: Optional[int] = None) -> None:
+    """
+    Delete a directory tree in-process, symlinks are removed without following them
+
+    The files are unlinked in parallel and the emptied directories are removed bottom-up.
+    Errors are logged and the deletion continues with the remaining entries like 'rm -rf'.
+
+    Args:
+        path: A file system path to the directory to delete
+        max_workers: Number of files unlinked in parallel, by default the disk job limit
+    """
+    dirs: List[str] = []
+    files: List[str] = []
+
+    def _scan(directory: str) -> None:
+        dirs.append(directory)
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        _scan(entry.path)
+                    else:
+                        files.append(entry.path)
+        except OSError as err:
+            log.warning("Unable to list directory: %s", err)
+
+    def _remove(file_path: str, remove_func: Callable[[str], None] = os.unlink) -> None:
+        try:
+            remove_func(file_path)
+        except FileNotFoundError:
+            pass
+        except OSError as err:
+            log.warning("Unable to remove: %s", err)
+
+    _scan(path)
+    with ThreadPoolExecutor(max_workers=max_workers or get_governor().limit(Resource.DISK)) as pool:
+        list(pool.map(_remove, files))
+    for directory in reversed(dirs):
+        _remove(directory, os.rmdir)
+
+
+_REMOVER = ThreadPoolExecutor(max_workers=1, thread_name_prefix="remove_tree")
+_REMOVALS: List[Tuple[str, "Future[None]"]] = []  # trash directory, deletion
+_REMOVALS_LOCK = threading.Lock()
+
+
+def wait_for_removals(path: Optional[str] = None) -> None:
+    """
+    Wait until the directories removed with remove_tree(..., background=True) are deleted
+
+    Args:
+        path: Wait only for the removals with the trash directory inside this directory
+    """
+    if path is not None:
+        path = os.path.abspath(path)
+    with _REMOVALS_LOCK:
+        removals = [
+            removal for removal in _REMOVALS
+            if path is None or os.path.commonpath([removal[0], path]) == path
+        ]
+    for _, future in removals:
+        future.result()
+    with _REMOVALS_LOCK:
+        # the list may have been pruned by another thread in the meantime
+        _REMOVALS[:] = [removal for removal in _REMOVALS if removal not in removals]
+
+
+def wait_for_free_space(path: str, min_free: int, poll_interval: float = 1.0) -> bool:
+    """
+    Block while the file system of the path has less free space than required and there are
+    background removals pending that may free some
+
+    Args:
+        path: A file system path on the file system to check
+        min_free: Required free space in bytes
+        poll_interval: Seconds between the free space checks
+
+    Returns:
+        True if the required free space is available, otherwise False
+    """
+    throttled = False
+    while shutil.disk_usage(path).free < min_free:
+        with _REMOVALS_LOCK:
+            pending = [future for _, future in _REMOVALS if not future.done()]
+        if not pending:
+            log.warning("Free space below %.1f GB in: %s", min_free / 1024**3, path)
+            return False
+        if not throttled:
+            log.info("Waiting for background removals to free space in: %s", path)
+            throttled = True
+        wait(pending, timeout=poll_interval, return_when=FIRST_COMPLETED)
+    return True
+
+
+def remove_tree(path: str, background: bool = False, max_workers: Optional[int] = None) -> bool:
+    """
+    Remove a directory tree
+
+    In the background mode the directory is first renamed into a trash directory next to it
+    and deleted by a worker thread, so the caller can continue immediately.
+    Use wait_for_removals() to wait for the pending deletions. The pending deletions inside
+    the directory are completed before removing it.
+
+    Args:
+        path: A file system path to the directory to remove
+        background: Whether to delete the directory contents in a background thread
+        max_workers: Number of files unlinked in parallel, by default the disk job limit
+
+    Returns:
+        True if the path does not exist anymore, otherwise False
+    """
     if os.path.isdir(path) and os.path.exists(path):
         if is_windows():
             path = path.replace('/', '\\')
@@ -294,9 +590,30 @@ def remove_tree(path: str) -> bool:
                 run_command(command=cmd, cwd=str(Path.cwd()), only_error_case_output=True)
             except Exception:
                 print_exc()
+        elif os.path.islink(path):
+            os.unlink(path)
         else:
-            # shutil.rmtree(path)
-            run_command(["rm", "-rf", path], cwd=str(Path.cwd()), only_error_case_output=True)
+            # the trash directories of the pending removals inside the tree would be moved away
+            wait_for_removals(path)
+            if background:
+                trash = mkdtemp(prefix=".trash-", dir=os.path.dirname(os.path.abspath(path)))
+                try:
+                    os.rename(path, os.path.join(trash, os.path.basename(path)))
+                except OSError as err:
+                    log.warning("Unable to move %s to trash, removing in place: %s", path, err)
+                    os.rmdir(trash)
+                    _delete_tree(path, max_workers)
+                else:
+                    future = _REMOVER.submit(_delete_tree, trash, max_workers)
+                    with _REMOVALS_LOCK:
+                        # keep the failed ones for raising the error from wait_for_removals()
+                        _REMOVALS[:] = [
+                            removal for removal in _REMOVALS
+                            if not removal[1].done() or removal[1].exception() is not None
+                        ]
+                        _REMOVALS.append((trash, future))
+            else:
+                _delete_tree(path, max_workers)
     return not os.path.exists(path)
 
 
@@ -317,6 +634,114 @@ def replace_in_files(filelist: List[str], regexp: str, replacement_string: str)
             handle.truncate()
 
 
+def _overlap_texts(first: str, second: str) -> List[str]:
+    """Return the shortest texts in which the given strings overlap or contain each other"""
+    if first in second or second in first:
+        return [max(first, second, key=len)]
+    texts = []
+    for i in range(1, min(len(first), len(second))):
+        if first.endswith(second[:i]):
+            texts.append(first + second[i:])
+        if second.endswith(first[:i]):
+            texts.append(second + first[i:])
+    return texts
+
+
+class TagSubstitution:
+    """
+    Substitute a group of literal tags using a single alternation regexp
+
+    The result is the same as replacing the tags one by one in the order they were added. The
+    single pass could give a different result only for texts where the tags overlap each other,
+    such texts are detected with a separate regexp and the tags are then replaced one by one.
+    """
+
+    def __init__(self) -> None:
+        self.tags: List[Tuple[str, str]] = []
+        self._values: Dict[str, str] = {}
+        self._conflict_texts: List[str] = []
+        self._regexp: Optional[Pattern[str]] = None
+        self._conflicts: Optional[Pattern[str]] = None
+
+    def accepts(self, tag: str) -> bool:
+        """Return whether the tag can be replaced in the same pass with the earlier tags"""
+        # the earlier replacements may not produce a new match for the tag, either by containing
+        # a part of it or by joining the surrounding text when removing a tag
+        return all(value and set(tag).isdisjoint(value) for _, value in self.tags)
+
+    def add(self, tag: str, value: str) -> None:
+        """Add a literal tag and its replacement value to the group"""
+        for earlier, _ in self.tags:
+            self._conflict_texts.extend(_overlap_texts(earlier, tag))
+        self.tags.append((tag, value))
+        self._values.setdefault(tag, value)
+        self._regexp = None
+
+    def apply(self, text: str) -> str:
+        """Return the text with all the tags replaced"""
+        if self._regexp is None:
+            self._regexp = re.compile("|".join(re.escape(tag) for tag in self._values))
+            if self._conflict_texts:
+                self._conflicts = re.compile("|".join(map(re.escape, self._conflict_texts)))
+        if self._conflicts and self._conflicts.search(text):
+            for tag, value in self.tags:
+                text = text.replace(tag, value)
+            return text
+        return self._regexp.sub(lambda match: self._values[match.group(0)], text)
+
+
+def compile_replacements(replacements: List[Tuple[str, str]]) -> List[Callable[[str], str]]:
+    """
+    Compile the given (regexp, replacement_string) pairs into a list of substitutions
+
+    Consecutive literal tags, e.g. "%QT_VERSION%", are grouped into TagSubstitutions applied in
+    a single pass. Other regexps are kept as separate substitutions.
+
+    Args:
+        replacements: The regexps and their replacement strings in the order of application
+
+    Returns:
+        A list of functions which substitute the text given as argument, in application order
+    """
+    substitutions: List[Callable[[str], str]] = []
+    group: Optional[TagSubstitution] = None
+    for regexp, replacement_string in replacements:
+        if not regexp or not set(regexp).isdisjoint(".^$*+?{}[]\\|()"):
+            group = None
+            substitutions.append(partial(re.compile(regexp).sub, replacement_string))
+            continue
+        if group is None or not group.accepts(regexp):
+            group = TagSubstitution()
+            substitutions.append(group.apply)
+        # expand the escapes in the replacement string like re.sub() does
+        group.add(regexp, re.sub(re.escape(regexp), replacement_string, regexp))
+    return substitutions
+
+
+def replace_tags_in_files(filelist: List[str], replacements: List[Tuple[str, str]]) -> None:
+    """
+    Substitute all the given tags in files, reading and writing each file only once
+
+    The result is the same as calling replace_in_files() for each (regexp, replacement_string)
+    pair in the given order. Files are not rewritten if their contents do not change.
+
+    Args:
+        filelist: The files to modify
+        replacements: The regexps and their replacement strings in the order of application
+    """
+    substitutions = compile_replacements(replacements)
+    for xfile in filelist:
+        with open(xfile, 'r', encoding="utf-8") as handle:
+            old_contents = handle.read()
+        new_contents = old_contents
+        for substitute in substitutions:
+            new_contents = substitute(new_contents)
+        if old_contents != new_contents:
+            log.info("Replacements applied into: %s", xfile)
+            with open(xfile, 'w', encoding="utf-8") as handle:
+                handle.write(new_contents)
+
+
 ###############################
 # function
 ###############################
@@ -422,7 +847,7 @@ def calculate_runpath(file_full_path: Path, destination_lib_path: Path) -> str:
 
 def read_file_rpath(file_path: Path) -> Optional[str]:
     """
-    Read a RPath value from the given binary with the 'chrpath' tool.
+    Read a RPath value from the given binary.
 
     Args:
         file_path: A path to a binary file to read from
@@ -430,21 +855,19 @@ def read_file_rpath(file_path: Path) -> Optional[str]:
     Returns:
         The RPath from the binary if found, otherwise None
     """
-    output = ""
-    with suppress(CalledProcessError):
-        output = run_cmd(cmd=["chrpath", "-l", str(file_path)])
-    result = re.search(r":*.R.*PATH=.*", output)
-    if result is None:
+    try:
+        rpath = read_elf_rpath(file_path)
+    except (OSError, ElfRpathError) as err:
+        log.debug("Unable to read RPATH/RUNPATH: %s", err)
         return None
-    rpath = result.group()
-    index = rpath.index('=')
-    rpath = rpath[index + 1:]
-    return rpath
+    return rpath.value if rpath is not None else None
 
 
-def update_file_rpath(file: Path, component_root: Path, destination_paths: str) -> None:
+def update_file_rpath(
+    file: Path, component_root: Path, destination_paths: str
+) -> Optional[Tuple[str, str]]:
     """
-    Change the RPATH/RUNPATH inside a binary file with the 'chrpath' tool.
+    Change the RPATH/RUNPATH inside a binary file.
     Removes any existing paths not relative to $ORIGIN (binary path)
     New RPATH/RUNPATH length must fit the space allocated inside the binary.
 
@@ -453,6 +876,9 @@ def update_file_rpath(file: Path, component_root: Path, destination_paths: str)
         component_root: A root path for the component
         destination_paths: A string containing the destination paths relative to root path
 
+    Returns:
+        The old and the new RPATH/RUNPATH if the binary was changed, otherwise None
+
     Raises:
         PackagingError: When the RPATH/RUNPATH cannot be replaced (e.g. not enough space in binary)
     """
@@ -460,7 +886,7 @@ def update_file_rpath(file: Path, component_root: Path, destination_paths: str)
     existing_rpath = read_file_rpath(file)
     if existing_rpath is None:
         log.debug("No RPATH/RUNPATH found in %s", file)
-        return
+        return None
     # Create a list of new rpaths from 'destination_paths'
     rpaths = []
     for dest_path in destination_paths.split(':'):
@@ -473,11 +899,15 @@ def update_file_rpath(file: Path, component_root: Path, destination_paths: str)
             rpaths.append(origin_rpath.group())
     # Join the final rpath tag value and update it inside the binary
     new_rpath = ':'.join(rpaths)
+    if new_rpath == existing_rpath:
+        return None
     try:
         log.debug("Change RPATH/RUNPATH [%s] -> [%s] for [%s]", existing_rpath, new_rpath, file)
-        run_cmd(cmd=['chrpath', '-r', new_rpath, str(file)])
-    except CalledProcessError as err:
+        write_elf_rpath(file, new_rpath)
+    except (OSError, ElfRpathError) as err:
+        log.error(str(err))
         raise PackagingError(f"Unable to replace RPATH/RUNPATH in {file}") from err
+    return existing_rpath, new_rpath
 
 
 def is_elf_binary(path: Path) -> bool:
@@ -497,7 +927,9 @@ def is_elf_binary(path: Path) -> bool:
     return False
 
 
-def handle_component_rpath(component_root_path: Path, destination_lib_paths: str) -> None:
+def handle_component_rpath(
+    component_root_path: Path, destination_lib_paths: str, max_workers: Optional[int] = None
+) -> Dict[Path, Tuple[str, str]]:
     """
     Handle updating the RPath with 'destination_lib_paths' for all executable files in the given
     'component_root_path'.
@@ -505,18 +937,30 @@ def handle_component_rpath(component_root_path: Path, destination_lib_paths: str
     Args:
         component_root_path: Path to search executables from
         destination_lib_paths: String containing the paths to add to RPath
+        max_workers: Number of files handled in parallel, by default the disk job limit
+
+    Returns:
+        A report of the changed binaries: the old and the new RPath for each file
 
     Raises:
-        PackagingError: When the 'chrpath' tool is not found in PATH
+        PackagingError: When the RPath of a binary cannot be updated
     """
     log.info("Handle RPATH/RUNPATH for all files")
     log.info("Component's root path: %s", component_root_path)
     log.info("Destination lib paths: %s", destination_lib_paths)
-    if shutil.which("chrpath") is None:
-        raise PackagingError("The 'chrpath' tool was not found in PATH")
     # loop on all binary files in component_root_path
-    for file in locate_paths(component_root_path, ["*"], [is_elf_binary]):
-        update_file_rpath(Path(file), component_root_path, destination_lib_paths)
+    files = [Path(file) for file in locate_paths(component_root_path, ["*"], [is_elf_binary])]
+    max_workers = max_workers or get_governor().limit(Resource.DISK)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(
+            lambda file: update_file_rpath(file, component_root_path, destination_lib_paths),
+            files,
+        )
+        report = {file: change for file, change in zip(files, results) if change is not None}
+    for file, (old_rpath, new_rpath) in report.items():
+        log.info("Changed RPATH/RUNPATH [%s] -> [%s] for [%s]", old_rpath, new_rpath, file)
+    log.info("Changed RPATH/RUNPATH for %s of %s binaries", len(report), len(files))
+    return report
 
 
 ###############################
@@ -627,6 +1071,99 @@ def extract_file(path: str, to_directory: str = ".") -> bool:
     return True
 
 
+# tar arguments for reading the supported stream formats from stdin, compression is not
+# auto-detected for non-seekable input so it needs to be specified explicitly
+TAR_STREAM_FORMATS: Dict[str, List[str]] = {
+    ".tar": [],
+    ".tar.gz": ["-z"],
+    ".tgz": ["-z"],
+    ".tar.xz": ["-J"],
+    ".tar.bz2": ["-j"],
+    ".tbz": ["-j"],
+}
+
+
+def get_stream_extract_args(uri: str) -> Optional[List[str]]:
+    """
+    Get the tar decompression arguments for extracting the given archive from a stream
+
+    Args:
+        uri: An URI or a file system path for the archive
+
+    Returns:
+        A list of tar arguments, or None if the archive format can't be extracted from a stream
+    """
+    path = urlparse(uri).path
+    for suffix, args in TAR_STREAM_FORMATS.items():
+        if path.endswith(suffix):
+            return args
+    return None
+
+
+def stream_extract_file(
+    url: str, to_directory: str, block_size: int = 1024 * 1024, timeout: float = 30
+) -> None:
+    """
+    Download a tar archive and extract it on the fly, the archive itself is never saved to disk
+
+    Args:
+        url: An URL for the tar archive to download
+        to_directory: A directory to extract the archive contents to
+        block_size: Size of the blocks read from the response and passed to the extractor
+        timeout: Seconds to wait for the connection and for each block before failing
+
+    Raises:
+        PackagingError: When the archive format is not supported, download or extraction fails
+    """
+    decompress_args = get_stream_extract_args(url)
+    if decompress_args is None:
+        raise PackagingError(f"Stream extraction not supported for: {url}")
+    Path(to_directory).mkdir(parents=True, exist_ok=True)
+    log.info("Stream extract: %s -> %s", url, to_directory)
+    # extract next to the target first so that a failure does not leave partial content there
+    staging_dir = mkdtemp(prefix=".extract-", dir=os.path.dirname(os.path.abspath(to_directory)))
+    try:
+        _stream_extract(url, staging_dir, decompress_args, block_size, timeout)
+        move_tree(staging_dir, to_directory)
+    finally:
+        remove_tree(staging_dir)
+
+
+def _stream_extract(
+    url: str, to_directory: str, decompress_args: List[str], block_size: int, timeout: float
+) -> None:
+    cmd_args = ["tar", "-x"] + decompress_args + ["-f", "-"]
+    received = 0
+    total_size = -1
+    with TemporaryFile() as output:
+        with Popen(cmd_args, cwd=to_directory, stdin=PIPE, stdout=output, stderr=STDOUT) as proc:
+            assert proc.stdin is not None
+            try:
+                with urlopen(url, timeout=timeout) as response:
+                    total_size = int(response.info().get("Content-Length", -1))
+                    while True:
+                        block = response.read(block_size)
+                        if not block:
+                            break
+                        proc.stdin.write(block)
+                        received += len(block)
+                proc.stdin.close()
+            except OSError as err:
+                # also covers a broken pipe if the extractor exited prematurely
+                proc.kill()
+                proc.wait()
+                output.seek(0)
+                tar_output = output.read().decode("utf-8", errors="replace")
+                raise PackagingError(f"Stream extract failed: {url}: {err} {tar_output}") from err
+            ret = proc.wait()
+        if ret:
+            output.seek(0)
+            tar_output = output.read().decode("utf-8", errors="replace")
+            raise PackagingError(f"Extracting {url} failed with exit code {ret}: {tar_output}")
+    if 0 <= total_size != received:
+        raise PackagingError(f"Incomplete download: {url}: {received}/{total_size} bytes")
+
+
 ###############################
 # function
 ###############################
@@ -699,7 +1236,8 @@ def create_download_extract_task(url: str, target_path: str, temp_path: str) ->
 ###############################
 def create_qt_download_task(module_urls: List[str], target_qt5_path: str, temp_path: str, caller_arguments: Optional[Namespace]) -> Task:
     qt_task = Task(f'download and extract Qt to "{target_qt5_path}"', function=None)
-    download_work = ThreadedWork(f'download Qt packages to "{temp_path}"')
+    qt_task.container = True
+    download_work = ThreadedWork(f'download Qt packages to "{temp_path}"', resource=Resource.NETWORK)
     unzip_task = Task(f'extracting packages to "{target_qt5_path}"', function=None)
     # add Qt modules
     for module_url in module_urls:
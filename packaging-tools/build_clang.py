@@ -40,6 +40,7 @@ import environmentfrombatchfile
 from bld_utils import is_linux, is_macos, is_windows, run_command
 from bldinstallercommon import create_download_extract_task, create_qt_download_task
 from read_remote_config import get_pkg_value
+from resource_governor import Resource
 from runner import run_cmd
 from threadedwork import ThreadedWork
 
@@ -197,7 +198,7 @@ def mingw_training(
     qt_mingw_module_urls = [qt_base_url + '/' + module + '/' + module + qt_mingw_postfix for module in qt_modules]
     qt_temp = os.path.join(base_path, 'qt_download')
     qt_mingw_temp = os.path.join(base_path, 'qt_download_mingw')
-    download_packages_work = ThreadedWork("get and extract Qt")
+    download_packages_work = ThreadedWork("get and extract Qt", resource=Resource.NETWORK)
     download_packages_work.add_task_object(create_qt_download_task(qt_module_urls, qt_dir, qt_temp, None))
     download_packages_work.add_task_object(create_qt_download_task(qt_mingw_module_urls, qt_mingw_dir, qt_mingw_temp, None))
 
@@ -76,6 +76,7 @@ from logging_util import init_logger
 from notarize import notarize
 from optionparser import get_pkg_options
 from read_remote_config import get_pkg_value
+from resource_governor import Resource
 from runner import run_cmd
 from threadedwork import Task, ThreadedWork
 
@@ -704,7 +705,7 @@ def handle_qt_creator_build(option_dict: Dict[str, str], qtcreator_plugins: List
             pkg_base_path + '/' + gammaray_url + '/' + target_env_dir + '/qt5_gammaray.7z'
         )
 
-    download_work = ThreadedWork('Download packages')
+    download_work = ThreadedWork('Download packages', resource=Resource.NETWORK)
     extract_work = Task('Extract packages', function=None)
 
     def add_download_extract(url: str, target_path: str) -> None:
@@ -1138,7 +1139,7 @@ def handle_sdktool_build(option_dict: Dict[str, str]) -> None:
                     '--build', os.path.join(work_dir, 'build'),
                     '--no-qtcreator']
 
-        download_packages_work = ThreadedWork('Get and extract all needed packages')
+        download_packages_work = ThreadedWork('Get and extract all needed packages', resource=Resource.NETWORK)
         python_path = None
         python_url = option_dict.get('PYTHON_URL')
         if python_url:
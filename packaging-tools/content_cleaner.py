@@ -31,12 +31,14 @@
 
 import argparse
 import os
+import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List
+from typing import Iterator, List, Optional, Set, Tuple
 
-from installer_utils import ch_dir
 from logging_util import init_logger
+from resource_governor import Resource, get_governor
 
 log = init_logger(__name__, debug_mode=False)
 
@@ -56,6 +58,120 @@ def expand_rules(rules: List[str]) -> List[str]:
     return matches
 
 
+def _translate_part(part: str) -> str:
+    """Translate a glob pattern path component to a regexp, wildcards do not match '/'"""
+    regexp = ""
+    idx = 0
+    while idx < len(part):
+        char = part[idx]
+        idx += 1
+        if char == "*":
+            regexp += "[^/]*"
+        elif char == "?":
+            regexp += "[^/]"
+        elif char == "[":
+            # character set as in fnmatch: '!' negates, a leading ']' is a literal
+            end = idx + 1 if part[idx:idx + 1] == "!" else idx
+            end = end + 1 if part[end:end + 1] == "]" else end
+            end = part.find("]", end)
+            if end < 0:
+                regexp += "\\["
+                continue
+            chars = part[idx:end].replace("\\", "\\\\")
+            idx = end + 1
+            if chars.startswith("!"):
+                chars = "^/" + chars[1:]
+            elif chars.startswith("^"):
+                chars = "\\" + chars
+            regexp += f"[{chars}]"
+        else:
+            regexp += re.escape(char)
+    return regexp
+
+
+class ContentMatcher:
+    """
+    Match relative paths against a list of glob rules in a single lookup
+
+    The rules are matched like Path(".").rglob(rule) would match them, i.e. a rule can match
+    at any depth of the directory tree and a rule ending with a separator matches directories
+    only. Rules which are plain names are looked up from a set, the rest are compiled into a
+    single regexp.
+    """
+
+    def __init__(self, rules: List[str]) -> None:
+        self.names: Set[str] = set()
+        self.dir_names: Set[str] = set()
+        regexps: List[str] = []
+        dir_regexps: List[str] = []
+        for mask in rules:
+            mask = mask.replace(os.sep, "/")
+            dir_only = mask.endswith("/")
+            # pathlib returns nothing with pattern ending "**"
+            # append "/*" to the mask for such patterns
+            mask = mask + "/*" if mask.endswith("**") else mask
+            parts = [part for part in mask.split("/") if part not in ("", ".")]
+            if len(parts) == 1 and not any(char in parts[0] for char in "*?["):
+                (self.dir_names if dir_only else self.names).add(parts[0])
+                continue
+            regexp = "(?:[^/]+/)*"
+            for idx, part in enumerate(parts):
+                if part == "**":
+                    regexp += "(?:[^/]+/)*"
+                else:
+                    regexp += _translate_part(part) + ("/" if idx < len(parts) - 1 else "")
+            (dir_regexps if dir_only else regexps).append(regexp)
+        flags = re.IGNORECASE if os.name == "nt" else 0
+        self.regexp = re.compile("|".join(regexps), flags) if regexps else None
+        self.dir_regexp = re.compile("|".join(dir_regexps), flags) if dir_regexps else None
+
+    def matches(self, rel_path: str, is_dir: bool = False) -> bool:
+        """
+        Return whether the path matches any of the rules
+
+        Args:
+            rel_path: A path relative to the content root, using '/' as the separator
+            is_dir: Whether the path is a directory, only then the directory rules can match
+
+        Returns:
+            True if the path matches a rule, otherwise False
+        """
+        name = rel_path.rsplit("/", 1)[-1]
+        if name in self.names or (is_dir and name in self.dir_names):
+            return True
+        if self.regexp is not None and self.regexp.fullmatch(rel_path) is not None:
+            return True
+        if is_dir and self.dir_regexp is not None:
+            return self.dir_regexp.fullmatch(rel_path) is not None
+        return False
+
+
+def _scan_content(root: str, rel_dir: str = "") -> Iterator[Tuple[str, os.DirEntry[str]]]:
+    """Yield the relative path and the entry of each item under root, symlinks not followed"""
+    with os.scandir(os.path.join(root, rel_dir)) as entries:
+        for entry in entries:
+            rel_path = rel_dir + "/" + entry.name if rel_dir else entry.name
+            yield rel_path, entry
+            if entry.is_dir(follow_symlinks=False):
+                yield from _scan_content(root, rel_path)
+
+
+def _remove_files(paths: List[str], max_workers: Optional[int]) -> None:
+    """Remove the given files, using multiple threads if max_workers is greater than one"""
+    max_workers = max_workers or get_governor().limit(Resource.DISK)
+
+    def _remove(path: str) -> None:
+        log.info("Removing file: %s", path)
+        os.remove(path)
+
+    if max_workers > 1 and len(paths) > 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(_remove, paths))
+    else:
+        for path in paths:
+            _remove(path)
+
+
 def remove_empty_directories(root_path: str) -> None:
     for root, dirs, _ in os.walk(root_path, topdown=True):
         for name in dirs:
@@ -65,36 +181,38 @@ def remove_empty_directories(root_path: str) -> None:
                 os.removedirs(dir_path)
 
 
-def preserve_content(input_dir: str, preserve_rules: List[str]) -> None:
+def preserve_content(
+    input_dir: str, preserve_rules: List[str], max_workers: Optional[int] = None
+) -> None:
     log.info("Cleaning content from: '%s' - preserve_rules: %s", input_dir, preserve_rules)
     if not os.path.isdir(input_dir):
         raise CleanerError(f"Not a valid input directory: {input_dir}")
     split_preserve_rules = [word for line in preserve_rules for word in line.split()]
-    with ch_dir(input_dir):
-        files_to_keep = expand_rules(split_preserve_rules)
-        for path in Path(".").rglob("*"):
-            if str(path) in files_to_keep:
-                continue
-            if not os.path.islink(path) and os.path.isdir(path):
-                continue
-            log.info("Removing file: %s", path)
-            os.remove(path)
+    matcher = ContentMatcher(split_preserve_rules)
+    files_to_remove = [
+        entry.path
+        for rel_path, entry in _scan_content(input_dir)
+        if not entry.is_dir(follow_symlinks=False)
+        and not matcher.matches(rel_path, is_dir=entry.is_dir())
+    ]
+    _remove_files(files_to_remove, max_workers)
     remove_empty_directories(input_dir)
 
 
-def remove_content(input_dir: str, remove_rules: List[str]) -> None:
+def remove_content(
+    input_dir: str, remove_rules: List[str], max_workers: Optional[int] = None
+) -> None:
     log.info("Removing files from: '%s' - remove_rules: %s", input_dir, remove_rules)
     if not os.path.isdir(input_dir):
         raise CleanerError(f"Not a valid input directory: {input_dir}")
     split_remove_rules = [word for line in remove_rules for word in line.split()]
-    with ch_dir(input_dir):
-        files_to_remove = expand_rules(split_remove_rules)
-        for path in Path(".").rglob("*"):
-            if os.path.isdir(path):
-                continue
-            if str(path) in files_to_remove:
-                log.info("Removing: %s", path)
-                os.remove(path)
+    matcher = ContentMatcher(split_remove_rules)
+    files_to_remove = [
+        entry.path
+        for rel_path, entry in _scan_content(input_dir)
+        if not entry.is_dir() and matcher.matches(rel_path)
+    ]
+    _remove_files(files_to_remove, max_workers)
     remove_empty_directories(input_dir)
 
 
@@ -117,11 +235,18 @@ def main() -> None:
         action="append",
         help="One or multiple glob based rules which files to remove",
     )
+    parser.add_argument(
+        "--max-workers",
+        dest="max_workers",
+        type=int,
+        default=None,
+        help="Number of files removed in parallel (default: disk job limit)",
+    )
     args = parser.parse_args(sys.argv[1:])
     if args.preserve_rules:
-        preserve_content(args.input_dir, args.preserve_rules)
+        preserve_content(args.input_dir, args.preserve_rules, args.max_workers)
     elif args.remove_rules:
-        remove_content(args.input_dir, args.remove_rules)
+        remove_content(args.input_dir, args.remove_rules, args.max_workers)
     else:
         raise SystemExit("--preserve or --remove rules need to be specified")
 
@@ -34,45 +34,61 @@ import os
 import re
 import shutil
 import sys
+import threading
 from argparse import ArgumentParser, ArgumentTypeError
 from configparser import ConfigParser, ExtendedInterpolation
+from contextlib import suppress
 from dataclasses import dataclass, field
 from enum import Enum
-from multiprocessing import cpu_count
 from pathlib import Path
+from tempfile import mkdtemp
 from time import gmtime, strftime
 from typing import Any, Dict, Generator, Generic, List, Optional, Tuple, TypeVar
+from urllib.parse import urlparse
 
 from temppathlib import TemporaryDirectory
 from urlpath import URL  # type: ignore
 
+from archive_reuse import ArchiveReuseStore
+from archive_writer import ArchivegenWriter, ArchiveWriter, TarArchiveWriter
+from artifact_cache import DEFAULT_CACHE_SIZE_GB, ArtifactCache, get_artifact_cache
 from bld_utils import download, is_linux, is_macos, is_windows
 from bldinstallercommon import (
     copy_tree,
     extract_file,
+    get_stream_extract_args,
     handle_component_rpath,
     is_long_path_supported,
     locate_executable,
     locate_path,
     remove_tree,
-    replace_in_files,
+    replace_tags_in_files,
     retrieve_url,
     safe_config_key_fetch,
+    stream_extract_file,
     strip_dirs,
     uri_exists,
+    wait_for_free_space,
+    wait_for_removals,
 )
+from disk_admission import DiskAdmission, estimate_footprint
 from installer_utils import PackagingError
 from logging_util import init_logger
 from patch_qt import patch_files, patch_qt_edition
 from pkg_constants import INSTALLER_OUTPUT_DIR_NAME, PKG_TEMPLATE_BASE_DIR_NAME
+from resource_governor import Resource, default_limits, get_governor
 from runner import run_cmd
 from sdkcomponent import IfwPayloadItem, IfwSdkComponent, parse_ifw_sdk_comp
 from sign_installer import recursive_sign_notarize
-from threadedwork import ThreadedWork
+from threadedwork import PipelineError, PipelineStep, PipelineWork
 from update_component_translations import lrelease
+from uri_validator import get_uri_validator
 
 log = init_logger(__name__, debug_mode=False)
 
+# guards the tools shared between concurrently running tasks, e.g. the IFW tools directory
+_shared_tools_lock = threading.Lock()
+
 QtInstallerTaskT = TypeVar("QtInstallerTaskT", bound="QtInstallerTask[Any]")
 
 # ----------------------------------------------------------------------
@@ -188,10 +204,11 @@ def set_config_xml(task: QtInstallerTaskT) -> Any:
     update_repository_url = safe_config_key_fetch(task.config, 'SdkUpdateRepository', 'repository_url_release')
 
     fileslist = [config_template_dest]
-    replace_in_files(fileslist, UPDATE_REPOSITORY_URL_TAG, update_repository_url)
     # substitute values also from global substitution list
-    for key, value in task.substitutions.items():
-        replace_in_files(fileslist, key, value)
+    replace_tags_in_files(
+        fileslist,
+        [(UPDATE_REPOSITORY_URL_TAG, update_repository_url), *task.substitutions.items()],
+    )
     return config_template_dest
 
 
@@ -217,11 +234,11 @@ def substitute_global_tags(task: QtInstallerTaskT) -> None:
                 path = os.path.join(root, name)
                 fileslist.append(path)
 
-    replace_in_files(fileslist, PACKAGE_CREATION_DATE_TAG, task.build_timestamp)
+    replacements = [(PACKAGE_CREATION_DATE_TAG, task.build_timestamp)]
     if task.force_version_number_increase:
-        replace_in_files(fileslist, VERSION_NUMBER_AUTO_INCREASE_TAG, task.version_number_auto_increase_value)
-    for key, value in task.substitutions.items():
-        replace_in_files(fileslist, key, value)
+        replacements.append((VERSION_NUMBER_AUTO_INCREASE_TAG, task.version_number_auto_increase_value))
+    replacements.extend(task.substitutions.items())
+    replace_tags_in_files(fileslist, replacements)
 
 
 ##############################################################
@@ -242,14 +259,16 @@ def substitute_component_tags(tag_pair_list: List[List[str]], meta_dir_dest: str
             path = os.path.join(root, name)
             fileslist.append(path)
 
+    replacements = []
     for pair in tag_pair_list:
         tag = pair[0]
         value = pair[1]
         if tag and value:
             log.info("Matching '%s' and '%s' in files list", tag, value)
-            replace_in_files(fileslist, tag, value)
+            replacements.append((tag, value))
         else:
             log.warning("Ignoring incomplete tag pair: %s = %s", tag, value)
+    replace_tags_in_files(fileslist, replacements)
 
 
 ##############################################################
@@ -280,42 +299,52 @@ def parse_component_data(
         for item in pkg_list:
             task.sdk_component_ignore_list.append(item)
     # parse sdk components
+    sdk_components: List[IfwSdkComponent] = []
     for section in configuration.sections():
         section_namespace = section.split(".")[0]
         if section_namespace in task.package_namespace:
             if section not in task.sdk_component_ignore_list:
-                sdk_comp = parse_ifw_sdk_comp(
-                    config=configuration,
-                    section=section,
-                    pkg_template_search_dirs=task.packages_dir_name_list,
-                    substitutions=task.substitutions,
-                    file_share_base_url=task.archive_base_url,
-                    base_work_dir=Path(task.packages_full_path_dst),
-                    notarize_payload=task.notarize_payload,
-                )
-                # validate the component
-                # - payload URIs are always checked when not in dry_run or when mode is 'payload'
-                # - errors are not raised in dry_run, so we are able to log all the errors at once
-                component_is_valid = sdk_comp.validate(
-                    uri_check=not task.dry_run or task.dry_run == DryRunMode.PAYLOAD,
-                    ignore_errors=bool(task.dry_run) or task.partial_installer,
+                sdk_components.append(
+                    parse_ifw_sdk_comp(
+                        config=configuration,
+                        section=section,
+                        pkg_template_search_dirs=task.packages_dir_name_list,
+                        substitutions=task.substitutions,
+                        file_share_base_url=task.archive_base_url,
+                        base_work_dir=Path(task.packages_full_path_dst),
+                        notarize_payload=task.notarize_payload,
+                    )
                 )
-                # invalid components are skipped when in partial_installer mode
-                # all component data is skipped when a dry_run mode is specified
-                if (task.partial_installer and not component_is_valid) or task.dry_run:
-                    log.warning("Skipping component: [%s]", sdk_comp.ifw_sdk_comp_name)
-                    # collect validation errors
-                    task.errors.extend(sdk_comp.errors)
-                    sdk_comp.archive_skip = True
-                # if include filter defined for component it is included only if LICENSE_TYPE
-                # matches to include_filter
-                # same configuration file can contain components that are included only to
-                # either edition
-                if sdk_comp.include_filter and sdk_comp.include_filter in task.license_type:
-                    task.sdk_component_list.append(sdk_comp)
-                # components without include_filter definition are added by default
-                elif not sdk_comp.include_filter:
-                    task.sdk_component_list.append(sdk_comp)
+    # payload URIs are always checked when not in dry_run or when mode is 'payload'
+    uri_check = not task.dry_run or task.dry_run == DryRunMode.PAYLOAD
+    if uri_check:
+        # check the payload URIs of all the components in one concurrent batch
+        get_uri_validator().prefetch(
+            uri for sdk_comp in sdk_components for uri in sdk_comp.payload_uris_to_validate()
+        )
+    for sdk_comp in sdk_components:
+        # validate the component
+        # - errors are not raised in dry_run, so we are able to log all the errors at once
+        component_is_valid = sdk_comp.validate(
+            uri_check=uri_check,
+            ignore_errors=bool(task.dry_run) or task.partial_installer,
+        )
+        # invalid components are skipped when in partial_installer mode
+        # all component data is skipped when a dry_run mode is specified
+        if (task.partial_installer and not component_is_valid) or task.dry_run:
+            log.warning("Skipping component: [%s]", sdk_comp.ifw_sdk_comp_name)
+            # collect validation errors
+            task.errors.extend(sdk_comp.errors)
+            sdk_comp.archive_skip = True
+        # if include filter defined for component it is included only if LICENSE_TYPE
+        # matches to include_filter
+        # same configuration file can contain components that are included only to
+        # either edition
+        if sdk_comp.include_filter and sdk_comp.include_filter in task.license_type:
+            task.sdk_component_list.append(sdk_comp)
+        # components without include_filter definition are added by default
+        elif not sdk_comp.include_filter:
+            task.sdk_component_list.append(sdk_comp)
     # check for extra configuration files if defined
     extra_conf_list = safe_config_key_fetch(configuration, 'PackageConfigurationFiles', 'file_list')
     if extra_conf_list:
@@ -520,14 +549,37 @@ def patch_component_data(
         handle_component_rpath(install_dir, archive.rpath_target)
 
 
+def get_archive_writer(task: QtInstallerTaskT, archive_name: str) -> ArchiveWriter:
+    """
+    Get the archive writer for the payload archive, archivegen is used for unsupported formats
+
+    Args:
+        task: An instance of QtInstallerTask
+        archive_name: The file name of the archive to create
+
+    Returns:
+        An instance of ArchiveWriter
+    """
+    if task.archive_writer != ArchivegenWriter.name:
+        writer = ArchiveWriter.get_writer(
+            task.archive_writer, threads=task.compression_threads, level=task.compression_level
+        )
+        if writer.supports(archive_name):
+            return writer
+    return ArchivegenWriter(archivegen_tool=task.archivegen_tool)
+
+
 def recompress_component(
     task: QtInstallerTaskT, archive: IfwPayloadItem, destination_dir: Path, compress_dir: Path
 ) -> None:
     """
     Recompress the component data to an IFW supported archive
 
+    If archive reuse is enabled for the task and the content is identical to the one the
+    previously stored archive was generated from, the stored archive is used instead.
+
     Args:
-        task: An instance of QtInstallerTask used for getting the archivegen tool
+        task: An instance of QtInstallerTask used for getting the archive writer
         archive: An instance of IfwPayloadItem, containing the archive name and format
         destination_dir: A directory for where to save the compressed archive
         compress_dir: A directory containing the content to add to the archive
@@ -536,13 +588,58 @@ def recompress_component(
         CalledProcessError: When running the archivegen command fails
     """
     # Compress to final archive format
-    # add compress_dir in front of every item to ensure correct install paths
-    content_list = [str(compress_dir / x) for x in os.listdir(compress_dir)]
     saveas = Path(destination_dir, archive.archive_name)
     arch_format = Path(archive.archive_name).suffix.strip(".")
-    run_cmd([task.archivegen_tool, "-f", arch_format, str(saveas)] + content_list, destination_dir)
+    writer = get_archive_writer(task, archive.archive_name)
+    manifest: Dict[str, Any] = {}
+    if task.archive_reuse is not None:
+        manifest = task.archive_reuse.create_manifest(
+            compress_dir, format=arch_format, tool=task.ifw_tools_uri, **writer.properties()
+        )
+        if task.archive_reuse.reuse(archive.package_name, archive.archive_name, manifest, saveas):
+            log.info("[%s] Content unchanged, reuse: %s", archive.package_name, saveas.name)
+            return
+    writer.write(saveas, compress_dir)
     if not saveas.exists():
         raise CreateInstallerError(f"Generated archive doesn't exist: {saveas}")
+    if task.archive_reuse is not None:
+        task.archive_reuse.store(archive.package_name, archive.archive_name, manifest, saveas)
+
+
+def download_payload(
+    task: QtInstallerTaskT, payload_uri: str, target: Path, allow_hardlink: bool = False
+) -> None:
+    """
+    Download a payload item, using the task's artifact cache if it is enabled
+
+    Args:
+        task: An instance of QtInstallerTask
+        payload_uri: An URI for the payload to download
+        target: A file system path to download to
+        allow_hardlink: Whether the target may be hardlinked to the cache, i.e. read-only use
+    """
+    if task.artifact_cache is None:
+        download(payload_uri, str(target))
+    else:
+        task.artifact_cache.fetch(payload_uri, target, allow_hardlink=allow_hardlink)
+
+
+def can_stream_extract(task: QtInstallerTaskT, payload_uri: str) -> bool:
+    """
+    Check whether the payload can be extracted directly from the download stream
+
+    Args:
+        task: An instance of QtInstallerTask
+        payload_uri: An URI for the payload to download
+
+    Returns:
+        True if streaming is enabled, the payload is a remote tar archive and it is not cached
+    """
+    if not task.stream_extract or task.artifact_cache is not None:
+        return False
+    if urlparse(payload_uri).scheme not in ("http", "https"):
+        return False
+    return get_stream_extract_args(payload_uri) is not None
 
 
 def get_component_data(
@@ -562,6 +659,9 @@ def get_component_data(
     """
     install_dir = sdk_comp.work_dir_temp / archive.archive_name / archive.get_archive_install_dir()
     install_dir.mkdir(parents=True, exist_ok=True)
+    # Throttle new downloads while the work dirs of finished payload items are being removed
+    if task.min_free_disk_space:
+        wait_for_free_space(str(install_dir), task.min_free_disk_space * 1024**3)
     # Handle pattern match payload URIs for IfwPayloadItem
     if archive.payload_base_uri:
         for payload_uri in archive.payload_uris:
@@ -570,7 +670,7 @@ def get_component_data(
             # Download to install dir with the correct paths
             dl_path = Path(install_dir, dl_name)
             log.info("[%s] Download: %s", archive.package_name, dl_name)
-            download(payload_uri, str(dl_path))
+            download_payload(task, payload_uri, dl_path)
     # If pattern match not used in URI, contains only a single source payload URI
     else:
         payload_uri = archive.payload_uris[0]
@@ -585,7 +685,7 @@ def get_component_data(
             or archive.disable_extract_archive is True
         ):
             log.info("[%s] Download: %s", archive.package_name, str(install_dir / dl_name))
-            download(payload_uri, str(install_dir / dl_name))
+            download_payload(task, payload_uri, install_dir / dl_name)
         # For payload already in IFW compatible format, use the raw artifact and continue
         elif archive.is_raw_artifact is True:
             # Save to data dir as archive_name
@@ -599,17 +699,23 @@ def get_component_data(
                     Path(dl_name).suffix, Path(archive.archive_name).suffix
                 )
             log.info("[%s] Download: %s", archive.package_name, dl_name)
-            download(payload_uri, str(data_dir_dest / archive.archive_name))
+            download_payload(task, payload_uri, data_dir_dest / archive.archive_name)
             return
+        # Extract tar payloads while downloading if no local copy of the archive is needed
+        elif can_stream_extract(task, payload_uri):
+            log.info("[%s] Download and extract: %s", archive.package_name, dl_name)
+            with get_governor().acquire(Resource.DISK):
+                stream_extract_file(payload_uri, str(install_dir.resolve(strict=True)))
         # Extract payload archive when required to be patched or recompressed to compatible format
         else:
             # Use temporary directory to avoid naming clashes
             with TemporaryDirectory() as temp_dir:
                 dl_path = temp_dir.path / dl_name
                 log.info("[%s] Download: %s", archive.package_name, str(dl_path))
-                download(payload_uri, str(dl_path))
+                download_payload(task, payload_uri, dl_path, allow_hardlink=True)
                 log.info("[%s] Extract: %s", archive.package_name, archive.archive_name)
-                extract_component_data(dl_path, install_dir)
+                with get_governor().acquire(Resource.DISK):
+                    extract_component_data(dl_path, install_dir)
     # If patching items are specified, execute them here
     if archive.requires_patching:
         log.info("[%s] Patch: %s", archive.package_name, archive.archive_name)
@@ -658,6 +764,33 @@ def substitute_package_name(task: QtInstallerTaskT, package_name: str) -> str:
     return package_name
 
 
+def estimate_payload_footprint(archive: IfwPayloadItem) -> Tuple[int, int]:
+    """
+    Estimate the disk space used for a payload item while it is processed
+
+    Args:
+        archive: An instance of IfwPayloadItem, the sizes of its payload URIs are looked up
+                 from the URI validator cache
+
+    Returns:
+        The estimated footprint in bytes of the work data and of the output archive, which
+        stays on disk. Payload files with unknown size are not counted.
+    """
+    footprint = 0
+    output_size = 0
+    for payload_uri in archive.payload_uris:
+        size = get_uri_validator().size(payload_uri) or 0
+        extract = (
+            not archive.payload_base_uri
+            and Path(payload_uri).suffix in archive.supported_arch_formats
+            and archive.disable_extract_archive is False
+        )
+        footprint += estimate_footprint(payload_uri, size, extract)
+        # the content is recompressed, expect a size similar to the downloaded payload
+        output_size += size
+    return footprint, output_size
+
+
 ##############################################################
 # Create target components
 ##############################################################
@@ -668,12 +801,42 @@ def create_target_components(task: QtInstallerTaskT) -> None:
     log.info("Creating SDK components")
     # download and extract lrelease binary for creating translation binaries
     if task.create_repository and task.lrelease_tool_url:
-        if not os.path.isfile(os.path.join(task.script_root_dir, "lrelease")):
-            download(task.lrelease_tool_url, task.script_root_dir)
-            extract_file(
-                os.path.basename(task.lrelease_tool_url), task.script_root_dir
-            )
-    get_component_data_work = ThreadedWork("get components data")
+        with _shared_tools_lock:
+            if not os.path.isfile(os.path.join(task.script_root_dir, "lrelease")):
+                download(task.lrelease_tool_url, task.script_root_dir)
+                extract_file(
+                    os.path.basename(task.lrelease_tool_url), task.script_root_dir
+                )
+    # with notarization the whole payload needs to be ready before compressing any of it
+    notarize = is_macos() and task.notarize_payload is True
+    # the stages draw from the process-wide limits shared with other concurrent tasks
+    stage_limits = {
+        "admit": 1,
+        "download": task.max_download_count,
+        "compress": task.max_cpu_count,
+        "cleanup": 1,
+    }
+    stage_resources = {"download": Resource.NETWORK, "compress": Resource.CPU}
+    get_component_data_work = PipelineWork(
+        "get components data", stage_limits, stage_resources
+    )
+    compress_component_data_work = PipelineWork(
+        "compress final components data", stage_limits, stage_resources
+    )
+    # the payload data is freed only after compression, with notarization that's at the end
+    admission: Optional[DiskAdmission] = None
+    if task.disk_budget and not (notarize or task.dry_run) and (
+        task.offline_installer or task.create_repository
+    ):
+        admission = DiskAdmission(task.disk_budget * 1024**3)
+        get_uri_validator().prefetch(
+            uri
+            for sdk_comp in task.sdk_component_list
+            for archive in sdk_comp.downloadable_archives
+            for uri in archive.payload_uris
+        )
+    # payload pipelines by the estimated footprint of the payload item
+    payload_pipelines: List[Tuple[int, str, List[PipelineStep]]] = []
     for sdk_comp in task.sdk_component_list:
         log.info(sdk_comp)
         if sdk_comp.archive_skip:
@@ -697,25 +860,54 @@ def create_target_components(task: QtInstallerTaskT) -> None:
         for archive in sdk_comp.downloadable_archives:
             # fetch packages only if offline installer or repo creation,
             # for online installer just handle the metadata
-            if task.offline_installer or task.create_repository:
-                # adding get_component_data task to our work queue
-                get_component_data_work.add_task(
-                    f"adding {archive.archive_name} to {sdk_comp.ifw_sdk_comp_name}",
-                    get_component_data,
+            if not (task.offline_installer or task.create_repository):
+                continue
+            # each payload item proceeds to compression as soon as its own data is ready
+            get_step = PipelineStep(
+                "download", get_component_data, task, sdk_comp, archive, sdk_comp.data_dir_dest
+            )
+            steps = [] if notarize else [get_step]
+            admitted = admission is not None and archive.is_raw_artifact is False
+            if archive.is_raw_artifact is False:
+                compress_dir = sdk_comp.work_dir_temp / archive.archive_name
+                compress_step = PipelineStep(
+                    "compress",
+                    recompress_component,
                     task,
-                    sdk_comp,
                     archive,
                     sdk_comp.data_dir_dest,
+                    compress_dir,
+                )
+                steps.append(compress_step)
+                # free the disk space of the extracted content while the pipelines continue,
+                # the disk budget can be released only once the space has actually been freed
+                steps.append(
+                    PipelineStep("cleanup", remove_tree, str(compress_dir), not admitted)
                 )
+            description = f"[{archive.package_name}] {archive.archive_name}"
+            if notarize:
+                get_component_data_work.add_pipeline(description, [get_step])
+                compress_component_data_work.add_pipeline(description, steps)
+            elif admission is not None and admitted:
+                # reserve the disk budget until the work data is removed, the output archive
+                # stays on disk and keeps its part reserved
+                work_size, output_size = estimate_payload_footprint(archive)
+                footprint = work_size + output_size
+                steps.insert(0, PipelineStep(
+                    "admit", admission.acquire, footprint,
+                    lambda: bool(get_component_data_work.errors),
+                ))
+                steps.append(PipelineStep("cleanup", admission.release, footprint, output_size))
+                payload_pipelines.append((footprint, description, steps))
+            else:
+                payload_pipelines.append((0, description, steps))
 
         # handle component sha1 uri
         if sdk_comp.comp_sha1_uri:
             sha1_file_dest = dest_base / "SHA1"
-            get_component_data_work.add_task(
+            get_component_data_work.add_pipeline(
                 f"getting component sha1 file for {sdk_comp.ifw_sdk_comp_name}",
-                get_component_sha1,
-                sdk_comp,
-                sha1_file_dest,
+                [PipelineStep("download", get_component_sha1, sdk_comp, sha1_file_dest)],
             )
 
         # maybe there is some bundled payload in config templates
@@ -725,36 +917,25 @@ def create_target_components(task: QtInstallerTaskT) -> None:
             log.info("Adding payload data from %s", data_content_source_root)
             copy_tree(data_content_source_root, str(sdk_comp.data_dir_dest))
 
+    # the largest items are admitted first while the disk is emptiest, the smaller ones fill in
+    for _, description, steps in sorted(payload_pipelines, key=lambda item: -item[0]):
+        get_component_data_work.add_pipeline(description, steps)
+
     if not task.dry_run:
-        # start the work threaded, more than 8 parallel downloads are not so useful
-        get_component_data_work.run(min([task.max_cpu_count, cpu_count()]))
-        # Sign, notarize, staple macOS content
-        if is_macos() and task.notarize_payload is True:
-            recursive_sign_notarize(Path(task.packages_full_path_dst))
-        compress_component_data_work = ThreadedWork("compress final components data")
-        # Compress to final components
-        for sdk_comp in task.sdk_component_list:
-            if sdk_comp.archive_skip:
-                continue
-            for archive in sdk_comp.downloadable_archives:
-                if archive.is_raw_artifact is False:
-                    compress_dir = sdk_comp.work_dir_temp / archive.archive_name
-                    compress_component_data_work.add_task(
-                        f"[{archive.package_name}] Compress: {archive.archive_name}",
-                        recompress_component,
-                        task,
-                        archive,
-                        sdk_comp.data_dir_dest,
-                        compress_dir
-                    )
-        # threaded compress
-        compress_component_data_work.run(min([task.max_cpu_count, cpu_count()]))
+        try:
+            get_component_data_work.run()
+            if notarize:
+                # Sign, notarize, staple macOS content
+                recursive_sign_notarize(Path(task.packages_full_path_dst))
+                compress_component_data_work.run()
+        except PipelineError as err:
+            raise CreateInstallerError(f"Failed to create component data: {err}") from err
 
     for sdk_comp in task.sdk_component_list:
         # substitute tags
         substitute_component_tags(create_metadata_map(sdk_comp), str(sdk_comp.meta_dir_dest))
-        # lastly remove temp dir after all data is prepared
-        if not remove_tree(str(sdk_comp.work_dir_temp)):
+        # lastly remove the rest of the temp dir after all data is prepared
+        if not remove_tree(str(sdk_comp.work_dir_temp), background=True):
             raise CreateInstallerError(f"Unable to remove dir: {sdk_comp.work_dir_temp}")
         if sdk_comp.downloadable_archives:
             # substitute downloadable archive names in installscript.qs
@@ -993,7 +1174,25 @@ def get_reproduce_args(task: QtInstallerTaskT) -> str:
         reproduce_cmd += "--force-version-number-increase "
     reproduce_cmd += "--version-number-auto-increase-value "
     reproduce_cmd += f"'{task.version_number_auto_increase_value}' "
-    reproduce_cmd += f"--max-cpu-count '{task.max_cpu_count}'"
+    reproduce_cmd += f"--max-cpu-count '{task.max_cpu_count}' "
+    reproduce_cmd += f"--max-download-count '{task.max_download_count}'"
+    if task.artifact_cache_dir:
+        reproduce_cmd += f" --artifact-cache-dir '{task.artifact_cache_dir}'"
+        reproduce_cmd += f" --artifact-cache-size '{task.artifact_cache_size}'"
+    if task.stream_extract is True:
+        reproduce_cmd += " --stream-extract"
+    if task.work_dir:
+        reproduce_cmd += f" --work-dir '{task.work_dir}'"
+    if task.min_free_disk_space:
+        reproduce_cmd += f" --min-free-disk-space '{task.min_free_disk_space}'"
+    if task.disk_budget:
+        reproduce_cmd += f" --disk-budget '{task.disk_budget}'"
+    if task.archive_reuse_dir:
+        reproduce_cmd += f" --archive-reuse-dir '{task.archive_reuse_dir}'"
+    reproduce_cmd += f" --archive-writer '{task.archive_writer}'"
+    if task.compression_level is not None:
+        reproduce_cmd += f" --compression-level '{task.compression_level}'"
+    reproduce_cmd += f" --compression-threads '{task.compression_threads}'"
     return reproduce_cmd
 
 
@@ -1030,6 +1229,9 @@ def create_installer(task: QtInstallerTaskT) -> None:
                 create_mac_disk_image(task)
         if task.create_repository:
             create_online_repository(task)
+    # wait for the background removal of the component work dirs, other installer tasks
+    # running in the same process may still have their own removals pending
+    wait_for_removals(task.packages_full_path_dst)
 
 
 def str2bool(value: str) -> bool:
@@ -1046,19 +1248,24 @@ def str2bool(value: str) -> bool:
 class QtInstallerTask(Generic[QtInstallerTaskT]):
     """QtInstallerTask dataclass"""
 
-    config = ConfigParser(interpolation=ExtendedInterpolation())
+    config: ConfigParser = field(
+        default_factory=lambda: ConfigParser(interpolation=ExtendedInterpolation()), init=False
+    )
     configurations_dir: str = "configurations"
     configuration_file: str = ""
     script_root_dir: str = os.path.dirname(os.path.realpath(__file__))
+    # root for the per-task working directories below, e.g. on tmpfs, default: script_root_dir
+    work_dir: str = os.getenv("PKG_WORK_DIR", "")
     ifw_tools_uri: str = ""
-    ifw_tools_dir: str = os.path.join(script_root_dir, "ifwt")
+    # shared read-only between the tasks, only written when installing the tools
+    ifw_tools_dir: str = os.getenv("PKG_IFW_TOOLS_DIR", os.path.join(script_root_dir, "ifwt"))
     archivegen_tool: str = ""
     binarycreator_tool: str = ""
     installerbase_tool: str = ""
     repogen_tool: str = ""
-    config_dir_dst: str = os.path.join(script_root_dir, "config")
-    packages_full_path_dst: str = os.path.join(script_root_dir, "pkg")
-    repo_output_dir: str = os.path.join(script_root_dir, "online_repository")
+    config_dir_dst: str = ""
+    packages_full_path_dst: str = ""
+    repo_output_dir: str = ""
     package_namespace: List[str] = field(default_factory=list)
     platform_identifier: str = ""
     installer_name: str = ""
@@ -1080,11 +1287,29 @@ class QtInstallerTask(Generic[QtInstallerTaskT]):
     build_timestamp: str = strftime("%Y-%m-%d", gmtime())
     force_version_number_increase: bool = False
     version_number_auto_increase_value: str = "-" + strftime("%Y%m%d%H%M", gmtime())
-    max_cpu_count: int = 8
+    max_cpu_count: int = field(default_factory=lambda: get_governor().limit(Resource.CPU))
+    max_download_count: int = field(
+        default_factory=lambda: get_governor().limit(Resource.NETWORK)
+    )
     substitution_list: List[str] = field(default_factory=list)
     lrelease_tool_url: str = os.getenv("LRELEASE_TOOL", "")
+    artifact_cache_dir: str = os.getenv("PKG_ARTIFACT_CACHE_DIR", "")
+    artifact_cache_size: int = int(os.getenv("PKG_ARTIFACT_CACHE_SIZE", str(DEFAULT_CACHE_SIZE_GB)))
+    artifact_cache: Optional[ArtifactCache] = field(default=None, init=False)
+    stream_extract: bool = os.getenv("PKG_STREAM_EXTRACT", "") == "1"
+    archive_reuse_dir: str = os.getenv("PKG_ARCHIVE_REUSE_DIR", "")
+    min_free_disk_space: int = int(os.getenv("PKG_MIN_FREE_DISK_SPACE", "0"))
+    disk_budget: int = int(os.getenv("PKG_DISK_BUDGET", "0"))
+    archive_writer: str = os.getenv("PKG_ARCHIVE_WRITER", ArchivegenWriter.name)
+    compression_level: Optional[int] = None
+    compression_threads: int = field(default_factory=lambda: get_governor().limit(Resource.CPU))
+    archive_reuse: Optional[ArchiveReuseStore] = field(default=None, init=False)
 
     def __post_init__(self) -> None:
+        work_root = os.path.abspath(self.work_dir or self.script_root_dir)
+        self.config_dir_dst = self.config_dir_dst or os.path.join(work_root, "config")
+        self.packages_full_path_dst = self.packages_full_path_dst or os.path.join(work_root, "pkg")
+        self.repo_output_dir = self.repo_output_dir or os.path.join(work_root, "online_repository")
         log.info("Parsing: %s", self.configuration_file)
         with open(self.configuration_file, encoding="utf-8") as cfgfile:
             self.config.read_file(cfgfile)
@@ -1095,6 +1320,12 @@ class QtInstallerTask(Generic[QtInstallerTaskT]):
             self.config.get("PackageTemplates", "template_dirs"), self.configurations_dir
         )
         self._parse_substitutions()
+        if self.artifact_cache_dir:
+            self.artifact_cache = get_artifact_cache(
+                self.artifact_cache_dir, self.artifact_cache_size
+            )
+        if self.archive_reuse_dir:
+            self.archive_reuse = ArchiveReuseStore(Path(self.archive_reuse_dir).resolve())
         if not is_long_path_supported():
             log.warning("Path names longer than 260 are not supported by the current environment")
 
@@ -1105,6 +1336,8 @@ class QtInstallerTask(Generic[QtInstallerTaskT]):
   Binarycreator: {self.binarycreator_tool}
   Installerbase: {self.installerbase_tool}
   Repogen: {self.repogen_tool}
+  Working dir: {self.work_dir or self.script_root_dir}
+  IFW tools dir: {self.ifw_tools_dir}
   Working config dir: {self.config_dir_dst}
   Working pkg dir: {self.packages_full_path_dst}
   Package namespace: {self.package_namespace}
@@ -1120,8 +1353,17 @@ class QtInstallerTask(Generic[QtInstallerTaskT]):
   Force version number increase: {self.force_version_number_increase}
   Version number auto increase value: {self.version_number_auto_increase_value}
   Mac cpu count: {self.max_cpu_count}
+  Max parallel downloads: {self.max_download_count}
   Long paths supported: {is_long_path_supported()}
   Notarize payload (macOS): {self.notarize_payload}
+  Artifact cache: {self.artifact_cache_dir or "disabled"}
+  Stream extract: {self.stream_extract}
+  Archive reuse: {self.archive_reuse_dir or "disabled"}
+  Min free disk space: {f"{self.min_free_disk_space} GB" if self.min_free_disk_space else "disabled"}
+  Disk budget: {f"{self.disk_budget} GB" if self.disk_budget else "disabled"}
+  Archive writer: {self.archive_writer}
+  Compression level: {self.compression_level}
+  Compression threads: {self.compression_threads}
 
   To reproduce build task with the above configuration, run the following command:
   {get_reproduce_args(self)}"""
@@ -1163,16 +1405,18 @@ class QtInstallerTask(Generic[QtInstallerTaskT]):
         """Setup Installer-Framework tools."""
         log.info("Install Installer Framework tools")
 
-        # check if the ifw tools is already extracted on disk to save time
-        if not os.path.exists(self.ifw_tools_dir):
-            self.download_and_extract_ifw_tools()
+        # the tools directory may be shared with other tasks running at the same time
+        with _shared_tools_lock:
+            # check if the ifw tools is already extracted on disk to save time
+            if not os.path.exists(self.ifw_tools_dir):
+                self.download_and_extract_ifw_tools()
 
-        try:
-            self.set_ifw_tools()
-        except Exception:
-            # try to download and set from scratch if the ifw archive on disk was corrupted
-            self.download_and_extract_ifw_tools()
-            self.set_ifw_tools()
+            try:
+                self.set_ifw_tools()
+            except Exception:
+                # try to download and set from scratch if the ifw archive on disk was corrupted
+                self.download_and_extract_ifw_tools(replace=True)
+                self.set_ifw_tools()
 
     ##############################################################
     # Install Installer-Framework tools
@@ -1194,22 +1438,49 @@ class QtInstallerTask(Generic[QtInstallerTaskT]):
         log.info("Repogen tool: %s", self.repogen_tool)
         log.info("Installerbase: %s", self.installerbase_tool)
 
-    def download_and_extract_ifw_tools(self) -> None:
-        package_save_as_temp = os.path.join(self.ifw_tools_dir, os.path.basename(self.ifw_tools_uri))
-        package_save_as_temp = os.path.normpath(package_save_as_temp)
-        # download ifw archive if not present on disk
-        if not os.path.exists(package_save_as_temp):
-            # create needed dirs
-            Path(self.ifw_tools_dir).mkdir(parents=True, exist_ok=True)
+    def download_and_extract_ifw_tools(self, replace: bool = False) -> None:
+        """
+        Download and extract the IFW tools into the tools directory
+
+        The tools are installed to a staging dir and renamed in place when complete, so that
+        other tasks or processes sharing the tools directory never see a partially extracted
+        installation. An existing installation is replaced by renaming it aside before the
+        new one is renamed in place. The processes still running the old tools keep their
+        open files, and any new lookups of the tool paths find the new installation.
+
+        Args:
+            replace: Whether to replace an existing, e.g. corrupted, installation
+        """
+        tools_dir = os.path.normpath(self.ifw_tools_dir)
+        parent_dir, name = os.path.split(tools_dir)
+        Path(parent_dir).mkdir(parents=True, exist_ok=True)
+        staging_dir = mkdtemp(prefix=f".{name}-", suffix=".tmp", dir=parent_dir)
+        retired_dir = ""
+        try:
+            package_save_as_temp = os.path.join(staging_dir, os.path.basename(self.ifw_tools_uri))
+            package_save_as_temp = os.path.normpath(package_save_as_temp)
             log.info("Downloading: %s", self.ifw_tools_uri)
             if not uri_exists(self.ifw_tools_uri):
                 raise CreateInstallerError(f"Package URL is invalid: {self.ifw_tools_uri}")
             retrieve_url(self.ifw_tools_uri, package_save_as_temp)
             if not os.path.isfile(package_save_as_temp):
                 raise CreateInstallerError("Downloading failed! Aborting!")
-        # extract ifw archive
-        extract_file(package_save_as_temp, self.ifw_tools_dir)
-        log.info("IFW tools extracted into: %s", self.ifw_tools_dir)
+            # extract ifw archive
+            extract_file(package_save_as_temp, staging_dir)
+            if replace:
+                retired_dir = mkdtemp(prefix=f".{name}-", suffix=".old", dir=parent_dir)
+                with suppress(FileNotFoundError):  # already moved by another process
+                    os.rename(tools_dir, os.path.join(retired_dir, name))
+            try:
+                os.rename(staging_dir, tools_dir)
+                log.info("IFW tools extracted into: %s", tools_dir)
+            except OSError:
+                # installed by another process in the meantime
+                log.info("IFW tools already installed into: %s", tools_dir)
+        finally:
+            for path in (staging_dir, retired_dir):
+                if path:
+                    remove_tree(path)
 
 
 def main() -> None:
@@ -1260,12 +1531,75 @@ def main() -> None:
     parser.add_argument("--version-number-auto-increase-value", dest="version_number_auto_increase_value", type=str,
                         default='-' + strftime('%Y%m%d%H%M', gmtime()),
                         help="Value for the %VERSION_NUMBER_AUTO_INCREASE%")
-    parser.add_argument("--max-cpu-count", dest="max_cpu_count", type=int, default=8,
-                        help="Set maximum number of CPU's used on packaging")
+    resource_limits = default_limits()
+    parser.add_argument("--max-cpu-count", dest="max_cpu_count", type=int,
+                        default=resource_limits[Resource.CPU],
+                        help="Set maximum number of CPU's used on packaging (env: PKG_MAX_CPU_JOBS)")
+    parser.add_argument("--max-download-count", dest="max_download_count", type=int,
+                        default=resource_limits[Resource.NETWORK],
+                        help="Set maximum number of parallel payload downloads "
+                             "(env: PKG_MAX_NETWORK_JOBS)")
+    parser.add_argument("--max-extract-count", dest="max_extract_count", type=int,
+                        default=resource_limits[Resource.DISK],
+                        help="Set maximum number of parallel payload extractions "
+                             "(env: PKG_MAX_DISK_JOBS)")
     parser.add_argument(
         "--lrelease-tool", dest="lrelease_tool", type=str, default=os.getenv("LRELEASE_TOOL", ""),
         help="URL containing lrelease binary for creating translation binaries"
     )
+    parser.add_argument(
+        "--artifact-cache-dir", dest="artifact_cache_dir", type=str,
+        default=os.getenv("PKG_ARTIFACT_CACHE_DIR", ""),
+        help="Persistent directory for caching downloaded payload artifacts between runs"
+    )
+    parser.add_argument(
+        "--artifact-cache-size", dest="artifact_cache_size", type=int,
+        default=int(os.getenv("PKG_ARTIFACT_CACHE_SIZE", str(DEFAULT_CACHE_SIZE_GB))),
+        help="Size budget for the artifact cache in GB, least recently used items are evicted"
+    )
+    parser.add_argument(
+        "--stream-extract", dest="stream_extract", action="store_true",
+        default=os.getenv("PKG_STREAM_EXTRACT", "") == "1",
+        help="Extract remote tar payloads while downloading without storing the archive"
+    )
+    parser.add_argument(
+        "--work-dir", dest="work_dir", type=str, default=os.getenv("PKG_WORK_DIR", ""),
+        help="Root for the working directories of the task, e.g. on tmpfs"
+    )
+    parser.add_argument(
+        "--archive-reuse-dir", dest="archive_reuse_dir", type=str,
+        default=os.getenv("PKG_ARCHIVE_REUSE_DIR", ""),
+        help="Persistent directory for reusing payload archives if their content is unchanged"
+    )
+    parser.add_argument(
+        "--min-free-disk-space", dest="min_free_disk_space", type=int,
+        default=int(os.getenv("PKG_MIN_FREE_DISK_SPACE", "0")),
+        help="Free disk space in GB below which new payload downloads wait for the removal of "
+             "the already compressed payload data, 0 disables the throttling"
+    )
+    parser.add_argument(
+        "--disk-budget", dest="disk_budget", type=int,
+        default=int(os.getenv("PKG_DISK_BUDGET", "0")),
+        help="Disk space in GB for the work data of the payload items processed at the same "
+             "time and for their output archives, estimated from the download sizes, 0 disables "
+             "the admission control"
+    )
+    parser.add_argument(
+        "--archive-writer", dest="archive_writer", type=str,
+        default=os.getenv("PKG_ARCHIVE_WRITER", ArchivegenWriter.name),
+        choices=[ArchivegenWriter.name, TarArchiveWriter.name],
+        help="Backend for compressing the payload archives, with 'python' the tar based "
+             "formats are compressed in-process and the others fall back to archivegen"
+    )
+    parser.add_argument(
+        "--compression-level", dest="compression_level", type=int, default=None,
+        help="Compression level for the in-process archive writer"
+    )
+    parser.add_argument(
+        "--compression-threads", dest="compression_threads", type=int,
+        default=resource_limits[Resource.CPU],
+        help="Number of compression threads shared by all in-process archive writes"
+    )
     if is_windows():
         parser.add_argument(
             "--disable-path-limit-check",
@@ -1281,6 +1615,11 @@ def main() -> None:
         )
 
     args = parser.parse_args(sys.argv[1:])
+    get_governor().configure({
+        Resource.CPU: args.max_cpu_count,
+        Resource.NETWORK: args.max_download_count,
+        Resource.DISK: args.max_extract_count,
+    })
 
     if is_windows():
         if args.require_long_path_support is True and is_long_path_supported() is False:
@@ -1307,7 +1646,18 @@ def main() -> None:
         force_version_number_increase=args.force_version_number_increase,
         version_number_auto_increase_value=args.version_number_auto_increase_value,
         max_cpu_count=args.max_cpu_count,
+        max_download_count=args.max_download_count,
         lrelease_tool_url=args.lrelease_tool,
+        artifact_cache_dir=args.artifact_cache_dir,
+        artifact_cache_size=args.artifact_cache_size,
+        stream_extract=args.stream_extract,
+        archive_reuse_dir=args.archive_reuse_dir,
+        min_free_disk_space=args.min_free_disk_space,
+        disk_budget=args.disk_budget,
+        work_dir=args.work_dir,
+        archive_writer=args.archive_writer,
+        compression_level=args.compression_level,
+        compression_threads=args.compression_threads,
     )
     create_installer(task)
     if task.errors:
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#############################################################################
+#
+# Copyright (C) 2023 The Qt Company Ltd.
+# Contact: https://www.qt.io/licensing/
+#
+# This file is part of the release tools of the Qt Toolkit.
+#
+# $QT_BEGIN_LICENSE:GPL-EXCEPT$
+# Commercial License Usage
+# Licensees holding valid commercial Qt licenses may use this file in
+# accordance with the commercial license agreement provided with the
+# Software or, alternatively, in accordance with the terms contained in
+# a written agreement between you and The Qt Company. For licensing terms
+# and conditions see https://www.qt.io/terms-conditions. For further
+# information use the contact form at https://www.qt.io/contact-us.
+#
+# GNU General Public License Usage
+# Alternatively, this file may be used under the terms of the GNU
+# General Public License version 3 as published by the Free Software
+# Foundation with exceptions as appearing in the file LICENSE.GPL3-EXCEPT
+# included in the packaging of this file. Please review the following
+# information to ensure the GNU General Public License requirements will
+# be met: https://www.gnu.org/licenses/gpl-3.0.html.
+#
+# $QT_END_LICENSE$
+#
+#############################################################################
+
+
+"""Admission control for payload processing based on the projected disk usage"""
+
+import threading
+from typing import Callable, Dict, Optional
+
+from logging_util import init_logger
+
+log = init_logger(__name__, debug_mode=False)
+
+# Typical size of the extracted content relative to the archive size
+EXPANSION_RATIOS: Dict[str, float] = {
+    ".7z": 4.0,
+    ".zip": 3.0,
+    ".tar": 1.0,
+    ".tar.gz": 3.0,
+    ".tgz": 3.0,
+    ".tar.bz2": 4.0,
+    ".tbz2": 4.0,
+    ".tar.xz": 4.0,
+    ".txz": 4.0,
+}
+
+
+class DiskAdmissionError(Exception):
+    pass
+
+
+def expansion_ratio(name: str) -> float:
+    """
+    Return the expected size of the extracted content relative to the archive size
+
+    Args:
+        name: A file name or an URI of the archive
+
+    Returns:
+        The ratio for the archive type, 1.0 for unknown types
+    """
+    suffixes = [suffix for suffix in EXPANSION_RATIOS if name.lower().endswith(suffix)]
+    if not suffixes:
+        return 1.0
+    return EXPANSION_RATIOS[max(suffixes, key=len)]
+
+
+def estimate_footprint(name: str, size: int, extract: bool = True) -> int:
+    """
+    Estimate the disk space used while processing a payload file
+
+    Args:
+        name: A file name or an URI of the payload
+        size: The size of the payload file in bytes, e.g. from Content-Length
+        extract: Whether the payload is extracted, then the download and its content both count
+
+    Returns:
+        The estimated footprint in bytes
+    """
+    if not extract:
+        return size
+    return int(size * (1 + expansion_ratio(name)))
+
+
+class DiskAdmission:
+    """
+    Admit work while the projected disk usage of the admitted work stays within a budget
+
+    The work reserves its estimated footprint before it starts and releases it when its data
+    is removed, the part of the footprint for the data kept on disk stays reserved.
+    Work larger than the whole budget is admitted when nothing else is running.
+    """
+
+    def __init__(self, budget: int) -> None:
+        self.budget = budget
+        self._in_use = 0
+        self._active = 0
+        self._cond = threading.Condition()
+
+    @property
+    def in_use(self) -> int:
+        """Return the sum of the footprints currently reserved"""
+        with self._cond:
+            return self._in_use
+
+    def acquire(self, footprint: int, cancelled: Optional[Callable[[], bool]] = None) -> None:
+        """
+        Reserve the footprint, block until it fits within the budget
+
+        Args:
+            footprint: The estimated disk usage in bytes
+            cancelled: Polled while waiting, e.g. to stop waiting for work that failed
+
+        Raises:
+            DiskAdmissionError: When cancelled while waiting
+        """
+        with self._cond:
+            while self._active and self._in_use + footprint > self.budget:
+                if cancelled is not None and cancelled():
+                    raise DiskAdmissionError("Cancelled while waiting for disk budget")
+                self._cond.wait(timeout=1)
+            if footprint > self.budget:
+                log.warning("Footprint exceeds the disk budget: %.1f GB", footprint / 1024**3)
+            self._in_use += footprint
+            self._active += 1
+
+    def release(self, footprint: int, retained: int = 0) -> None:
+        """
+        Release a footprint reserved with acquire()
+
+        Args:
+            footprint: The same value that was passed to acquire()
+            retained: The part of the footprint still used on disk, e.g. by the output files
+        """
+        with self._cond:
+            self._in_use -= footprint - retained
+            self._active -= 1
+            self._cond.notify_all()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#############################################################################
+#
+# Copyright (C) 2023 The Qt Company Ltd.
+# Contact: https://www.qt.io/licensing/
+#
+# This file is part of the release tools of the Qt Toolkit.
+#
+# $QT_BEGIN_LICENSE:GPL-EXCEPT$
+# Commercial License Usage
+# Licensees holding valid commercial Qt licenses may use this file in
+# accordance with the commercial license agreement provided with the
+# Software or, alternatively, in accordance with the terms contained in
+# a written agreement between you and The Qt Company. For licensing terms
+# and conditions see https://www.qt.io/terms-conditions. For further
+# information use the contact form at https://www.qt.io/contact-us.
+#
+# GNU General Public License Usage
+# Alternatively, this file may be used under the terms of the GNU
+# General Public License version 3 as published by the Free Software
+# Foundation with exceptions as appearing in the file LICENSE.GPL3-EXCEPT
+# included in the packaging of this file. Please review the following
+# information to ensure the GNU General Public License requirements will
+# be met: https://www.gnu.org/licenses/gpl-3.0.html.
+#
+# $QT_END_LICENSE$
+#
+#############################################################################
+
+
+"""Read and replace the RPATH/RUNPATH of ELF binaries without external tools"""
+
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Optional, Tuple
+
+ELF_MAGIC = b"\x7fELF"
+ELFCLASS64 = 2
+ELFDATA2MSB = 2
+PT_DYNAMIC = 2
+SHT_STRTAB = 3
+DT_NULL = 0
+DT_RPATH = 15
+DT_RUNPATH = 29
+
+
+class ElfRpathError(Exception):
+    pass
+
+
+@dataclass
+class ElfRpath:
+    """RPATH or RUNPATH entry of an ELF binary"""
+
+    tag: int
+    value: str
+    offset: int  # file offset of the path string
+    max_length: int  # maximum length of a replacement path
+
+    @property
+    def tag_name(self) -> str:
+        """Return the name of the dynamic section tag, as printed by chrpath"""
+        return "RUNPATH" if self.tag == DT_RUNPATH else "RPATH"
+
+
+def _read_at(handle: BinaryIO, offset: int, size: int) -> bytes:
+    handle.seek(offset)
+    data = handle.read(size)
+    if len(data) != size:
+        raise ElfRpathError(f"Truncated ELF file: {handle.name}")
+    return data
+
+
+def _find_rpath(handle: BinaryIO) -> Optional[ElfRpath]:
+    ident = handle.read(16)
+    if len(ident) < 16 or ident[:4] != ELF_MAGIC:
+        raise ElfRpathError(f"Not an ELF file: {handle.name}")
+    is_64 = ident[4] == ELFCLASS64
+    endian = ">" if ident[5] == ELFDATA2MSB else "<"
+    word = "Q" if is_64 else "I"
+    # e_phoff, e_shoff, e_phentsize, e_phnum, e_shentsize, e_shnum
+    header_fmt = endian + ("16xHHI" + word * 3 + "IHHHHHH")
+    header = struct.unpack(header_fmt, _read_at(handle, 0, struct.calcsize(header_fmt)))
+    phoff, shoff = header[4], header[5]
+    phentsize, phnum, shentsize, shnum = header[8], header[9], header[10], header[11]
+    # find the dynamic section from the program headers
+    dynamic: Optional[Tuple[int, int]] = None
+    for idx in range(phnum):
+        phdr = _read_at(handle, phoff + idx * phentsize, phentsize)
+        p_type = struct.unpack_from(endian + "I", phdr)[0]
+        if p_type == PT_DYNAMIC:
+            if is_64:
+                p_offset, p_filesz = struct.unpack_from(endian + "8xQ16xQ", phdr)
+            else:
+                p_offset, p_filesz = struct.unpack_from(endian + "4xI8xI", phdr)
+            dynamic = (p_offset, p_filesz)
+            break
+    if dynamic is None:
+        return None
+    entry_fmt = endian + ("qQ" if is_64 else "iI")
+    entry_size = struct.calcsize(entry_fmt)
+    dyn_data = _read_at(handle, dynamic[0], dynamic[1])
+    rpath_entry: Optional[Tuple[int, int]] = None
+    for pos in range(0, len(dyn_data) - entry_size + 1, entry_size):
+        tag, value = struct.unpack_from(entry_fmt, dyn_data, pos)
+        if tag == DT_NULL:
+            break
+        if tag in (DT_RPATH, DT_RUNPATH):
+            rpath_entry = (tag, value)
+            break
+    if rpath_entry is None:
+        return None
+    # the string table is located like chrpath does it: the first SHT_STRTAB section
+    shdr_fmt = endian + ("4xI16x" + word + word if is_64 else "4xI8xII")
+    strtab: Optional[Tuple[int, int]] = None
+    for idx in range(shnum):
+        shdr = _read_at(handle, shoff + idx * shentsize, struct.calcsize(shdr_fmt))
+        sh_type, sh_offset, sh_size = struct.unpack(shdr_fmt, shdr)
+        if sh_type == SHT_STRTAB:
+            strtab = (sh_offset, sh_size)
+            break
+    if strtab is None or rpath_entry[1] >= strtab[1]:
+        raise ElfRpathError(f"No string table found for the RPATH/RUNPATH: {handle.name}")
+    data = _read_at(handle, strtab[0] + rpath_entry[1], strtab[1] - rpath_entry[1])
+    value = data.split(b"\0", 1)[0]
+    # the NUL padding after the path can be used by a longer path
+    end = len(value)
+    while end < len(data) and data[end] == 0:
+        end += 1
+    return ElfRpath(
+        tag=rpath_entry[0],
+        value=value.decode("utf-8", errors="surrogateescape"),
+        offset=strtab[0] + rpath_entry[1],
+        max_length=end - 1,
+    )
+
+
+def read_elf_rpath(path: Path) -> Optional[ElfRpath]:
+    """
+    Read the RPATH/RUNPATH entry from an ELF binary
+
+    Args:
+        path: A path to the ELF binary
+
+    Returns:
+        The first RPATH or RUNPATH entry of the dynamic section, None if there is no such entry
+
+    Raises:
+        ElfRpathError: When the file is not a valid ELF binary
+    """
+    with open(path, "rb") as handle:
+        try:
+            return _find_rpath(handle)
+        except struct.error as err:
+            raise ElfRpathError(f"Invalid ELF file: {path}") from err
+
+
+def write_elf_rpath(path: Path, new_rpath: str) -> Optional[ElfRpath]:
+    """
+    Replace the RPATH/RUNPATH string of an ELF binary in place, like 'chrpath -r' does
+
+    The new path must fit the space allocated for the existing path inside the binary.
+
+    Args:
+        path: A path to the ELF binary
+        new_rpath: The new RPATH/RUNPATH value
+
+    Returns:
+        The entry before the replacement, None if the binary has no RPATH/RUNPATH to replace
+
+    Raises:
+        ElfRpathError: When the file is not a valid ELF binary or the new path is too long
+    """
+    encoded = new_rpath.encode("utf-8", errors="surrogateescape")
+    with open(path, "r+b") as handle:
+        try:
+            rpath = _find_rpath(handle)
+        except struct.error as err:
+            raise ElfRpathError(f"Invalid ELF file: {path}") from err
+        if rpath is None:
+            return None
+        if len(encoded) > rpath.max_length:
+            raise ElfRpathError(
+                f"{path}: new rpath '{new_rpath}' too large; maximum length {rpath.max_length}"
+            )
+        old_length = len(rpath.value.encode("utf-8", errors="surrogateescape"))
+        handle.seek(rpath.offset)
+        handle.write(encoded + b"\0" * max(1, old_length + 1 - len(encoded)))
+    return rpath
@@ -38,6 +38,7 @@ from temppathlib import TemporaryDirectory
 
 from bldinstallercommon import create_qt_download_task, patch_qt
 from logging_util import init_logger
+from resource_governor import Resource
 from threadedwork import ThreadedWork
 
 log = init_logger(__name__, debug_mode=False)
@@ -97,7 +98,7 @@ def install_qt(
     if not qt_modules:
         raise SystemExit("No modules specified in qt_modules")
     qt_path = os.path.abspath(qt_path)
-    dl_pkgs_work = ThreadedWork("get and extract Qt binaries")
+    dl_pkgs_work = ThreadedWork("get and extract Qt binaries", resource=Resource.NETWORK)
     need_to_install_qt = not os.path.lexists(qt_path)
     if need_to_install_qt:
         opts = argparse.Namespace(
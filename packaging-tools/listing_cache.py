@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#############################################################################
+#
+# Copyright (C) 2023 The Qt Company Ltd.
+# Contact: https://www.qt.io/licensing/
+#
+# This file is part of the release tools of the Qt Toolkit.
+#
+# $QT_BEGIN_LICENSE:GPL-EXCEPT$
+# Commercial License Usage
+# Licensees holding valid commercial Qt licenses may use this file in
+# accordance with the commercial license agreement provided with the
+# Software or, alternatively, in accordance with the terms contained in
+# a written agreement between you and The Qt Company. For licensing terms
+# and conditions see https://www.qt.io/terms-conditions. For further
+# information use the contact form at https://www.qt.io/contact-us.
+#
+# GNU General Public License Usage
+# Alternatively, this file may be used under the terms of the GNU
+# General Public License version 3 as published by the Free Software
+# Foundation with exceptions as appearing in the file LICENSE.GPL3-EXCEPT
+# included in the packaging of this file. Please review the following
+# information to ensure the GNU General Public License requirements will
+# be met: https://www.gnu.org/licenses/gpl-3.0.html.
+#
+# $QT_END_LICENSE$
+#
+#############################################################################
+
+
+"""Process-wide cache for remote directory listings"""
+
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+from time import monotonic, struct_time, time
+from typing import Any, Dict, List, Optional, Tuple
+
+import htmllistparse  # type: ignore
+from urlpath import URL  # type: ignore
+
+from logging_util import init_logger
+from resource_governor import Resource, governed
+
+log = init_logger(__name__, debug_mode=False)
+
+Listing = Tuple[Optional[str], List[Any]]
+
+
+class ListingCache:
+    """
+    Fetch remote directory listings with htmllistparse, caching the results
+
+    Listings are kept in memory and optionally in cache_dir for ttl seconds, so directories
+    crawled by multiple components are fetched once. Concurrent requests for the same URL are
+    coalesced: only the first caller fetches the listing and the others wait for its result.
+    """
+
+    def __init__(
+        self, cache_dir: Optional[Path] = None, ttl: float = 600, timeout: int = 30
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.timeout = timeout
+        self._cache: Dict[str, Tuple[float, Listing]] = {}
+        self._pending: Dict[str, "Future[Listing]"] = {}
+        self._lock = threading.Lock()
+
+    def _disk_path(self, url: str) -> Path:
+        assert self.cache_dir is not None
+        return self.cache_dir / (hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+    def _load(self, url: str) -> Optional[Listing]:
+        if self.cache_dir is None:
+            return None
+        try:
+            data = json.loads(self._disk_path(url).read_text(encoding="utf-8"))
+            if data["url"] != url or data["time"] + self.ttl <= time():
+                return None
+            entries = [
+                htmllistparse.FileEntry(
+                    name, struct_time(modified) if modified else None, size, description
+                )
+                for name, modified, size, description in data["entries"]
+            ]
+            return data["cwd"], entries
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as err:
+            log.warning("Ignoring invalid listing cache entry for %s: %s", url, err)
+            return None
+
+    def _save(self, url: str, listing: Listing) -> None:
+        if self.cache_dir is None:
+            return
+        cwd, entries = listing
+        data = {
+            "url": url,
+            "time": time(),
+            "cwd": cwd,
+            "entries": [
+                [name, list(modified) if modified else None, size, description]
+                for name, modified, size, description in entries
+            ],
+        }
+        path = self._disk_path(url)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_text(json.dumps(data), encoding="utf-8")
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as err:
+            log.warning("Unable to store listing cache entry for %s: %s", url, err)
+
+    def fetch(self, url: URL) -> Listing:
+        """
+        Return the directory listing for the URL, fetching it only if there is no cached result
+
+        Args:
+            url: The URL of the remote directory
+
+        Returns:
+            The current working directory and the list of FileEntry items as in fetch_listing()
+        """
+        key = str(url).rstrip("/")
+        with self._lock:
+            expires, listing = self._cache.get(key, (0.0, (None, [])))
+            if expires > monotonic():
+                return listing
+            future = self._pending.get(key)
+            owner = future is None
+            if future is None:
+                future = self._pending[key] = Future()
+        if not owner:
+            log.debug("Waiting for pending listing: %s", key)
+            return future.result()
+        try:
+            cached = self._load(key)
+            if cached is None:
+                log.info("Crawl: %s", url)
+                cached = governed(Resource.NETWORK, htmllistparse.fetch_listing)(url, self.timeout)
+                self._save(key, cached)
+            with self._lock:
+                self._cache[key] = (monotonic() + self.ttl, cached)
+            future.set_result(cached)
+            return cached
+        except BaseException as err:
+            future.set_exception(err)
+            raise
+        finally:
+            with self._lock:
+                del self._pending[key]
+
+    def clear(self) -> None:
+        """Drop the listings cached in memory"""
+        with self._lock:
+            self._cache.clear()
+
+
+_cache_dir = os.getenv("PKG_LISTING_CACHE_DIR")
+_listing_cache = ListingCache(
+    cache_dir=Path(_cache_dir) if _cache_dir else None,
+    ttl=float(os.getenv("PKG_LISTING_CACHE_TTL", "600")),
+)
+
+
+def get_listing_cache() -> ListingCache:
+    """Return the process-wide ListingCache instance"""
+    return _listing_cache
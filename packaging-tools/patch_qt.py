@@ -31,34 +31,93 @@
 
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from fileinput import FileInput
-from typing import Any, Callable, Generator, List, Match
+from functools import lru_cache
+from typing import Callable, Generator, List, Match, Optional, Tuple
 
 from logging_util import init_logger
+from resource_governor import Resource, get_governor
 
 log = init_logger(__name__, debug_mode=False)
 
+# only these files can contain build time paths
+PATCHED_FILE_EXTENSIONS = ("prl", "pri", "la", "pc", "cmake")
 
-def _file_iterator(artifacts_dir: str) -> Generator[Any, Any, Any]:
+# a line patcher and the strings one of which the file must contain for it to be applied
+LinePatcher = Tuple[Callable[[str, str], str], Tuple[str, ...]]
+
+
+def _file_iterator(artifacts_dir: str) -> Generator[str, None, None]:
     log.info("Patching build time paths from: %s", artifacts_dir)
     for root, _, files in os.walk(artifacts_dir):
         for file_name in files:
-            yield os.path.join(os.path.join(root, file_name))
+            if file_name.endswith(PATCHED_FILE_EXTENSIONS):
+                yield os.path.join(root, file_name)
 
 
-def _get_patchers(product: str) -> List[Callable[[Any], Any]]:
+def _get_patchers(product: str) -> List[LinePatcher]:
     if product == 'qt_framework':
-        return [patch_absolute_lib_paths_from_file, erase_qmake_prl_build_dir, patch_qconfig_pri]
+        return [_LIB_PATHS_PATCHER, _PRL_BUILD_DIR_PATCHER, _QCONFIG_PRI_PATCHER]
     # default
-    return [patch_absolute_lib_paths_from_file, erase_qmake_prl_build_dir]
+    return [_LIB_PATHS_PATCHER, _PRL_BUILD_DIR_PATCHER]
 
 
-def patch_files(artifacts_dir: str, product: str) -> None:
+def _patch_file(file_path: str, patchers: List[LinePatcher]) -> bool:
+    """
+    Apply the line patchers to the file in a single pass, write the file only if it changed
+
+    Args:
+        file_path: The file to patch
+        patchers: The line patchers to apply, in order
+
+    Returns:
+        True if the file was modified, otherwise False
+    """
+    # keep the line endings and undecodable bytes as is
+    with open(file_path, "r", encoding="utf-8", errors="surrogateescape", newline="") as handle:
+        contents = handle.read()
+    patchers = [patcher for patcher in patchers if any(item in contents for item in patcher[1])]
+    if not patchers:
+        return False
+    file_extension = file_path.split(".")[-1]
+    result: List[str] = []
+    for line in contents.splitlines(keepends=True):
+        body = line.rstrip("\r\n")
+        patched = body
+        for patch_line, _ in patchers:
+            patched = patch_line(patched, file_extension)
+            if not patched:
+                break
+        # drop the erased lines, keep the original line endings
+        if patched or not body:
+            result.append(patched + line[len(body):])
+    new_contents = "".join(result)
+    if new_contents == contents:
+        return False
+    with open(file_path, "w", encoding="utf-8", errors="surrogateescape", newline="") as handle:
+        handle.write(new_contents)
+    return True
+
+
+def patch_files(artifacts_dir: str, product: str, max_workers: Optional[int] = None) -> None:
+    """
+    Patch the build time paths from the text files under the given directory
+
+    Args:
+        artifacts_dir: The directory containing the files to patch
+        product: The product the files are from, e.g. "qt_framework"
+        max_workers: The number of files patched in parallel, by default the CPU job limit
+    """
     log.info("Patching files from: %s", artifacts_dir)
     patchers = _get_patchers(product)
-    for file_path in _file_iterator(artifacts_dir):
-        for patcher in patchers:
-            patcher(file_path)
+    max_workers = max_workers or get_governor().limit(Resource.CPU)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(
+            lambda file_path: _patch_file(file_path, patchers), _file_iterator(artifacts_dir)
+        )
+        patched_count = sum(results)
+    log.info("Patched %s files from: %s", patched_count, artifacts_dir)
 
 
 def patch_qt_edition(artifacts_dir: str, licheck_file_name: str, release_date: str) -> None:
@@ -83,9 +142,7 @@ def _patch_qt_edition(file_path: str, licheck_file_name: str, release_date: str)
 
 
 def patch_qconfig_pri(file_path: str) -> None:
-    for line in FileInput(file_path, inplace=True):
-        patched_line = patch_qconfig_pri_from_line(line)
-        log.info(patched_line.rstrip("\n"))
+    _patch_file(file_path, [_QCONFIG_PRI_PATCHER])
 
 
 def patch_qconfig_pri_from_line(line: str) -> str:
@@ -98,9 +155,7 @@ def patch_qconfig_pri_from_line(line: str) -> str:
 
 def erase_qmake_prl_build_dir(file_path: str) -> None:
     # Erase lines starting with 'QMAKE_PRL_BUILD_DIR' from .prl files
-    for line in FileInput(file_path, inplace=True):
-        patched_line = patch_qmake_prl_build_dir_from_line(line)
-        log.info(patched_line.rstrip("\n"))
+    _patch_file(file_path, [_PRL_BUILD_DIR_PATCHER])
 
 
 def patch_qmake_prl_build_dir_from_line(line: str) -> str:
@@ -108,13 +163,13 @@ def patch_qmake_prl_build_dir_from_line(line: str) -> str:
 
 
 def patch_absolute_lib_paths_from_file(file_path: str) -> None:
-    for line in FileInput(file_path, inplace=True):
-        patched_line = patch_absolute_lib_paths_from_line(line, file_path.split(".")[-1])
-        log.info(patched_line.rstrip("\n"))
+    _patch_file(file_path, [_LIB_PATHS_PATCHER])
 
 
-def patch_absolute_lib_paths_from_line(line: str, file_extension: str) -> str:
+class LibPathPatcher:
     r"""
+    Replace absolute library paths with linker flags, e.g. /usr/lib/libz.so with -lz
+
     Captures XXX in e.g. /usr/lib/libXXX.so, /usr/lib64/libXXX.a, and C:\XXX.lib
     Paths are not allowed to contain whitespace though
       [^\s\"]+ - start of path
@@ -124,42 +179,62 @@ def patch_absolute_lib_paths_from_line(line: str, file_extension: str) -> str:
       (\.[0-9]+)? - capture group for for versioned libraries
     """
 
-    def _remove_whitespace(line: str) -> str:
+    # a line can match the expressions only if it contains one of these
+    SUFFIXES = (".so", ".a", ".tbd", ".lib")
+    EXPRESSIONS = (
+        re.compile(r'[^\s\"]+/lib([a-zA-Z0-9\_\-\.\+]+)\.(so|a|tbd)(\.[0-9]+)?\b'),
+        re.compile(r'[^\s\"]+[\\/]([a-zA-Z0-9\_\-\.\+]+)\.(lib)(\.[0-9]+)?\b'),
+    )
+    CMAKE_FIND_EXTRA_LIBS = re.compile(r'_*._find_extra_libs\(')
+
+    def __init__(self, file_extension: str) -> None:
+        self.is_cmake = file_extension == "cmake"
+        self.lib_prefix = "" if self.is_cmake else "-l"  # .pri, .prl, .la, .pc
+
+    @staticmethod
+    def remove_whitespace(line: str) -> str:
         """Remove white space from paths if found inside quoted blocks."""
-        erase_enabled = False
-        result = ""
-        for char in line:
-            if char == "\"":
-                # toggle on/off
-                erase_enabled = not erase_enabled
-            if erase_enabled and char == " ":
-                continue
-            result += char
-        return result
-
-    if file_extension == "cmake":
+        parts = line.split("\"")
+        # every other part is inside quotes
+        parts[1::2] = [part.replace(" ", "") for part in parts[1::2]]
+        return "\"".join(parts)
+
+    def _substitute_lib(self, match: Match[str]) -> str:
+        if match.group(0).startswith("$$[QT_"):
+            return match.group(0)
+        return self.lib_prefix + match.group(1)
+
+    def patch_line(self, line: str) -> str:
+        """Return the line with the absolute library paths patched"""
+        if not any(suffix in line for suffix in self.SUFFIXES):
+            return line
         # from cmake files patch only lines containing "find_extra_libs"
-        cmake_find_extra_libs_search_regexp = re.compile(r'_*._find_extra_libs\(')
-        if not re.search(cmake_find_extra_libs_search_regexp, line):
+        if self.is_cmake and not self.CMAKE_FIND_EXTRA_LIBS.search(line):
             return line
+        for regex in self.EXPRESSIONS:
+            # check if there are any matches?
+            if regex.search(line):
+                return regex.sub(self._substitute_lib, self.remove_whitespace(line))
+        return line
 
-    expressions = [
-        re.compile(r'[^\s\"]+/lib([a-zA-Z0-9\_\-\.\+]+)\.(so|a|tbd)(\.[0-9]+)?\b'),
-        re.compile(r'[^\s\"]+[\\/]([a-zA-Z0-9\_\-\.\+]+)\.(lib)(\.[0-9]+)?\b')
-    ]
 
-    def _substitute_lib(match: Match[str]) -> str:
-        if match.group(0).startswith("$$[QT_"):
-            return match.group(0)
-        result = "" if file_extension == "cmake" else "-l"  # .pri, .prl, .la, .pc
-        result += match.group(1)
-        return result
+@lru_cache(maxsize=None)
+def get_lib_path_patcher(file_extension: str) -> LibPathPatcher:
+    """Return the shared LibPathPatcher for the file extension, the patcher holds no state"""
+    return LibPathPatcher(file_extension)
 
-    for regex in expressions:
-        # check if there are any matches?
-        if re.search(regex, line):
-            line = _remove_whitespace(line)
-            line = regex.sub(_substitute_lib, line)
-            break
 
-    return line
+def patch_absolute_lib_paths_from_line(line: str, file_extension: str) -> str:
+    return get_lib_path_patcher(file_extension).patch_line(line)
+
+
+_LIB_PATHS_PATCHER: LinePatcher = (
+    patch_absolute_lib_paths_from_line, LibPathPatcher.SUFFIXES
+)
+_PRL_BUILD_DIR_PATCHER: LinePatcher = (
+    lambda line, _: patch_qmake_prl_build_dir_from_line(line), ("QMAKE_PRL_BUILD_DIR",)
+)
+_QCONFIG_PRI_PATCHER: LinePatcher = (
+    lambda line, _: patch_qconfig_pri_from_line(line),
+    ("QMAKE_DEFAULT_LIBDIRS", "QMAKE_DEFAULT_INCDIRS"),
+)
@@ -35,10 +35,12 @@ import json
 import os
 import platform
 import re
+import shlex
 import shutil
 import subprocess
 import sys
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from configparser import ConfigParser, ExtendedInterpolation
 from dataclasses import dataclass
 from datetime import datetime
@@ -67,9 +69,12 @@ from release_task_reader import (
     append_to_task_filters,
     parse_config,
 )
+from remote_transaction import RemoteStep, RemoteTransaction, RemoteTransactionError
+from resource_governor import add_governor_arguments, configure_governor
 from runner import run_cmd, run_cmd_async
 from sign_installer import create_mac_dmg, sign_mac_content
 from sign_windows_installer import sign_executable
+from ssh_pool import get_ssh_pool
 
 if sys.version_info < (3, 7):
     from asyncio_backport import run as asyncio_run
@@ -81,6 +86,8 @@ if is_linux():
 
 log = init_logger(__name__, debug_mode=False)
 timestamp = datetime.fromtimestamp(time()).strftime('%Y-%m-%d--%H:%M:%S')
+# rsync -z gains nothing for already compressed repository payloads
+RSYNC_SKIP_COMPRESS = "7z/xz/gz/bz2/zip/tgz/txz/tbz/tbz2/zst/lz/lzma"
 
 
 class EventRegister():
@@ -143,6 +150,11 @@ class RepoSource(Enum):
     PRODUCTION = "production"
 
 
+class PublishMode(Enum):
+    COPY = "copy"
+    HARDLINK = "hardlink"
+
+
 class QtRepositoryLayout:
 
     def __init__(self, root_path: str, license_: str, repo_domain: str) -> None:
@@ -179,6 +191,16 @@ class QtRepositoryLayout:
         return os.path.join(self.base_repo_path, self.production, self.repo_domain)
 
 
+@dataclass
+class RepositoryReset:
+    """The remote steps replacing a target repository, for restoring its backup on failure"""
+
+    target: str
+    backup: str
+    backup_step: RemoteStep
+    publish_step: RemoteStep
+
+
 @dataclass
 class RepoBuildArgs:
     """Container for online repository build arguments"""
@@ -195,6 +217,9 @@ class RepoBuildArgs:
     dry_run: Optional[DryRunMode]
     installer_config_base_dir: str = ""
     ifw_tools: str = ""
+    build_concurrency: int = 1
+    update_concurrency: int = 1
+    work_dir: str = ""
 
 
 class RepoBuildStrategy(ABC):
@@ -278,6 +303,9 @@ class IFWRepoBuildStrategy(RepoBuildStrategy):
                 event_injector=bld_args.event_injector,
                 export_data=self.export_data,
                 dry_run=bld_args.dry_run,
+                build_concurrency=bld_args.build_concurrency,
+                update_concurrency=bld_args.update_concurrency,
+                work_dir=bld_args.work_dir,
             )
         )
 
@@ -295,6 +323,9 @@ class IFWRepoBuildStrategy(RepoBuildStrategy):
             dry_run=args.dry_run,
             installer_config_base_dir=args.installer_config_base_dir,
             ifw_tools=args.ifw_tools,
+            build_concurrency=args.build_concurrency,
+            update_concurrency=args.update_concurrency,
+            work_dir=args.work_dir,
         )
 
 
@@ -324,6 +355,7 @@ class QBSPRepoBuildStrategy(RepoBuildStrategy):
                 event_injector=bld_args.event_injector,
                 export_data=self.export_data,
                 dry_run=bld_args.dry_run,
+                update_concurrency=bld_args.update_concurrency,
             )
         )
 
@@ -339,6 +371,7 @@ class QBSPRepoBuildStrategy(RepoBuildStrategy):
             rta=args.rta,
             event_injector=args.event_injector,
             dry_run=args.dry_run,
+            update_concurrency=args.update_concurrency,
         )
 
 
@@ -350,11 +383,13 @@ class RepoUpdateStrategy:
     remote_repo_layout: QtRepositoryLayout
     remote_repo_update_source: RepoSource
     remote_repo_update_destinations: List[str]
+    publish_mode: PublishMode = PublishMode.COPY
 
     @staticmethod
     def get_strategy(staging_server_root: str, license_: str, repo_domain: str,
                      build_repositories: bool, remote_repo_update_source: RepoSource,
-                     update_staging: bool, update_production: bool) -> 'RepoUpdateStrategy':
+                     update_staging: bool, update_production: bool,
+                     publish_mode: PublishMode = PublishMode.COPY) -> 'RepoUpdateStrategy':
         if build_repositories and remote_repo_update_source != RepoSource.PENDING:
             raise PackagingError("You are building repositories and want to update repositories "
                                  "not using this build as the update source? Check cmd args.")
@@ -369,7 +404,7 @@ class RepoUpdateStrategy:
         if update_production:
             repo_update_destinations.append(repo_layout.get_production_path())
         return RepoUpdateStrategy(build_repositories, repo_layout, remote_repo_update_source,
-                                  repo_update_destinations)
+                                  repo_update_destinations, publish_mode)
 
     def get_remote_source_repo_path(self, task: ReleaseTask) -> str:
         if self.remote_repo_update_source == RepoSource.PENDING:
@@ -424,7 +459,8 @@ def create_remote_script(
             handle.write(' '.join(cmd))
         temp_file_path.chmod(0o755)
         create_remote_paths(server, [remote_script_path])
-        cmd = ['rsync', '-avzh', str(temp_file_path), server + ":" + remote_script_path]
+        cmd = ['rsync', '-avzh', '-e', get_ssh_pool().rsync_shell(server), str(temp_file_path)]
+        cmd += [server + ":" + remote_script_path]
         run_cmd(cmd=cmd, timeout=60 * 60)
         return os.path.join(remote_script_path, script_file_name)
 
@@ -440,6 +476,8 @@ def execute_remote_script(server: str, remote_script_path: str, timeout: int = 6
             break
         if retry_count:
             log.warning("Trying again after %ss", delay)
+            # start a new master connection in case the previous one is broken
+            get_ssh_pool().reset(server)
             sleep(delay)
             delay = delay + delay / 2  # 60, 90, 135, 202, 303
         else:
@@ -462,7 +500,8 @@ async def upload_ifw_to_remote(ifw_tools: str, remote_server: str) -> str:
     # create tmp dir at remote
     create_remote_paths(remote_server, [remote_tmp_dir])
     # upload content
-    cmd = ['rsync', '-avzh', repogen_dir + "/", remote_server + ":" + remote_tmp_dir]
+    cmd = ['rsync', '-avzh', '-e', get_ssh_pool().rsync_shell(remote_server), repogen_dir + "/"]
+    cmd += [remote_server + ":" + remote_tmp_dir]
     run_cmd(cmd=cmd, timeout=60 * 60)
     # return path on remote poiting to repogen
     return os.path.join(remote_tmp_dir, "repogen")
@@ -473,7 +512,20 @@ def check_repogen_output(output: str) -> None:
         raise PackagingError(f"Repogen failed: {output.strip()}")
 
 
-def get_remote_login_cmd(server: str) -> List[str]:
+def get_remote_login_cmd(server: str, multiplexed: bool = True) -> List[str]:
+    """
+    Return the ssh command for running commands on the server
+
+    Args:
+        server: The server to log in to
+        multiplexed: Whether to use the persistent master connection of the server, must be
+                     False when the command is run on another server, e.g. for a second hop
+
+    Returns:
+        The command as a list
+    """
+    if multiplexed:
+        return get_ssh_pool().login_cmd(server)
     return ['ssh', '-t', '-t', server]
 
 
@@ -504,7 +556,7 @@ def remote_file_exists(server: str, remote_path: str) -> bool:
 
 async def ensure_ext_repo_paths(server: str, ext: str, repo: str) -> None:
     log.info("Ensure repository paths on ext: %s:%s", ext, repo)
-    login = get_remote_login_cmd(server) + get_remote_login_cmd(ext)
+    login = get_remote_login_cmd(server) + get_remote_login_cmd(ext, multiplexed=False)
     cmd = login + ["mkdir", "-p", repo]
     await run_cmd_async(cmd=cmd, timeout=60 * 60 * 10)
 
@@ -533,28 +585,236 @@ def delete_remote_paths(server: str, paths: List[str]) -> None:
     run_cmd(cmd=cmd, timeout=60 * 2)
 
 
-def upload_pending_repository_content(server: str, source_path: str, remote_destination_path: str) -> None:
-    log.info("Uploading pending repository content from: [%s] -> [%s:%s]", source_path, server, remote_destination_path)
-    # When uploading new content to staging the old content is always deleted
-    delete_remote_paths(server, [remote_destination_path])
-    # repository paths
-    create_remote_paths(server, [remote_destination_path])
-    # upload content
-    cmd = ['rsync', '-avzh', source_path + "/", server + ":" + remote_destination_path]
+def run_remote_transaction(transaction: RemoteTransaction, timeout: Optional[int] = None) -> None:
+    """Run the remote transaction, raise PackagingError if any of its steps failed"""
+    try:
+        transaction.run(timeout=timeout)
+    except RemoteTransactionError as err:
+        raise PackagingError(str(err)) from err
+
+
+def get_upload_path(remote_destination_path: str) -> str:
+    """Return the remote directory the new content is uploaded to before replacing the old"""
+    return remote_destination_path + "____uploading"
+
+
+def add_upload_prepare_steps(
+    transaction: RemoteTransaction, remote_destination_path: str, link_dests: Sequence[str]
+) -> Dict[str, RemoteStep]:
+    """
+    Add the steps for creating an empty upload directory for the remote destination
+
+    Args:
+        transaction: The remote transaction to add the steps to
+        remote_destination_path: The remote directory to upload the content to
+        link_dests: The remote directories with possibly unchanged files to reuse
+
+    Returns:
+        The steps checking the existence of the link_dests directories, by directory
+    """
+    upload_path = get_upload_path(remote_destination_path)
+    is_safe_directory([upload_path])
+    # leftovers of an interrupted upload
+    transaction.add(f"delete old upload dir: {upload_path}", ["rm", "-rf", upload_path])
+    transaction.add(f"create upload dir: {upload_path}", ["mkdir", "-p", upload_path])
+    return {
+        path: transaction.add(f"check link dest: {path}", ["test", "-d", path], check=False)
+        for path in link_dests
+    }
+
+
+def add_swap_steps(
+    transaction: RemoteTransaction, new_path: str, target_path: str, old_path: str
+) -> Tuple[RemoteStep, RemoteStep]:
+    """
+    Add the steps for replacing the target directory with the new directory
+
+    If the remote's mv supports --exchange (coreutils 9.5 or later) the new directory and the
+    existing target are swapped atomically and the old content is then moved from the new path
+    to old_path. Otherwise the target is moved to old_path before the new directory is renamed
+    in place, and the target is missing in between. old_path must not exist.
+
+    Args:
+        transaction: The remote transaction to add the steps to
+        new_path: The directory to move in place of the target
+        target_path: The directory to replace
+        old_path: The path to move the existing target to
+
+    Returns:
+        The step moving the existing target aside and the step moving the new directory in
+        place, the latter is skipped if the directories were swapped
+    """
+    quoted_new, quoted_target = shlex.quote(new_path), shlex.quote(target_path)
+    quoted_old = shlex.quote(old_path)
+    # -T: treat the target as a file, never move into it if the target is a directory
+    move_aside_step = transaction.add(
+        f"move old content aside: {target_path} -> {old_path}",
+        f"if mv -T --exchange {quoted_new} {quoted_target} 2> /dev/null; "
+        f"then mv {quoted_new} {quoted_old}; else mv {quoted_target} {quoted_old}; fi",
+        condition=["test", "-d", target_path],
+    )
+    # already in place if swapped, fails if the new directory is missing
+    move_in_place_step = transaction.add(
+        f"move new content in place: {new_path} -> {target_path}",
+        ["mv", new_path, target_path],
+        condition=f"! test -e {quoted_target}",
+    )
+    return move_aside_step, move_in_place_step
+
+
+def add_upload_swap_steps(transaction: RemoteTransaction, remote_destination_path: str) -> None:
+    """Add the steps for replacing the remote destination with the uploaded content"""
+    upload_path = get_upload_path(remote_destination_path)
+    old_path = remote_destination_path + "____replaced"
+    is_safe_directory([remote_destination_path, old_path])
+    transaction.add(f"delete old replaced dir: {old_path}", ["rm", "-rf", old_path])
+    add_swap_steps(transaction, upload_path, remote_destination_path, old_path)
+    transaction.add(f"delete old content: {old_path}", ["rm", "-rf", old_path])
+
+
+def upload_repository_content(
+    server: str, source_path: str, remote_destination_path: str, link_dests: Sequence[str] = ()
+) -> None:
+    """
+    Upload the content with rsync to an empty remote directory
+
+    Args:
+        server: The remote server
+        source_path: The local directory to upload the content of
+        remote_destination_path: The remote directory to upload to
+        link_dests: Existing remote directories with previous versions of the content, the
+                    unchanged files are hard linked from there and the changed ones are used
+                    as the basis for the delta transfer
+    """
+    cmd = ['rsync', '-avzh', f'--skip-compress={RSYNC_SKIP_COMPRESS}']
+    # relative --link-dest paths are relative to the destination directory
+    cmd += [f'--link-dest={os.path.relpath(path, remote_destination_path)}' for path in link_dests]
+    cmd += ['-e', get_ssh_pool().rsync_shell(server), source_path + "/"]
+    cmd += [server + ":" + remote_destination_path]
     run_cmd(cmd=cmd, timeout=60 * 60)  # give it 60 mins
 
 
-def reset_new_remote_repository(server: str, remote_source_repo_path: str, remote_target_repo_path: str) -> None:
-    if not remote_path_exists(server, remote_source_repo_path):
-        raise PackagingError(f"The remote source repository path did not exist on the server: {server}:{remote_source_repo_path}")
-    if remote_path_exists(server, remote_target_repo_path):
-        # this will _move_ the currect repo as backup
-        create_remote_repository_backup(server, remote_target_repo_path)
+def upload_pending_repository_content(
+    server: str, source_path: str, remote_destination_path: str, link_dests: Sequence[str] = ()
+) -> None:
+    """
+    Replace the remote destination with the uploaded content
+
+    The content is uploaded to a new directory which then replaces the destination. The files
+    unchanged from the previous destination content or from link_dests are not transferred.
+
+    Args:
+        server: The remote server
+        source_path: The local directory to upload the content of
+        remote_destination_path: The remote directory to replace
+        link_dests: Additional remote directories with previous versions of the content
+    """
+    log.info("Uploading pending repository content from: [%s] -> [%s:%s]", source_path, server, remote_destination_path)
+    transaction = RemoteTransaction(server)
+    checks = add_upload_prepare_steps(
+        transaction, remote_destination_path, [remote_destination_path, *link_dests]
+    )
+    run_remote_transaction(transaction)
+    existing = [path for path, step in checks.items() if transaction.result(step).status == "ok"]
+    upload_repository_content(
+        server, source_path, get_upload_path(remote_destination_path), existing
+    )
+    transaction = RemoteTransaction(server)
+    add_upload_swap_steps(transaction, remote_destination_path)
+    run_remote_transaction(transaction)
+
+
+def add_reset_repository_steps(
+    transaction: RemoteTransaction,
+    remote_source_repo_path: str,
+    remote_target_repo_path: str,
+    publish_mode: PublishMode = PublishMode.COPY,
+) -> RepositoryReset:
+    """
+    Add the steps for replacing the target repository with a copy of the source repository
+
+    The copy is created next to the target and then swapped in place with add_swap_steps(),
+    so the target is never partially populated. The existing target repository is moved as
+    backup, replacing the previous backup.
+
+    Args:
+        transaction: The remote transaction to add the steps to
+        remote_source_repo_path: The repository to copy on the remote
+        remote_target_repo_path: The repository to replace on the remote
+        publish_mode: With HARDLINK the copy shares the files with the source repository,
+                      falls back to a copy if the paths are on different file systems
+
+    Returns:
+        The steps for restore_repository_backups() if the transaction fails
+    """
+    source, target = remote_source_repo_path, remote_target_repo_path
+    backup_path = target + "____snapshot_backup"
+    publish_path = target + "____publishing"
+    is_safe_directory([target, backup_path, publish_path])
+    transaction.add(f"check source repository exists: {source}", ["test", "-d", source])
+    # leftovers of an interrupted update
+    transaction.add(f"delete old publish dir: {publish_path}", ["rm", "-rf", publish_path])
+    transaction.add(
+        f"create target parent dir: {target}", ["mkdir", "-p", os.path.dirname(target)]
+    )
+    quoted_source, quoted_publish = shlex.quote(source), shlex.quote(publish_path)
+    copy_cmd = f"cp -a {quoted_source} {quoted_publish}"
+    if publish_mode == PublishMode.HARDLINK:
+        link_cmd = f"cp -al {quoted_source} {quoted_publish}"
+        copy_cmd = f"{link_cmd} || {{ rm -rf {quoted_publish} && {copy_cmd}; }}"
+    transaction.add(
+        f"{publish_mode.value} repository content: {source} -> {publish_path}", copy_cmd
+    )
+    # if there exists a backup already then delete it, we keep only one backup
+    transaction.add(
+        f"delete old backup repo: {backup_path}", ["rm", "-rf", backup_path],
+        condition=["test", "-d", target],
+    )
+    # this will _move_ the current repo as backup
+    backup_step, publish_step = add_swap_steps(transaction, publish_path, target, backup_path)
+    return RepositoryReset(target, backup_path, backup_step, publish_step)
+
+
+def restore_repository_backups(
+    transaction: RemoteTransaction, resets: Sequence[RepositoryReset]
+) -> None:
+    """
+    Move the backups back in place of the targets moved aside but not published by the failed
+    transaction, so that the targets are not left missing
+
+    Args:
+        transaction: The failed transaction the reset steps were added to
+        resets: The reset steps returned by add_reset_repository_steps()
+    """
+    rollback = RemoteTransaction(transaction.server)
+    for reset in resets:
+        if transaction.result(reset.backup_step).status != "ok":
+            continue
+        if transaction.result(reset.publish_step).status in ("ok", "skipped"):
+            continue
+        rollback.add(
+            f"restore repository backup: {reset.backup} -> {reset.target}",
+            ["mv", reset.backup, reset.target],
+            condition=f"! test -e {shlex.quote(reset.target)}",
+        )
+    if not rollback.steps:
+        return
+    log.warning("Restoring %s repository backups on: %s", len(rollback.steps), rollback.server)
+    try:
+        rollback.run()
+    except RemoteTransactionError as err:
+        log.error("Restoring the repository backups failed: %s", err)
+
 
+def reset_new_remote_repository(server: str, remote_source_repo_path: str, remote_target_repo_path: str) -> None:
     log.info("Reset new remote repository: source: [%s] target: [%s]", remote_source_repo_path, remote_target_repo_path)
-    create_remote_paths(server, [remote_target_repo_path])
-    args = ['cp', '-Rv', remote_source_repo_path + '/*', remote_target_repo_path]
-    run_cmd(cmd=get_remote_login_cmd(server) + args, timeout=60 * 60)  # give it 60 mins
+    transaction = RemoteTransaction(server)
+    reset = add_reset_repository_steps(transaction, remote_source_repo_path, remote_target_repo_path)
+    try:
+        run_remote_transaction(transaction)
+    except PackagingError:
+        restore_repository_backups(transaction, [reset])
+        raise
 
 
 def create_remote_repository_backup(server: str, remote_repo_path: str) -> str:
@@ -633,39 +893,71 @@ def spawn_remote_background_task(server: str, server_home: str, remote_cmd: List
     execute_remote_cmd(server, server_home, cmd, remote_script_file_name, timeout=60 * 60 * 2)  # 2h timeout for uploading data to CDN
 
 
-async def update_repository(
+def update_repository(
     staging_server: str,
     update_strategy: RepoUpdateStrategy,
     task: Union[IFWReleaseTask, QBSPReleaseTask],
     rta: str,
 ) -> None:
-    # ensure the repository paths exists at server
+    # the remote operations are batched into one round trip before and one after the upload
     log.info("Starting repository update: %s", task.repo_path)
-    create_remote_paths(staging_server, update_strategy.remote_repo_layout.get_repo_layout())
+    # ensure the repository paths exists at server
+    repo_layout = update_strategy.remote_repo_layout.get_repo_layout()
+    is_safe_directory(repo_layout)
+    transaction = RemoteTransaction(staging_server)
+    transaction.add("create repository layout", ["mkdir", "-p"] + repo_layout)
 
     # this is the repo path on remote which will act as the 'source' for remote updates
     # on the remote machine
     remote_repo_source_path = update_strategy.get_remote_source_repo_path(task)
 
     if update_strategy.requires_local_source_repo_upload():
+        # When uploading new content to staging the old content is always replaced, the
+        # unchanged files are reused from the previous pending or the staging repository
+        staging_repo_path = os.path.join(
+            update_strategy.remote_repo_layout.get_staging_path(), task.repo_path
+        )
+        checks = add_upload_prepare_steps(
+            transaction, remote_repo_source_path, [remote_repo_source_path, staging_repo_path]
+        )
+        run_remote_transaction(transaction)
+        link_dests = [
+            path for path, step in checks.items() if transaction.result(step).status == "ok"
+        ]
         # this is the repo path from local repo build which will act as the 'source' which to
         # upload to the remote
         local_repo_source_path = task.source_online_repository_path
-        # We always replace existing repository if previous version should exist.
-        # Previous version is moved as backup
-        upload_pending_repository_content(staging_server, local_repo_source_path,
-                                          remote_repo_source_path)
+        log.info("Uploading pending repository content from: [%s] -> [%s:%s]",
+                 local_repo_source_path, staging_server, remote_repo_source_path)
+        upload_repository_content(staging_server, local_repo_source_path,
+                                  get_upload_path(remote_repo_source_path), link_dests)
+        transaction = RemoteTransaction(staging_server)
+        add_upload_swap_steps(transaction, remote_repo_source_path)
 
     # Now we can run the updates on the remote
+    # We always replace existing repository if previous version should exist.
+    # Previous version is moved as backup
+    resets = []
     for update_destination in update_strategy.remote_repo_update_destinations:
         remote_repo_destination_path = os.path.join(update_destination, task.repo_path)
-        reset_new_remote_repository(staging_server, remote_repo_source_path,
-                                    remote_repo_destination_path)
-    log.info("Update done: %s", task.repo_path)
+        log.info("Reset new remote repository: source: [%s] target: [%s]",
+                 remote_repo_source_path, remote_repo_destination_path)
+        resets.append(add_reset_repository_steps(
+            transaction, remote_repo_source_path, remote_repo_destination_path,
+            update_strategy.publish_mode,
+        ))
 
     # Delete pending content
     if update_strategy.purge_remote_source_repo():
-        delete_remote_paths(staging_server, [remote_repo_source_path])
+        is_safe_directory([remote_repo_source_path])
+        transaction.add("delete pending content", ["rm", "-rf", remote_repo_source_path])
+    try:
+        # the default timeout allows each copy and removal its own hour, as before batching
+        run_remote_transaction(transaction)
+    except PackagingError:
+        restore_repository_backups(transaction, resets)
+        raise
+    log.info("Update done: %s", task.repo_path)
     # trigger RTA cases for the task if specified
     if rta:
         trigger_rta(rta, task.rta_key_list)
@@ -679,6 +971,8 @@ async def build_online_repositories(
     ifw_tools: str,
     build_repositories: bool,
     dry_run: Optional[DryRunMode] = None,
+    concurrency: int = 1,
+    work_dir: str = "",
 ) -> List[str]:
     log.info("Building online repositories: %i", len(tasks))
     # create base tmp dir
@@ -691,8 +985,13 @@ async def build_online_repositories(
     assert artifact_share_base_url, "The 'artifact_share_base_url' must be defined!"
     assert ifw_tools, "The 'ifw_tools' must be defined!"
 
-    # build online repositories first
-    done_repositories = []  # type: List[str]
+    for task in tasks:
+        tmp_dir = os.path.join(tmp_base_dir, task.repo_path)
+        task.source_online_repository_path = os.path.join(tmp_dir, "online_repository")
+    if not build_repositories:
+        # this is usually for testing purposes in env where repositories are already built, we just update task objects
+        return []
+
     if sys.version_info < (3, 7):
         loop = asyncio.get_event_loop()
     else:
@@ -700,56 +999,70 @@ async def build_online_repositories(
     # use same timestamp for all built repos
     job_timestamp = strftime("%Y-%m-%d", gmtime())
     errors: List[str] = []
-    for task in tasks:
-        tmp_dir = os.path.join(tmp_base_dir, task.repo_path)
-        task.source_online_repository_path = os.path.join(tmp_dir, "online_repository")
-        if not build_repositories:
-            # this is usually for testing purposes in env where repositories are already built, we just update task objects
-            continue
-
-        log.info("Building repository: %s", task.repo_path)
-        installer_config_file = os.path.join(installer_config_base_dir, task.config_file)
-        if not os.path.isfile(installer_config_file):
-            raise PackagingError(f"Invalid 'config_file' path: {installer_config_file}")
-
-        installer_task: QtInstallerTask[Any] = QtInstallerTask(
-            configurations_dir=installer_config_base_dir,
-            configuration_file=installer_config_file,
-            create_repository=True,
-            license_type=license_,
-            archive_base_url=artifact_share_base_url,
-            ifw_tools_uri=ifw_tools,
-            force_version_number_increase=True,
-            substitution_list=task.substitutions,
-            build_timestamp=job_timestamp,
-            notarize_payload=task.notarize_payload,
-            dry_run=dry_run,
-        )
-        try:
-            await asyncio.wait_for(
-                loop.run_in_executor(None, create_installer, installer_task),
-                timeout=60 * 60 * 3  # 3h for one repo build
-            )
-        except Exception as exc:
-            log.exception("Repository build failed!")
-            raise PackagingError from exc
-        if dry_run and installer_task.errors:
-            errors.append(
-                f"Collected {len(installer_task.errors)} errors during the repository task: "
-                f"{task.repo_path}"
+    # each task writes only to its own directory under tmp_base_dir so the builds can overlap
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    failed = False
+
+    async def build_repository(task: IFWReleaseTask, executor: ThreadPoolExecutor) -> None:
+        nonlocal failed
+        async with semaphore:
+            if failed:
+                return  # don't start new builds if one of the builds has failed
+            log.info("Building repository: %s", task.repo_path)
+            installer_config_file = os.path.join(installer_config_base_dir, task.config_file)
+            if not os.path.isfile(installer_config_file):
+                raise PackagingError(f"Invalid 'config_file' path: {installer_config_file}")
+
+            # scratch data goes to the task's own workspace, e.g. on tmpfs if work_dir is given
+            tmp_dir = os.path.dirname(task.source_online_repository_path)
+            task_work_dir = os.path.join(work_dir, task.repo_path) if work_dir else tmp_dir
+            installer_task: QtInstallerTask[Any] = QtInstallerTask(
+                configurations_dir=installer_config_base_dir,
+                configuration_file=installer_config_file,
+                work_dir=task_work_dir,
+                repo_output_dir=task.source_online_repository_path,
+                create_repository=True,
+                license_type=license_,
+                archive_base_url=artifact_share_base_url,
+                ifw_tools_uri=ifw_tools,
+                force_version_number_increase=True,
+                substitution_list=task.substitutions,
+                build_timestamp=job_timestamp,
+                notarize_payload=task.notarize_payload,
+                dry_run=dry_run,
             )
-            errors.extend(installer_task.errors)
-        if not dry_run:
-            script_dir = os.path.dirname(__file__)
-            online_repo_path = os.path.abspath(os.path.join(script_dir, "online_repository"))
-            assert os.path.isdir(online_repo_path), f"Not a valid path: {online_repo_path}"
-            shutil.move(online_repo_path, task.source_online_repository_path)
-            log.info("Repository created at: %s", task.source_online_repository_path)
-            done_repositories.append(task.source_online_repository_path)
+            try:
+                await asyncio.wait_for(
+                    loop.run_in_executor(executor, create_installer, installer_task),
+                    timeout=60 * 60 * 3  # 3h for one repo build
+                )
+            except Exception as exc:
+                failed = True
+                log.exception("Repository build failed: %s", task.repo_path)
+                raise PackagingError from exc
+            if dry_run and installer_task.errors:
+                errors.append(
+                    f"Collected {len(installer_task.errors)} errors during the repository task: "
+                    f"{task.repo_path}"
+                )
+                errors.extend(installer_task.errors)
+            if not dry_run:
+                repo_path = task.source_online_repository_path
+                assert os.path.isdir(repo_path), f"Not a valid path: {repo_path}"
+                log.info("Repository created at: %s", repo_path)
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        results = await asyncio.gather(
+            *[build_repository(task, executor) for task in tasks], return_exceptions=True
+        )
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
     if dry_run:
         for err_msg in errors:
             log.error(err_msg)
-    return done_repositories
+        return []
+    return [task.source_online_repository_path for task in tasks]
 
 
 async def update_repositories(
@@ -757,13 +1070,43 @@ async def update_repositories(
     staging_server: str,
     update_strategy: RepoUpdateStrategy,
     rta: str,
+    concurrency: int = 1,
 ) -> None:
-    try:
-        for task in tasks:
-            await update_repository(staging_server, update_strategy, task, rta)
-    except PackagingError as error:
-        log.error("Aborting online repository update: %s", str(error))
-        raise
+    if sys.version_info < (3, 7):
+        loop = asyncio.get_event_loop()
+    else:
+        loop = asyncio.get_running_loop()  # pylint: disable=no-member
+    # the repositories are independent, the server's session limit applies across all updates
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    failed = False
+
+    def update(task: Union[IFWReleaseTask, QBSPReleaseTask]) -> None:
+        with get_ssh_pool().session(staging_server):
+            # the RTA cases of the repository are triggered as soon as it is done
+            update_repository(staging_server, update_strategy, task, rta)
+
+    async def update_task(
+        task: Union[IFWReleaseTask, QBSPReleaseTask], executor: ThreadPoolExecutor
+    ) -> None:
+        nonlocal failed
+        async with semaphore:
+            if failed:
+                return  # don't start new updates if one of the updates has failed
+            try:
+                await loop.run_in_executor(executor, update, task)
+            except Exception:
+                failed = True
+                raise
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        results = await asyncio.gather(
+            *[update_task(task, executor) for task in tasks], return_exceptions=True
+        )
+    for result in results:
+        if isinstance(result, PackagingError):
+            log.error("Aborting online repository update: %s", str(result))
+        if isinstance(result, BaseException):
+            raise result
 
 
 def download_and_extract_qbsp(qbsp_url: str, dest_folder: Path) -> None:
@@ -828,6 +1171,7 @@ async def handle_update_qbsp(
     event_injector: str,
     export_data: Dict[str, str],
     dry_run: Optional[DryRunMode] = None,
+    update_concurrency: int = 1,
 ) -> List[str]:
     """Build a repositories from QBSP files, update that to staging area and sync to production."""
     log.info("Starting QBSP repository update for %i tasks..", len(tasks))
@@ -858,7 +1202,9 @@ async def handle_update_qbsp(
                 done_repositories.append(task.source_online_repository_path)
     if update_strategy.requires_remote_update() and dry_run is None:
         async with EventRegister(f"{license_}: repo update", event_injector, export_data):
-            await update_repositories(tasks, staging_server, update_strategy, rta)
+            await update_repositories(
+                tasks, staging_server, update_strategy, rta, update_concurrency
+            )
     if sync_repositories and dry_run is None:
         await sync_production(
             [task.repo_path for task in tasks],
@@ -892,6 +1238,9 @@ async def handle_update(
     event_injector: str,
     export_data: Dict[str, str],
     dry_run: Optional[DryRunMode] = None,
+    build_concurrency: int = 1,
+    update_concurrency: int = 1,
+    work_dir: str = "",
 ) -> None:
     """Build all online repositories, update those to staging area and sync to production."""
     log.info("Starting repository update for %i tasks..", len(tasks))
@@ -906,10 +1255,14 @@ async def handle_update(
                 ifw_tools,
                 build_repositories,
                 dry_run,
+                build_concurrency,
+                work_dir,
             )
     if update_strategy.requires_remote_update():
         async with EventRegister(f"{license_}: repo update", event_injector, export_data):
-            await update_repositories(tasks, staging_server, update_strategy, rta)
+            await update_repositories(
+                tasks, staging_server, update_strategy, rta, update_concurrency
+            )
     if sync_repositories:
         await sync_production(
             [task.repo_path for task in tasks],
@@ -1140,7 +1493,8 @@ def upload_snapshots_to_remote(staging_server: str, remote_upload_path: str, tas
         snapshot_upload_path = snapshot_upload_path.replace("\\", "/")
         remote_installer_path = remote_installer_path.replace("\\", "/")
     snapshot_srv = get_pkg_value("SNAPSHOT_SERVER")
-    login = get_remote_login_cmd(staging_server) + get_remote_login_cmd(snapshot_srv)
+    login = get_remote_login_cmd(staging_server)
+    login += get_remote_login_cmd(snapshot_srv, multiplexed=False)
     cmd_mkdir = login + ["mkdir", "-p", snapshot_upload_path]
     log.info("Creating offline snapshot directory: %s", cmd_mkdir)
     run_cmd(cmd=cmd_mkdir, timeout=60 * 60)
@@ -1221,6 +1575,7 @@ def handle_online_repo_jobs(
             remote_repo_update_source=RepoSource(args.update_source_type),
             update_staging=args.update_staging,
             update_production=args.update_production,
+            publish_mode=PublishMode(args.publish_mode),
         )
 
         build_strategy = RepoBuildStrategy.get_strategy(
@@ -1310,6 +1665,12 @@ def main() -> None:
                         default=RepoSource.PENDING.value,
                         help="Which origin to use for the remote updates. E.g. possible to "
                              "update production with content from staging")
+    parser.add_argument("--publish-mode", dest="publish_mode", type=str,
+                        choices=[mode.value for mode in PublishMode],
+                        default=os.getenv("PKG_REPO_PUBLISH_MODE", PublishMode.COPY.value),
+                        help="How the updated repositories are created from the update source "
+                             "on the remote, 'hardlink' shares the files with the update source "
+                             "instead of copying them")
     parser.add_argument("--enable-oss-snapshots", dest="enable_oss_snapshots", action='store_true', default=False,
                         help="Upload snapshot to opensource file server")
 
@@ -1329,8 +1690,21 @@ def main() -> None:
         action="store_false",
         default=True
     )
+    parser.add_argument("--build-concurrency", dest="build_concurrency", type=int,
+                        default=int(os.getenv("PKG_REPO_BUILD_CONCURRENCY", "1")),
+                        help="Number of online repositories to build concurrently")
+    parser.add_argument("--update-concurrency", dest="update_concurrency", type=int,
+                        default=int(os.getenv("PKG_REPO_UPDATE_CONCURRENCY", "1")),
+                        help="Number of repositories to update on the staging server "
+                             "concurrently, limited also per server by PKG_SSH_MAX_SESSIONS")
+    parser.add_argument("--work-dir", dest="work_dir", type=str, default=os.getenv("PKG_WORK_DIR", ""),
+                        help="Root for the per-task working directories of repository builds, "
+                             "e.g. on tmpfs")
+    # limits shared by all the installer tasks run by this process
+    add_governor_arguments(parser)
     parser.set_defaults(**defaults)  # these are from provided --config file
     args = parser.parse_args(sys.argv[1:])
+    configure_governor(args)
     if args.require_long_path_support is True and is_long_path_supported() is False:
         log.error("Path names longer than 260 are not supported by the current environment")
         log.error("To continue, the maximum path limitation must be disabled in Windows registry")
@@ -1363,10 +1737,13 @@ def main() -> None:
 
     export_data = load_export_summary_data(Path(args.config)) if args.event_injector else {}
 
-    if args.build_offline:
-        handle_offline_jobs(args, export_data)
-    else:  # this is either repository build or repository sync build
-        handle_online_repo_jobs(args, export_data)
+    try:
+        if args.build_offline:
+            handle_offline_jobs(args, export_data)
+        else:  # this is either repository build or repository sync build
+            handle_online_repo_jobs(args, export_data)
+    finally:
+        get_ssh_pool().close()
 
 
 if __name__ == "__main__":
@@ -59,6 +59,7 @@ from debian_repo_release import (
 )
 from logging_util import init_logger
 from release_task_reader import DebReleaseTask, TaskType, append_to_task_filters, parse_config
+from resource_governor import Resource, governed
 
 if sys.version_info < (3, 7):
     from asyncio_backport import run as asyncio_run
@@ -167,7 +168,9 @@ async def search_in_executor(url: str) -> List[str]:
     """
     log.debug("Crawling: %s", url.rstrip("/").split("/")[-1])
     loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(None, htmllistparse.fetch_listing, url, 60 * 10)
+    return await loop.run_in_executor(
+        None, governed(Resource.NETWORK, htmllistparse.fetch_listing), url, 60 * 10
+    )
 
 
 async def search_files_from_url(base_url: str, fn_mask: str) -> List[str]:
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#############################################################################
+#
+# Copyright (C) 2023 The Qt Company Ltd.
+# Contact: https://www.qt.io/licensing/
+#
+# This file is part of the release tools of the Qt Toolkit.
+#
+# $QT_BEGIN_LICENSE:GPL-EXCEPT$
+# Commercial License Usage
+# Licensees holding valid commercial Qt licenses may use this file in
+# accordance with the commercial license agreement provided with the
+# Software or, alternatively, in accordance with the terms contained in
+# a written agreement between you and The Qt Company. For licensing terms
+# and conditions see https://www.qt.io/terms-conditions. For further
+# information use the contact form at https://www.qt.io/contact-us.
+#
+# GNU General Public License Usage
+# Alternatively, this file may be used under the terms of the GNU
+# General Public License version 3 as published by the Free Software
+# Foundation with exceptions as appearing in the file LICENSE.GPL3-EXCEPT
+# included in the packaging of this file. Please review the following
+# information to ensure the GNU General Public License requirements will
+# be met: https://www.gnu.org/licenses/gpl-3.0.html.
+#
+# $QT_END_LICENSE$
+#
+#############################################################################
+
+
+"""Run a batch of remote shell commands in one SSH round trip with per-step results"""
+
+import json
+import shlex
+import subprocess
+from base64 import b64decode
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Union
+
+from logging_util import init_logger
+from ssh_pool import get_ssh_pool
+
+log = init_logger(__name__, debug_mode=False)
+
+RESULT_MARKER = "@@step-result@@"
+STEP_TIMEOUT = 60 * 60  # seconds per step for the default transaction timeout
+
+# Reports the result of a step as a JSON line, the output is base64 encoded for safe quoting
+_SCRIPT_HEADER = f"""set -u
+_out=$(mktemp)
+trap 'rm -f "$_out"' EXIT
+_failed=0
+_result() {{
+    printf '{RESULT_MARKER}{{"step": %d, "status": "%s", "returncode": %d, "output": "%s"}}\\n' \\
+        "$1" "$2" "$3" "$(base64 < "$_out" | tr -d '\\n')"
+}}
+"""
+
+
+class RemoteTransactionError(Exception):
+    pass
+
+
+@dataclass
+class RemoteStep:
+    """A shell command to run on the remote, optionally only if the condition succeeds"""
+
+    name: str
+    command: str
+    condition: Optional[str] = None
+    check: bool = True
+
+
+@dataclass
+class RemoteStepResult:
+    """
+    The result of a remote step
+
+    The status is 'ok' or 'failed' for a step that was run, 'skipped' if its condition failed
+    and 'not_run' if a previous step failed.
+    """
+
+    step: RemoteStep
+    status: str = "not_run"
+    returncode: int = 0
+    output: str = ""
+
+    @property
+    def ok(self) -> bool:
+        if self.status == "failed":
+            return not self.step.check
+        return self.status in ("ok", "skipped")
+
+
+def _shell_cmd(command: Union[str, Sequence[str]]) -> str:
+    """Return a shell command line, the items of a list are quoted"""
+    if isinstance(command, str):
+        return command
+    return " ".join(shlex.quote(arg) for arg in command)
+
+
+@dataclass
+class RemoteTransaction:
+    """
+    Collect remote commands and run them on the server as a single script over one connection
+
+    The steps are run in order and the script stops at the first failed step with check set.
+    Each step reports its status, exit code and output, so the caller knows which steps were
+    completed e.g. for rolling back the changes.
+    """
+
+    server: str
+    steps: List[RemoteStep] = field(default_factory=list)
+    results: List[RemoteStepResult] = field(default_factory=list)
+
+    def add(
+        self,
+        name: str,
+        command: Union[str, Sequence[str]],
+        condition: Optional[Union[str, Sequence[str]]] = None,
+        check: bool = True,
+    ) -> RemoteStep:
+        """
+        Add a step to the transaction
+
+        Args:
+            name: A description of the step for the logs and the results
+            command: The shell command, the items are quoted if given as a list
+            condition: A shell command, the step is run only if it succeeds
+            check: Whether a failure of the step fails the transaction
+
+        Returns:
+            The added step, for looking up its result with result()
+        """
+        step = RemoteStep(
+            name,
+            _shell_cmd(command),
+            None if condition is None else _shell_cmd(condition),
+            check,
+        )
+        self.steps.append(step)
+        return step
+
+    def result(self, step: RemoteStep) -> RemoteStepResult:
+        """Return the result of the step after the transaction has been run"""
+        index = next(i for i, added in enumerate(self.steps) if added is step)
+        return self.results[index]
+
+    def script(self) -> str:
+        """Return the bash script running the steps"""
+        lines = [_SCRIPT_HEADER]
+        for index, step in enumerate(self.steps):
+            condition = step.condition or "true"
+            on_failure = "_failed=1" if step.check else ":"
+            lines.append(
+                f"# {step.name}\n"
+                f'if [ "$_failed" -eq 0 ]; then\n'
+                f"    if {condition}; then\n"
+                f'        ( {step.command} ) > "$_out" 2>&1 < /dev/null; _rc=$?\n'
+                f'        if [ "$_rc" -eq 0 ]; then _result {index} ok 0\n'
+                f'        else _result {index} failed "$_rc"; {on_failure}; fi\n'
+                f'    else : > "$_out"; _result {index} skipped 0; fi\n'
+                f"fi\n"
+            )
+        lines.append('exit "$_failed"\n')
+        return "".join(lines)
+
+    def _parse(self, output: str) -> List[RemoteStepResult]:
+        results = [RemoteStepResult(step) for step in self.steps]
+        for line in output.splitlines():
+            _, marker, data = line.partition(RESULT_MARKER)
+            if not marker:
+                continue
+            values = json.loads(data)
+            result = results[values["step"]]
+            result.status = values["status"]
+            result.returncode = values["returncode"]
+            result.output = b64decode(values["output"]).decode("utf-8", errors="replace")
+        return results
+
+    def run(self, timeout: Optional[int] = None) -> List[RemoteStepResult]:
+        """
+        Run the steps on the server
+
+        The results are available also after a failure, e.g. for rolling back the completed
+        steps. After a timeout the steps not reported as completed may still be running.
+
+        Args:
+            timeout: Timeout in seconds for the whole transaction, by default STEP_TIMEOUT
+                     for each step
+
+        Returns:
+            The results of the steps
+
+        Raises:
+            RemoteTransactionError: When a step fails or the script could not be run
+        """
+        self.results = self._parse("")
+        if not self.steps:
+            return []
+        timeout = timeout or STEP_TIMEOUT * len(self.steps)
+        login = ["ssh"] + get_ssh_pool().ssh_options(self.server) + [self.server]
+        log.info("Running %s remote steps on: %s", len(self.steps), self.server)
+        try:
+            proc = subprocess.run(
+                login + ["bash", "-s"],
+                input=self.script(),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                universal_newlines=True,
+                timeout=timeout,
+                check=False,
+            )
+        except subprocess.TimeoutExpired as err:
+            # the output received so far tells which steps were completed
+            output = err.output or ""
+            if isinstance(output, bytes):
+                output = output.decode("utf-8", errors="replace")
+            self.results = self._parse(output)
+            raise RemoteTransactionError(
+                f"Running the remote steps timed out on {self.server} after {timeout}s"
+            ) from err
+        except OSError as err:
+            raise RemoteTransactionError(
+                f"Unable to run the remote steps on {self.server}: {err}"
+            ) from err
+        self.results = self._parse(proc.stdout)
+        for result in self.results:
+            log.info("[%s] %s: %s", result.status, result.step.name, result.step.command)
+            if not result.ok:
+                raise RemoteTransactionError(
+                    f"Remote step failed on {self.server}: {result.step.name}: "
+                    f"{result.step.command} (exit code {result.returncode}): {result.output}"
+                )
+        if proc.returncode != 0 or any(r.status == "not_run" for r in self.results):
+            raise RemoteTransactionError(
+                f"Running the remote steps failed on {self.server} "
+                f"(exit code {proc.returncode}): {proc.stdout}"
+            )
+        return self.results
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#############################################################################
+#
+# Copyright (C) 2023 The Qt Company Ltd.
+# Contact: https://www.qt.io/licensing/
+#
+# This file is part of the release tools of the Qt Toolkit.
+#
+# $QT_BEGIN_LICENSE:GPL-EXCEPT$
+# Commercial License Usage
+# Licensees holding valid commercial Qt licenses may use this file in
+# accordance with the commercial license agreement provided with the
+# Software or, alternatively, in accordance with the terms contained in
+# a written agreement between you and The Qt Company. For licensing terms
+# and conditions see https://www.qt.io/terms-conditions. For further
+# information use the contact form at https://www.qt.io/contact-us.
+#
+# GNU General Public License Usage
+# Alternatively, this file may be used under the terms of the GNU
+# General Public License version 3 as published by the Free Software
+# Foundation with exceptions as appearing in the file LICENSE.GPL3-EXCEPT
+# included in the packaging of this file. Please review the following
+# information to ensure the GNU General Public License requirements will
+# be met: https://www.gnu.org/licenses/gpl-3.0.html.
+#
+# $QT_END_LICENSE$
+#
+#############################################################################
+
+
+"""Process-wide limits for concurrently running network, CPU and disk heavy jobs"""
+
+import argparse
+import os
+import threading
+from contextlib import contextmanager
+from enum import Enum
+from functools import wraps
+from multiprocessing import cpu_count
+from typing import Any, Callable, Dict, Iterator, Mapping, Optional, TypeVar
+
+from logging_util import init_logger
+
+log = init_logger(__name__, debug_mode=False)
+
+T = TypeVar("T")
+
+
+class Resource(Enum):
+    NETWORK = "network"
+    CPU = "cpu"
+    DISK = "disk"
+
+
+def default_limits() -> Dict[Resource, int]:
+    """Return the default limits, read from PKG_MAX_<RESOURCE>_JOBS environment variables"""
+    defaults = {Resource.NETWORK: 8, Resource.CPU: cpu_count(), Resource.DISK: 4}
+    return {
+        res: int(os.getenv(f"PKG_MAX_{res.name}_JOBS", str(limit)))
+        for res, limit in defaults.items()
+    }
+
+
+class ResourceGovernor:
+    """
+    Token counters limiting the number of concurrent jobs per resource type
+
+    All the work done in the process draws from the same counters, e.g. multiple installer
+    tasks running at the same time share the limits instead of each using its own.
+    The limits can be changed at any time, jobs already running are not affected.
+    """
+
+    def __init__(self, limits: Dict[Resource, int]) -> None:
+        self._limits = {res: max(1, limits[res]) for res in Resource}
+        self._in_use = {res: 0 for res in Resource}
+        self._cond = threading.Condition()
+
+    def limit(self, resource: Resource) -> int:
+        """Return the current limit for the resource"""
+        with self._cond:
+            return self._limits[resource]
+
+    def in_use(self, resource: Resource) -> int:
+        """Return the number of tokens currently held for the resource"""
+        with self._cond:
+            return self._in_use[resource]
+
+    def configure(self, limits: Mapping[Resource, Optional[int]]) -> None:
+        """
+        Change the limits for the given resources
+
+        Args:
+            limits: New limits by resource, None values are ignored
+        """
+        with self._cond:
+            for res, limit in limits.items():
+                if limit is not None:
+                    self._limits[res] = max(1, limit)
+            self._cond.notify_all()
+        log.debug("Resource limits: %s", self._limits)
+
+    @contextmanager
+    def acquire(self, resource: Resource) -> Iterator[None]:
+        """
+        Context manager holding a token of the resource, blocks until a token is available
+
+        Args:
+            resource: The resource type to acquire
+        """
+        with self._cond:
+            while self._in_use[resource] >= self._limits[resource]:
+                self._cond.wait()
+            self._in_use[resource] += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._in_use[resource] -= 1
+                self._cond.notify_all()
+
+    def governed(self, resource: Resource, func: Callable[..., T]) -> Callable[..., T]:
+        """
+        Wrap a function to hold a token of the resource while it runs
+
+        Args:
+            resource: The resource type used by the function
+            func: The function to wrap
+
+        Returns:
+            The wrapped function
+        """
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> T:
+            with self.acquire(resource):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+_governor = ResourceGovernor(default_limits())
+
+
+def get_governor() -> ResourceGovernor:
+    """Return the process-wide ResourceGovernor instance"""
+    return _governor
+
+
+def governed(resource: Resource, func: Callable[..., T]) -> Callable[..., T]:
+    """Wrap a function to hold a token of the resource from the process-wide governor"""
+    return _governor.governed(resource, func)
+
+
+def add_governor_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Add the command line options for the resource limits to the argument parser
+
+    Args:
+        parser: The parser to add the options to
+    """
+    defaults = default_limits()
+    for res in Resource:
+        parser.add_argument(
+            f"--max-{res.value}-jobs", dest=f"max_{res.value}_jobs", type=int,
+            default=defaults[res],
+            help=f"Maximum number of concurrent {res.value} heavy jobs in the whole process "
+                 f"(env: PKG_MAX_{res.name}_JOBS)"
+        )
+
+
+def configure_governor(args: argparse.Namespace) -> None:
+    """
+    Configure the process-wide governor from the parsed command line options
+
+    Args:
+        args: The parsed arguments from a parser set up with add_governor_arguments
+    """
+    _governor.configure({res: getattr(args, f"max_{res.value}_jobs", None) for res in Resource})
@@ -39,12 +39,12 @@ from fnmatch import fnmatch
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
-import htmllistparse  # type: ignore
 from urlpath import URL  # type: ignore
 
 from bld_utils import is_macos
-from bldinstallercommon import uri_exists
+from listing_cache import get_listing_cache
 from logging_util import init_logger
+from uri_validator import get_uri_validator
 
 if sys.version_info < (3, 7):
     from asyncio_backport import run as asyncio_run
@@ -54,6 +54,9 @@ else:
 
 log = init_logger(__name__, debug_mode=False)
 
+# maximum number of concurrent directory listing requests per resolved pattern
+LISTING_CONCURRENCY = int(os.getenv("PKG_LISTING_CONCURRENCY", "16"))
+
 
 class IfwSdkError(Exception):
     """Exception class for IfwSdkComponent errors"""
@@ -124,13 +127,20 @@ class IfwPayloadItem:
                 f"[[{self.package_name}]] Invalid payload configuration - check your configs!"
             )
 
+    @property
+    def uri_to_validate(self) -> Optional[str]:
+        """Return the payload URI checked by validate_uri, None if there is nothing to check"""
+        if self.payload_base_uri or not self.payload_uris:
+            return None
+        return self.payload_uris[0]
+
     def validate_uri(self) -> None:
         """Validate that the uri location exists either on the file system or online"""
         if self.payload_base_uri:
             log.info("[%s] Skip checking already resolved uris", self.package_name)
             return
         log.info("[%s] Checking payload uri: %s", self.package_name, self.payload_uris[0])
-        if not uri_exists(self.payload_uris[0]):
+        if not get_uri_validator().exists(self.payload_uris[0]):
             raise IfwSdkError(f"[{self.package_name}] Missing payload {self.payload_uris[0]}")
 
     def _ensure_ifw_archive_name(self) -> str:
@@ -271,15 +281,19 @@ class ArchiveResolver:
         return url
 
     async def fetch_in_executor(self, url: str) -> Tuple[Any, List[Any]]:
-        """Wrap fetch_listing in a Future and return it"""
+        """Wrap the cached fetch_listing in a Future and return it"""
         if sys.version_info < (3, 7):
             loop = asyncio.get_event_loop()  # keep for Python 3.6 compatibility
         else:
             loop = asyncio.get_running_loop()  # pylint: disable=no-member
-        log.info("Crawl: %s", url)
-        return await loop.run_in_executor(None, htmllistparse.fetch_listing, url, 30)
-
-    async def resolve_uri_pattern(self, pattern: str, base_url: Optional[URL] = None) -> Tuple[URL, List[URL]]:
+        return await loop.run_in_executor(None, get_listing_cache().fetch, url)
+
+    async def resolve_uri_pattern(
+        self,
+        pattern: str,
+        base_url: Optional[URL] = None,
+        sem: Optional[asyncio.Semaphore] = None,
+    ) -> Tuple[URL, List[URL]]:
         """
         Return payload URIs from remote tree, fnmatch pattern match for given arguments.
         Patterns will match arbitrary number of '/' allowing recursive search.
@@ -287,16 +301,19 @@ class ArchiveResolver:
         Args:
             pattern: A fnmatch pattern starting with an absolute URL e.g. "http://foo.bar/dir/*"
             base_url: For recursive runs, specify the child directory to crawl
+            sem: For recursive runs, the semaphore limiting the concurrent listing requests
 
         Returns:
             The final list of matching URIs
         """
+        sem = sem or asyncio.Semaphore(LISTING_CONCURRENCY)
         # split base pattern from pattern (fnmatch chars *,[,],?)
         base_pattern = re.split(r'[\*\[\]\?]', pattern)[0]
         # base_url from base_pattern if not specified
         base_url = base_url or URL(base_pattern.rsplit("/", 1)[0])
         # get links from base_url
-        _, links = await self.fetch_in_executor(base_url)
+        async with sem:
+            _, links = await self.fetch_in_executor(base_url)
         # get fnmatch pattern matches from links recursively
         uri_list = []
         child_list = []
@@ -309,7 +326,7 @@ class ArchiveResolver:
                 if fnmatch(base_url / link.name, pattern):
                     uri_list.append(base_url / link.name)
         # recursively look for pattern matches inside the matching child directories
-        coros = [self.resolve_uri_pattern(pattern, url) for url in child_list]
+        coros = [self.resolve_uri_pattern(pattern, url, sem) for url in child_list]
         results = await asyncio.gather(*coros)
         for _, item in results:
             uri_list.extend(item)
@@ -406,6 +423,9 @@ class IfwSdkComponent:
             assert self.ifw_sdk_comp_name, "Undefined package name?"
             if self.downloadable_archives and not self.target_install_base:
                 raise IfwSdkError(f"[{self.ifw_sdk_comp_name}] is missing 'target_install_base'")
+            if uri_check:
+                # check the payload URIs of all the archives concurrently
+                get_uri_validator().prefetch(self.payload_uris_to_validate())
             seen: Dict[str, str] = {}
             for archive in self.downloadable_archives:
                 # payload duplicate archive name check
@@ -428,6 +448,11 @@ class IfwSdkComponent:
             log.exception("[%s] Ignored error in component: %s", self.ifw_sdk_comp_name, err)
         return False
 
+    def payload_uris_to_validate(self) -> List[str]:
+        """Return the payload URIs checked when validating the component"""
+        uris = [archive.uri_to_validate for archive in self.downloadable_archives]
+        return [uri for uri in uris if uri is not None]
+
     def init_work_dirs(self) -> None:
         """Create the required work directories for the payload data"""
         try:
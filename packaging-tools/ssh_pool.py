@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#############################################################################
+#
+# Copyright (C) 2023 The Qt Company Ltd.
+# Contact: https://www.qt.io/licensing/
+#
+# This file is part of the release tools of the Qt Toolkit.
+#
+# $QT_BEGIN_LICENSE:GPL-EXCEPT$
+# Commercial License Usage
+# Licensees holding valid commercial Qt licenses may use this file in
+# accordance with the commercial license agreement provided with the
+# Software or, alternatively, in accordance with the terms contained in
+# a written agreement between you and The Qt Company. For licensing terms
+# and conditions see https://www.qt.io/terms-conditions. For further
+# information use the contact form at https://www.qt.io/contact-us.
+#
+# GNU General Public License Usage
+# Alternatively, this file may be used under the terms of the GNU
+# General Public License version 3 as published by the Free Software
+# Foundation with exceptions as appearing in the file LICENSE.GPL3-EXCEPT
+# included in the packaging of this file. Please review the following
+# information to ensure the GNU General Public License requirements will
+# be met: https://www.gnu.org/licenses/gpl-3.0.html.
+#
+# $QT_END_LICENSE$
+#
+#############################################################################
+
+
+"""Persistent multiplexed SSH connections shared by the remote commands"""
+
+import hashlib
+import os
+import shlex
+import shutil
+import socket
+import subprocess
+import threading
+from contextlib import contextmanager
+from subprocess import DEVNULL
+from tempfile import mkdtemp
+from time import monotonic
+from typing import Dict, Iterator, List, Optional
+
+from bld_utils import is_windows
+from logging_util import init_logger
+
+log = init_logger(__name__, debug_mode=False)
+
+
+class SshSessionPool:
+    """
+    Keep one persistent OpenSSH master connection per server
+
+    The commands connect through the control socket of the server's master connection instead
+    of doing their own handshake, concurrent commands get their own channels on the same
+    connection. If the master is not available the commands connect directly, and the master
+    is started again the next time the server is used, or after retry_interval seconds if
+    starting it failed. The callers may limit their concurrent work per server with session().
+    """
+
+    def __init__(
+        self,
+        persist: int = 600,
+        enabled: bool = True,
+        control_dir: Optional[str] = None,
+        retry_interval: float = 60,
+        max_sessions: int = 8,
+    ) -> None:
+        self.persist = persist
+        self.max_sessions = max(1, max_sessions)
+        self.retry_interval = retry_interval
+        self.enabled = enabled and not is_windows()
+        self._control_dir = control_dir
+        self._masters: Dict[str, str] = {}
+        self._failed: Dict[str, float] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._sessions: Dict[str, threading.Semaphore] = {}
+        self._lock = threading.Lock()
+
+    def control_path(self, server: str) -> str:
+        """Return the control socket path for the server, kept short for the socket path limit"""
+        with self._lock:
+            if self._control_dir is None:
+                self._control_dir = mkdtemp(prefix="ssh-mux-")
+        name = hashlib.sha1(server.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self._control_dir, name)
+
+    def ssh_options(self, server: str) -> List[str]:
+        """Return the ssh options for using the master connection of the server, if any"""
+        if not self.enabled:
+            return []
+        self.connect(server)
+        return ["-o", "ControlMaster=no", "-o", f"ControlPath={self.control_path(server)}"]
+
+    def login_cmd(self, server: str) -> List[str]:
+        """Return the ssh command for running remote commands on the server"""
+        return ["ssh"] + self.ssh_options(server) + ["-t", "-t", server]
+
+    def rsync_shell(self, server: str) -> str:
+        """Return the remote shell for rsync's -e option when transferring to/from the server"""
+        return " ".join(shlex.quote(arg) for arg in ["ssh"] + self.ssh_options(server))
+
+    @staticmethod
+    def _master_alive(control_path: str) -> bool:
+        """Return whether a master connection is listening on the control socket"""
+        if not os.path.exists(control_path):
+            return False
+        with socket.socket(socket.AF_UNIX) as sock:
+            try:
+                sock.connect(control_path)
+                return True
+            except OSError:
+                os.remove(control_path)  # stale socket of a master that has died
+                return False
+
+    @contextmanager
+    def session(self, server: str) -> Iterator[None]:
+        """
+        Context manager holding one of the max_sessions slots of the server, blocks until free
+
+        Args:
+            server: The server used while holding the slot
+        """
+        with self._lock:
+            sessions = self._sessions.setdefault(server, threading.Semaphore(self.max_sessions))
+        with sessions:
+            yield
+
+    def _server_lock(self, server: str) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(server, threading.Lock())
+
+    def connect(self, server: str) -> None:
+        """
+        Start the master connection for the server unless it is already running
+
+        Failures are logged, the commands then connect to the server directly.
+
+        Args:
+            server: The server to connect to, e.g. user@host
+        """
+        if not self.enabled:
+            return
+        with self._server_lock(server):
+            control_path = self.control_path(server)
+            if self._master_alive(control_path):
+                return
+            if monotonic() - self._failed.get(server, -self.retry_interval) < self.retry_interval:
+                return
+            # the master goes to background after authentication, it must not inherit the
+            # output pipes or the caller would wait for it to exit
+            cmd = [
+                "ssh", "-o", "ControlMaster=yes", "-o", f"ControlPath={control_path}",
+                "-o", f"ControlPersist={self.persist}", "-o", "BatchMode=yes", "-N", "-f", server,
+            ]
+            try:
+                subprocess.run(
+                    cmd, stdin=DEVNULL, stdout=DEVNULL, stderr=DEVNULL, timeout=60, check=True
+                )
+                self._masters[server] = control_path
+                log.info("Started SSH master connection: %s", server)
+            except (OSError, subprocess.SubprocessError) as err:
+                self._failed[server] = monotonic()
+                log.warning("Unable to start SSH master connection to %s: %s", server, err)
+
+    def reset(self, server: str, command: str = "stop") -> None:
+        """
+        Stop the master connection of the server, e.g. after a connection failure
+
+        By default the master only stops accepting new sessions, so that the transfers of
+        other threads still using it can finish, and the next session starts a new master.
+
+        Args:
+            server: The server whose master connection to stop
+            command: The ssh control command, "exit" terminates also the running sessions
+        """
+        if not self.enabled:
+            return
+        with self._server_lock(server):
+            control_path = self.control_path(server)
+            cmd = ["ssh", "-o", f"ControlPath={control_path}", "-O", command, server]
+            subprocess.run(cmd, stdin=DEVNULL, stdout=DEVNULL, stderr=DEVNULL, check=False)
+            if os.path.lexists(control_path):
+                os.remove(control_path)
+            self._masters.pop(server, None)
+            self._failed.pop(server, None)
+
+    def close(self) -> None:
+        """Stop all the master connections and remove the control directory"""
+        for server in list(self._masters):
+            self.reset(server, "exit")
+        with self._lock:
+            if self._control_dir is not None:
+                shutil.rmtree(self._control_dir, ignore_errors=True)
+                self._control_dir = None
+
+
+_pool = SshSessionPool(
+    persist=int(os.getenv("PKG_SSH_CONTROL_PERSIST", "600")),
+    enabled=os.getenv("PKG_SSH_MULTIPLEX", "1") != "0",
+    max_sessions=int(os.getenv("PKG_SSH_MAX_SESSIONS", "8")),
+)
+
+
+def get_ssh_pool() -> SshSessionPool:
+    """Return the process-wide SshSessionPool instance"""
+    return _pool
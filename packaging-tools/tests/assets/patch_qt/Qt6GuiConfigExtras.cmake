@@ -0,0 +1,16 @@
+get_filename_component(_qt6Gui_install_prefix "${CMAKE_CURRENT_LIST_DIR}/../../../" ABSOLUTE)
+macro(_qt6gui_find_extra_libs Name Libs LibDir IncDirs)
+    set(Qt6Gui_${Name}_LIBRARIES)
+    foreach(_lib ${Libs})
+        string(REGEX REPLACE "[^_A-Za-z0-9]" "_" _cmake_lib_name ${_lib})
+        if (NOT TARGET Qt6::Gui_${_cmake_lib_name} AND NOT _Qt6Gui_${_cmake_lib_name}_LIBRARY_DONE)
+            find_library(Qt6Gui_${_cmake_lib_name}_LIBRARY ${_lib}
+                PATHS "${LibDir}"
+                NO_DEFAULT_PATH
+            )
+        endif()
+    endforeach()
+endmacro()
+_qt6gui_find_extra_libs(EGL "/usr/lib/x86_64-linux-gnu/libEGL.so" "" "/usr/include/libdrm")
+_qt6gui_find_extra_libs(OPENGL "/usr/lib/x86_64-linux-gnu/libGL.so" "" "/usr/include/libdrm")
+set(Qt6Gui_OPENGL_IMPLEMENTATION GL)
@@ -0,0 +1,25 @@
+QT_ARCH = x86_64
+QT_BUILDABI = x86_64-little_endian-lp64
+QT_LIBCPP_ABI_TAG = 
+QT.global.enabled_features = shared shared c++11 c++14 c++17 c++1z c++20 c++2a reduce_exports openssl-linked
+QT.global.disabled_features = cross_compile framework appstore-compliant debug_and_release simulator_and_device build_all force_asserts separate_debug_info static
+QT.global.disabled_features += release build_all
+QT_CONFIG += shared shared release c++11 c++14 c++17 c++1z c++20 c++2a concurrent dbus openssl-linked reduce_exports stl
+CONFIG += shared release
+QT_VERSION = 6.5.0
+QT_MAJOR_VERSION = 6
+QT_MINOR_VERSION = 5
+QT_PATCH_VERSION = 0
+QT_GCC_MAJOR_VERSION = 9
+QT_GCC_MINOR_VERSION = 4
+QT_GCC_PATCH_VERSION = 0
+QT_EDITION = OpenSource
+QMAKE_DEFAULT_INCDIRS = /usr/include/c++/9 /usr/include/x86_64-linux-gnu/c++/9 /usr/include/c++/9/backward /usr/lib/gcc/x86_64-linux-gnu/9/include /usr/local/include /usr/include/x86_64-linux-gnu /usr/include
+QMAKE_DEFAULT_LIBDIRS = /usr/lib/gcc/x86_64-linux-gnu/9 /usr/lib/x86_64-linux-gnu /usr/lib /lib/x86_64-linux-gnu /lib
+QMAKE_LIBS_ZLIB = /usr/lib/x86_64-linux-gnu/libz.so
+QMAKE_LIBS_LIBDL = /usr/lib/x86_64-linux-gnu/libdl.so
+QMAKE_LIBS_OPENSSL = /usr/local/openssl/lib/libssl.so /usr/local/openssl/lib/libcrypto.so
+QMAKE_LIBS_GTK3 = /lib64/libgtk-3.so /lib64/libgdk-3.so /lib64/libatk-1.0.so /lib64/libgio-2.0.so /lib64/libpangocairo-1.0.so /lib64/libgdk_pixbuf-2.0.so /lib64/libcairo-gobject.so /lib64/libpango-1.0.so /lib64/libcairo.so /lib64/libgobject-2.0.so /lib64/libglib-2.0.so
+QMAKE_INCDIR_OPENSSL = /usr/local/openssl/include
+QT_COORD_TYPE = double
+QT_TARGET_BUILDABI = x86_64-little_endian-lp64
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#############################################################################
+#
+# Copyright (C) 2023 The Qt Company Ltd.
+# Contact: https://www.qt.io/licensing/
+#
+# This file is part of the release tools of the Qt Toolkit.
+#
+# $QT_BEGIN_LICENSE:GPL-EXCEPT$
+# Commercial License Usage
+# Licensees holding valid commercial Qt licenses may use this file in
+# accordance with the commercial license agreement provided with the
+# Software or, alternatively, in accordance with the terms contained in
+# a written agreement between you and The Qt Company. For licensing terms
+# and conditions see https://www.qt.io/terms-conditions. For further
+# information use the contact form at https://www.qt.io/contact-us.
+#
+# GNU General Public License Usage
+# Alternatively, this file may be used under the terms of the GNU
+# General Public License version 3 as published by the Free Software
+# Foundation with exceptions as appearing in the file LICENSE.GPL3-EXCEPT
+# included in the packaging of this file. Please review the following
+# information to ensure the GNU General Public License requirements will
+# be met: https://www.gnu.org/licenses/gpl-3.0.html.
+#
+# $QT_END_LICENSE$
+#
+#############################################################################
+
+
+import os
+import unittest
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+from temppathlib import TemporaryDirectory
+
+from archive_reuse import ArchiveReuseStore, create_content_manifest
+from bldinstallercommon import clone_file
+
+
+def create_content(content_dir: Path) -> None:
+    content_dir.joinpath("bin").mkdir(parents=True)
+    content_dir.joinpath("bin", "tool").write_text("tool", encoding="utf-8")
+    content_dir.joinpath("lib").mkdir()
+    content_dir.joinpath("lib", "libfoo.so.1").write_text("lib", encoding="utf-8")
+    os.symlink("libfoo.so.1", content_dir / "lib" / "libfoo.so")
+
+
+class TestArchiveReuse(unittest.TestCase):
+
+    def test_manifest_identical_content(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            create_content(temp_dir.path / "a")
+            create_content(temp_dir.path / "b")
+            self.assertEqual(
+                create_content_manifest(temp_dir.path / "a"),
+                create_content_manifest(temp_dir.path / "b"),
+            )
+
+    def test_manifest_changed_content(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            create_content(temp_dir.path)
+            manifest = create_content_manifest(temp_dir.path)
+            temp_dir.path.joinpath("bin", "tool").write_text("tooL", encoding="utf-8")
+            self.assertNotEqual(manifest, create_content_manifest(temp_dir.path))
+
+    def test_manifest_changed_mode(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            create_content(temp_dir.path)
+            manifest = create_content_manifest(temp_dir.path)
+            temp_dir.path.joinpath("bin", "tool").chmod(0o755)
+            self.assertNotEqual(manifest, create_content_manifest(temp_dir.path))
+
+    def test_manifest_empty_dir(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            create_content(temp_dir.path)
+            manifest = create_content_manifest(temp_dir.path)
+            temp_dir.path.joinpath("empty").mkdir()
+            self.assertNotEqual(manifest, create_content_manifest(temp_dir.path))
+
+    def test_reuse(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            store = ArchiveReuseStore(temp_dir.path / "store")
+            create_content(temp_dir.path / "content")
+            manifest = store.create_manifest(temp_dir.path / "content", format="7z")
+            archive = temp_dir.path / "archive.7z"
+            archive.write_bytes(b"archive")
+            target = temp_dir.path / "out" / "archive.7z"
+            self.assertFalse(store.reuse("pkg", "archive.7z", manifest, target))
+            store.store("pkg", "archive.7z", manifest, archive)
+            self.assertTrue(store.reuse("pkg", "archive.7z", manifest, target))
+            self.assertEqual(target.read_bytes(), b"archive")
+            target.unlink()
+            self.assertFalse(store.reuse("other", "archive.7z", manifest, target))
+            changed = store.create_manifest(temp_dir.path / "content", format="zip")
+            self.assertFalse(store.reuse("pkg", "archive.7z", changed, target))
+            self.assertFalse(target.exists())
+
+    def test_store_changed_content(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            store = ArchiveReuseStore(temp_dir.path / "store")
+            first = store.create_manifest(temp_dir.path, format="7z")
+            second = store.create_manifest(temp_dir.path, format="zip")
+            temp_dir.path.joinpath("a.7z").write_bytes(b"first")
+            temp_dir.path.joinpath("b.7z").write_bytes(b"second")
+            store.store("pkg", "archive.7z", first, temp_dir.path / "a.7z")
+            store.store("pkg", "archive.7z", second, temp_dir.path / "b.7z")
+            # only the latest archive is kept
+            self.assertEqual(len(os.listdir(temp_dir.path / "store" / "pkg")), 1)
+            self.assertFalse(store.reuse("pkg", "archive.7z", first, temp_dir.path / "out"))
+            self.assertTrue(store.reuse("pkg", "archive.7z", second, temp_dir.path / "out"))
+            self.assertEqual(temp_dir.path.joinpath("out").read_bytes(), b"second")
+
+    def test_reuse_concurrent_store(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            store = ArchiveReuseStore(temp_dir.path / "store")
+            first = store.create_manifest(temp_dir.path, format="7z")
+            second = store.create_manifest(temp_dir.path, format="zip")
+            temp_dir.path.joinpath("a.7z").write_bytes(b"first")
+            temp_dir.path.joinpath("b.7z").write_bytes(b"second")
+            store.store("pkg", "archive.7z", first, temp_dir.path / "a.7z")
+
+            def _clone_after_store(source: Path, destination: Path, **kwargs: Any) -> None:
+                # another run stores the archive for different content before the clone
+                if destination == temp_dir.path / "out":
+                    store.store("pkg", "archive.7z", second, temp_dir.path / "b.7z")
+                clone_file(source, destination, **kwargs)
+
+            with patch("archive_reuse.clone_file", side_effect=_clone_after_store):
+                reused = store.reuse("pkg", "archive.7z", first, temp_dir.path / "out")
+            self.assertFalse(reused)
+            self.assertFalse(temp_dir.path.joinpath("out").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
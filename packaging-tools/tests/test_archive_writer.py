@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#############################################################################
+#
+# Copyright (C) 2023 The Qt Company Ltd.
+# Contact: https://www.qt.io/licensing/
+#
+# This file is part of the release tools of the Qt Toolkit.
+#
+# $QT_BEGIN_LICENSE:GPL-EXCEPT$
+# Commercial License Usage
+# Licensees holding valid commercial Qt licenses may use this file in
+# accordance with the commercial license agreement provided with the
+# Software or, alternatively, in accordance with the terms contained in
+# a written agreement between you and The Qt Company. For licensing terms
+# and conditions see https://www.qt.io/terms-conditions. For further
+# information use the contact form at https://www.qt.io/contact-us.
+#
+# GNU General Public License Usage
+# Alternatively, this file may be used under the terms of the GNU
+# General Public License version 3 as published by the Free Software
+# Foundation with exceptions as appearing in the file LICENSE.GPL3-EXCEPT
+# included in the packaging of this file. Please review the following
+# information to ensure the GNU General Public License requirements will
+# be met: https://www.gnu.org/licenses/gpl-3.0.html.
+#
+# $QT_END_LICENSE$
+#
+#############################################################################
+
+
+import gzip
+import os
+import tarfile
+import unittest
+from pathlib import Path
+from typing import Optional, Tuple
+from unittest.mock import MagicMock, patch
+
+from ddt import data, ddt  # type: ignore
+from temppathlib import TemporaryDirectory
+
+from archive_writer import (
+    ArchivegenWriter,
+    ArchiveWriter,
+    ArchiveWriterError,
+    TarArchiveWriter,
+    get_tar_compression,
+)
+
+
+def create_content(content_dir: Path) -> None:
+    content_dir.joinpath("bin").mkdir(parents=True)
+    content_dir.joinpath("bin", "tool").write_bytes(os.urandom(100000))
+    content_dir.joinpath("bin", "tool").chmod(0o755)
+    content_dir.joinpath("lib").mkdir()
+    content_dir.joinpath("lib", "libfoo.so.1").write_text("lib" * 10000, encoding="utf-8")
+    os.symlink("libfoo.so.1", content_dir / "lib" / "libfoo.so")
+    content_dir.joinpath("empty").mkdir()
+
+
+@ddt
+class TestArchiveWriter(unittest.TestCase):
+
+    @data("test.tar", "test.tar.gz", "test.tgz", "test.tar.bz2", "test.tar.xz")  # type: ignore
+    def test_tar_archive_writer(self, archive_name: str) -> None:
+        with TemporaryDirectory() as temp_dir:
+            create_content(temp_dir.path / "content")
+            archive = temp_dir.path / archive_name
+            # use a small chunk size to produce multiple concatenated streams
+            writer = TarArchiveWriter(threads=4, level=1, chunk_size=16384)
+            writer.write(archive, temp_dir.path / "content")
+            with tarfile.open(archive) as tar:
+                tar.extractall(temp_dir.path / "out")
+            out = temp_dir.path / "out"
+            self.assertEqual(
+                out.joinpath("bin", "tool").read_bytes(),
+                temp_dir.path.joinpath("content", "bin", "tool").read_bytes(),
+            )
+            self.assertEqual(out.joinpath("bin", "tool").stat().st_mode & 0o777, 0o755)
+            self.assertEqual(os.readlink(out / "lib" / "libfoo.so"), "libfoo.so.1")
+            self.assertTrue(out.joinpath("empty").is_dir())
+
+    def test_tar_archive_writer_multiple_members(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            create_content(temp_dir.path / "content")
+            archive = temp_dir.path / "test.tar.gz"
+            TarArchiveWriter(threads=2, chunk_size=16384).write(archive, temp_dir.path / "content")
+            with open(archive, "rb") as handle:
+                self.assertGreater(handle.read().count(b"\x1f\x8b\x08"), 1)
+            self.assertIsNotNone(gzip.decompress(archive.read_bytes()))
+
+    def test_tar_archive_writer_unsupported(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            writer = TarArchiveWriter(threads=1)
+            self.assertFalse(writer.supports("test.7z"))
+            with self.assertRaises(ArchiveWriterError):
+                writer.write(temp_dir.path / "test.7z", temp_dir.path)
+            self.assertFalse(temp_dir.path.joinpath("test.7z").exists())
+
+    @data(  # type: ignore
+        ("test.tar.xz", "xz"), ("test.tgz", "gz"), ("test.tar", ""), ("test.7z", None)
+    )
+    def test_get_tar_compression(self, test_data: Tuple[str, Optional[str]]) -> None:
+        self.assertEqual(get_tar_compression(test_data[0]), test_data[1])
+
+    @patch("archive_writer.run_cmd")
+    def test_archivegen_writer(self, mock_run_cmd: MagicMock) -> None:
+        with TemporaryDirectory() as temp_dir:
+            temp_dir.path.joinpath("content", "bin").mkdir(parents=True)
+            writer = ArchiveWriter.get_writer("archivegen", archivegen_tool="archivegen")
+            self.assertIsInstance(writer, ArchivegenWriter)
+            self.assertTrue(writer.supports("test.7z"))
+            writer.write(temp_dir.path / "test.7z", temp_dir.path / "content")
+            mock_run_cmd.assert_called_once_with(
+                [
+                    "archivegen",
+                    "-f",
+                    "7z",
+                    str(temp_dir.path / "test.7z"),
+                    str(temp_dir.path / "content" / "bin"),
+                ],
+                temp_dir.path,
+            )
+
+    def test_get_writer_invalid(self) -> None:
+        with self.assertRaises(ArchiveWriterError):
+            ArchiveWriter.get_writer("invalid")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#############################################################################
+#
+# Copyright (C) 2023 The Qt Company Ltd.
+# Contact: https://www.qt.io/licensing/
+#
+# This file is part of the release tools of the Qt Toolkit.
+#
+# $QT_BEGIN_LICENSE:GPL-EXCEPT$
+# Commercial License Usage
+# Licensees holding valid commercial Qt licenses may use this file in
+# accordance with the commercial license agreement provided with the
+# Software or, alternatively, in accordance with the terms contained in
+# a written agreement between you and The Qt Company. For licensing terms
+# and conditions see https://www.qt.io/terms-conditions. For further
+# information use the contact form at https://www.qt.io/contact-us.
+#
+# GNU General Public License Usage
+# Alternatively, this file may be used under the terms of the GNU
+# General Public License version 3 as published by the Free Software
+# Foundation with exceptions as appearing in the file LICENSE.GPL3-EXCEPT
+# included in the packaging of this file. Please review the following
+# information to ensure the GNU General Public License requirements will
+# be met: https://www.gnu.org/licenses/gpl-3.0.html.
+#
+# $QT_END_LICENSE$
+#
+#############################################################################
+
+
+import os
+import unittest
+from pathlib import Path
+from typing import Any, List
+from unittest.mock import patch
+
+from temppathlib import TemporaryDirectory
+
+from artifact_cache import ArtifactCache, ArtifactCacheError, ArtifactValidators, file_sha1
+
+
+class FakeServer:
+    """Serve artifact content from a dict and count the downloads"""
+
+    def __init__(self) -> None:
+        self.content = {"http://foo.bar/a.7z": b"a" * 10, "http://foo.bar/b.7z": b"b" * 10}
+        self.etags = {"http://foo.bar/a.7z": "1", "http://foo.bar/b.7z": "1"}
+        self.downloads: List[str] = []
+
+    def download(self, url: str, target: str) -> None:
+        self.downloads.append(url)
+        Path(target).write_bytes(self.content[url])
+
+    def get_validators(self, url: str) -> ArtifactValidators:
+        return ArtifactValidators(etag=self.etags[url], content_length=len(self.content[url]))
+
+
+class TestArtifactCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = FakeServer()
+        patchers: List[Any] = [
+            patch("artifact_cache.download", side_effect=self.server.download),
+            patch.object(ArtifactCache, "get_validators", side_effect=self.server.get_validators),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_fetch_cache_hit(self) -> None:
+        with TemporaryDirectory() as tmp_dir:
+            cache = ArtifactCache(tmp_dir.path / "cache", max_size=1024)
+            cache.fetch("http://foo.bar/a.7z", tmp_dir.path / "1" / "a.7z")
+            cache.fetch("http://foo.bar/a.7z", tmp_dir.path / "2" / "a.7z", allow_hardlink=True)
+            self.assertEqual(self.server.downloads, ["http://foo.bar/a.7z"])
+            self.assertEqual((tmp_dir.path / "2" / "a.7z").read_bytes(), b"a" * 10)
+
+    def test_fetch_changed_artifact(self) -> None:
+        with TemporaryDirectory() as tmp_dir:
+            cache = ArtifactCache(tmp_dir.path / "cache", max_size=1024)
+            cache.fetch("http://foo.bar/a.7z", tmp_dir.path / "1" / "a.7z")
+            self.server.etags["http://foo.bar/a.7z"] = "2"
+            self.server.content["http://foo.bar/a.7z"] = b"c" * 10
+            cache.fetch("http://foo.bar/a.7z", tmp_dir.path / "2" / "a.7z")
+            self.assertEqual(len(self.server.downloads), 2)
+            self.assertEqual((tmp_dir.path / "2" / "a.7z").read_bytes(), b"c" * 10)
+
+    def test_fetch_evicts_least_recently_used(self) -> None:
+        with TemporaryDirectory() as tmp_dir:
+            cache = ArtifactCache(tmp_dir.path / "cache", max_size=15)
+            cache.fetch("http://foo.bar/a.7z", tmp_dir.path / "1" / "a.7z")
+            cache.fetch("http://foo.bar/b.7z", tmp_dir.path / "1" / "b.7z")
+            self.assertEqual(cache.size(), 10)
+            cache.fetch("http://foo.bar/b.7z", tmp_dir.path / "2" / "b.7z")
+            cache.fetch("http://foo.bar/a.7z", tmp_dir.path / "2" / "a.7z")
+            self.assertEqual(len(self.server.downloads), 3)
+
+    def test_fetch_local_file_not_cached(self) -> None:
+        with TemporaryDirectory() as tmp_dir:
+            cache = ArtifactCache(tmp_dir.path / "cache", max_size=1024)
+            with patch("artifact_cache.download") as download_mock:
+                cache.fetch("/foo/bar/a.7z", tmp_dir.path / "a.7z")
+                download_mock.assert_called_once_with("/foo/bar/a.7z", str(tmp_dir.path / "a.7z"))
+            self.assertEqual(cache.size(), 0)
+
+    def test_fetch_sha1_mismatch(self) -> None:
+        with TemporaryDirectory() as tmp_dir:
+            cache = ArtifactCache(tmp_dir.path / "cache", max_size=1024)
+            with self.assertRaises(ArtifactCacheError):
+                cache.fetch("http://foo.bar/a.7z", tmp_dir.path / "a.7z", sha1="0" * 40)
+            self.assertFalse((tmp_dir.path / "a.7z").exists())
+            self.assertEqual(cache.size(), 0)
+
+    def test_fetch_sha1_match(self) -> None:
+        with TemporaryDirectory() as tmp_dir:
+            source = tmp_dir.path / "source"
+            source.write_bytes(self.server.content["http://foo.bar/a.7z"])
+            cache = ArtifactCache(tmp_dir.path / "cache", max_size=1024)
+            cache.fetch("http://foo.bar/a.7z", tmp_dir.path / "a.7z", sha1=file_sha1(source))
+            self.assertTrue(os.path.isfile(tmp_dir.path / "a.7z"))
+
+    def test_fetch_existing_target(self) -> None:
+        with TemporaryDirectory() as tmp_dir:
+            cache = ArtifactCache(tmp_dir.path / "cache", max_size=1024)
+            (tmp_dir.path / "a.7z").touch()
+            with self.assertRaises(ArtifactCacheError):
+                cache.fetch("http://foo.bar/a.7z", tmp_dir.path / "a.7z")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -29,27 +29,44 @@
 #
 #############################################################################
 
+import errno
 import os
 import shutil
+import tarfile
+import threading
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Callable, List, Optional, Tuple
+from types import SimpleNamespace
+from typing import Any, Callable, List, Optional, Tuple
+from unittest.mock import patch
 
 from ddt import data, ddt, unpack  # type: ignore
 from temppathlib import TemporaryDirectory
 
 from bld_utils import is_linux, is_windows
 from bldinstallercommon import (
+    _REMOVER,
     calculate_relpath,
     calculate_runpath,
+    compile_replacements,
+    copy_tree,
+    handle_component_rpath,
     locate_executable,
     locate_path,
     locate_paths,
+    move_across_devices,
+    move_tree,
     read_file_rpath,
+    remove_tree,
     replace_in_files,
+    replace_tags_in_files,
     search_for_files,
+    stream_extract_file,
     strip_dirs,
     update_file_rpath,
+    wait_for_free_space,
+    wait_for_removals,
 )
 from installer_utils import PackagingError
 
@@ -94,6 +111,66 @@ class TestCommon(unittest.TestCase):
                 # check that file contents match
                 self.assertEqual(file_contents, expected_file_content)
 
+    @data(  # type: ignore
+        (
+            "%TAG_VERSION%%TAG_EDITION%",
+            [("%TAG_VERSION%", "6.3.0"), ("%TAG_EDITION%", "opensource"), ("foo", "bar")],
+            "6.3.0opensource",
+        ),
+        (
+            "QT_VERSION=%TAG_VERSION%\n%TAG_EDITION%=QT_EDITION",
+            [("%TAG_VERSION%", "6.3.0"), ("%TAG_EDITION%", "opensource")],
+            "QT_VERSION=6.3.0\nopensource=QT_EDITION",
+        ),
+        (
+            "%foo%",
+            [("%foo%", "%bar%"), ("%bar%", "foo"), ("", "bar"), ("barfbarobarobar", "foo")],
+            "foo",
+        ),
+        (
+            "%=%foo%foo%foo%foo%%\n",
+            [("%foo%", "%foo"), ("%foo%", "foo%"), ("%%", "foo%")],
+            "%=%foofoo%foofoofoo%\n",
+        ),
+        ("%foo\nbar%foo", [("%foobar%", "foobar"), ("%foo%", "")], "%foo\nbar%foo"),
+        (
+            "%A%_B%-%B%/%B%_C%",
+            [("%B%", "b"), ("%A%_B%", "ab"), ("%B%_C%", "bc"), ("%.%", "x")],
+            "ab-b/b_C%",
+        ),
+        ("%A%B%\n%A%", [("%B%", "b"), ("%A%", "a")], "%Ab\na"),
+        ("_BA%A%", [("A", ""), ("_B%", "")], "%"),
+        ("foo-1.0-bar", [(r"\d\.\d", "2.0"), ("foo", "%bar%"), ("%bar%", "baz")], "baz-2.0-bar"),
+        ("%PATH%", [("%PATH%", r"C:\\Qt"), ("%QT%", "Qt")], r"C:\Qt"),
+    )
+    def test_replace_tags_in_files(self, test_data: Tuple[str, List[Tuple[str, str]], str]) -> None:
+        file_contents, replacements, expected_file_content = test_data
+        with TemporaryDirectory() as tmp_base_dir:
+            tmp_file = tmp_base_dir.path / "test"
+            tmp_file.write_text(file_contents, encoding="utf-8")
+            replace_tags_in_files([str(tmp_file)], replacements)
+            self.assertEqual(tmp_file.read_text(encoding="utf-8"), expected_file_content)
+            # applying the replacements one by one gives the same result
+            tmp_file.write_text(file_contents, encoding="utf-8")
+            for key, value in replacements:
+                replace_in_files([str(tmp_file)], key, value)
+            self.assertEqual(tmp_file.read_text(encoding="utf-8"), expected_file_content)
+
+    def test_compile_replacements(self) -> None:
+        replacements = [("%A%", "a"), ("%B%", "b"), ("%C%", "%D%"), ("%D%", "d"), ("x.y", "z")]
+        self.assertEqual(len(compile_replacements(replacements)), 3)
+
+    def test_replace_tags_in_files_unchanged(self) -> None:
+        with TemporaryDirectory() as tmp_base_dir:
+            tmp_file = tmp_base_dir.path / "test"
+            tmp_file.write_text("%TAG%", encoding="utf-8")
+            os.utime(tmp_file, (0, 0))
+            replace_tags_in_files([str(tmp_file)], [("%FOO%", "foo"), ("%BAR%", "bar")])
+            self.assertEqual(tmp_file.stat().st_mtime, 0)
+            replace_tags_in_files([str(tmp_file)], [("%FOO%", "foo"), ("%TAG%", "tag")])
+            self.assertEqual(tmp_file.read_text(encoding="utf-8"), "tag")
+            self.assertNotEqual(tmp_file.stat().st_mtime, 0)
+
     def test_replace_in_files_invalid_path(self) -> None:
         with TemporaryDirectory() as tmp_base_dir:
             # invalid file path should raise FileNotFoundError
@@ -264,7 +341,6 @@ class TestCommon(unittest.TestCase):
     )
     @unpack  # type: ignore
     @unittest.skipUnless(is_linux(), reason="Skip RPATH/RUNPATH tests on non-Linux")
-    @unittest.skipIf(shutil.which("chrpath") is None, reason="Skip tests requiring 'chrpath' tool")
     def test_read_file_rpath(self, test_file: str, expected: Optional[str]) -> None:
         test_asset_path = Path(__file__).parent / "assets" / "runpath"
         found_rpath = read_file_rpath(test_asset_path / test_file)
@@ -279,7 +355,6 @@ class TestCommon(unittest.TestCase):
     )
     @unpack  # type: ignore
     @unittest.skipUnless(is_linux(), reason="Skip RPATH/RUNPATH tests on non-Linux")
-    @unittest.skipIf(shutil.which("chrpath") is None, reason="Skip tests requiring 'chrpath' tool")
     def test_update_file_rpath(self, test_file: str, target_paths: str, expected: str) -> None:
         test_asset_path = Path(__file__).parent / "assets" / "runpath"
         with TemporaryDirectory() as temp_dir:
@@ -292,7 +367,6 @@ class TestCommon(unittest.TestCase):
             self.assertEqual(result_rpath, expected)
 
     @unittest.skipUnless(is_linux(), reason="Skip RPATH/RUNPATH tests on non-Linux")
-    @unittest.skipIf(shutil.which("chrpath") is None, reason="Skip tests requiring 'chrpath' tool")
     def test_update_file_rpath_too_large(self) -> None:
         test_asset_path = Path(__file__).parent / "assets" / "runpath"
         with TemporaryDirectory() as temp_dir:
@@ -307,6 +381,27 @@ class TestCommon(unittest.TestCase):
                 # Last line in info logging output should contain the error message from process
                 self.assertTrue("too large; maximum length" in logs.output.pop())
 
+    @unittest.skipUnless(is_linux(), reason="Skip RPATH/RUNPATH tests on non-Linux")
+    def test_handle_component_rpath(self) -> None:
+        test_asset_path = Path(__file__).parent / "assets" / "runpath"
+        with TemporaryDirectory() as temp_dir:
+            temp_path = temp_dir.path
+            (temp_path / "lib").mkdir()
+            (temp_path / "bin").mkdir()
+            for test_bin in ("testbin_no_rpath", "testbin_exist_rpath", "testbin_origin_rpath"):
+                shutil.copy(test_asset_path / test_bin, temp_path / "bin")
+                (temp_path / "bin" / test_bin).chmod(0o755)
+            report = handle_component_rpath(temp_path, "lib", max_workers=2)
+            self.assertEqual(
+                report,
+                {
+                    temp_path / "bin" / "testbin_exist_rpath": ("/home/qt/lib", "$ORIGIN/../lib"),
+                    temp_path / "bin" / "testbin_origin_rpath": (
+                        "$ORIGIN", "$ORIGIN/../lib:$ORIGIN"
+                    ),
+                },
+            )
+
     def test_strip_dirs(self) -> None:
         with TemporaryDirectory() as temp_dir:
             temp_dir.path.joinpath("remove_dir", "sub_dir").mkdir(parents=True, exist_ok=True)
@@ -336,6 +431,17 @@ class TestCommon(unittest.TestCase):
             self.assertTrue(temp_dir.path.joinpath("dir_name").exists())
             self.assertFalse(temp_dir.path.joinpath("dir_name", "dir_name").exists())
 
+    def test_strip_dirs_renames_only(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            temp_dir.path.joinpath("remove_dir", "sub_dir").mkdir(parents=True)
+            temp_dir.path.joinpath("remove_dir", "file").write_text("foo", encoding="utf-8")
+            with patch("shutil.move") as move:
+                strip_dirs(temp_dir.path)
+                move.assert_not_called()
+            self.assertCountEqual(
+                [item.name for item in temp_dir.path.iterdir()], ["sub_dir", "file"]
+            )
+
     def test_strip_dirs_invalid_subdir_count(self) -> None:
         with TemporaryDirectory() as temp_dir:
             with self.assertRaises(IOError):
@@ -349,6 +455,225 @@ class TestCommon(unittest.TestCase):
                 temp_dir.path.joinpath("remove_dir").touch(exist_ok=True)
                 strip_dirs(temp_dir.path)
 
+    def create_move_tree_content(self, path: Path) -> None:
+        path.joinpath("a", "b").mkdir(parents=True)
+        path.joinpath("a", "b", "file.txt").write_text("foo", encoding="utf-8")
+        path.joinpath("a", "file.bin").write_text("bar", encoding="utf-8")
+        path.joinpath("c").mkdir()
+        os.symlink("a", path / "link")
+
+    def test_move_tree(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            self.create_move_tree_content(temp_dir.path / "src")
+            (temp_dir.path / "dst" / "c").mkdir(parents=True)
+            (temp_dir.path / "dst" / "c" / "existing").touch()
+            move_tree(str(temp_dir.path / "src"), str(temp_dir.path / "dst"))
+            dst = temp_dir.path / "dst"
+            self.assertEqual((dst / "a" / "b" / "file.txt").read_text(encoding="utf-8"), "foo")
+            self.assertTrue((dst / "c" / "existing").exists())
+            self.assertEqual(os.readlink(dst / "link"), "a")
+            self.assertEqual(os.listdir(temp_dir.path / "src"), ["c"])
+
+    def test_move_tree_pattern(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            self.create_move_tree_content(temp_dir.path / "src")
+            (temp_dir.path / "src" / "file.txt").touch()
+            (temp_dir.path / "src" / "file.bin").touch()
+            (temp_dir.path / "dst" / "c").mkdir(parents=True)
+            move_tree(str(temp_dir.path / "src"), str(temp_dir.path / "dst"), "*.txt")
+            dst = temp_dir.path / "dst"
+            self.assertTrue((dst / "file.txt").exists())
+            self.assertFalse((dst / "file.bin").exists())
+            # the subdirectories are moved with all their content
+            self.assertTrue((dst / "a" / "b" / "file.txt").exists())
+            self.assertTrue((dst / "a" / "file.bin").exists())
+            self.assertEqual(sorted(os.listdir(temp_dir.path / "src")), ["c", "file.bin", "link"])
+
+    def test_move_tree_across_devices(self) -> None:
+        rename = os.rename
+
+        def cross_device_rename(src: Any, dst: Any) -> None:
+            if os.path.isdir(src):
+                raise OSError(errno.EXDEV, "Invalid cross-device link")
+            rename(src, dst)
+
+        with TemporaryDirectory() as temp_dir:
+            self.create_move_tree_content(temp_dir.path / "src")
+            (temp_dir.path / "dst").mkdir()
+            with patch("os.rename", side_effect=cross_device_rename):
+                move_tree(str(temp_dir.path / "src"), str(temp_dir.path / "dst"))
+            dst = temp_dir.path / "dst"
+            self.assertEqual((dst / "a" / "b" / "file.txt").read_text(encoding="utf-8"), "foo")
+            self.assertEqual((dst / "a" / "file.bin").read_text(encoding="utf-8"), "bar")
+            self.assertTrue((dst / "c").is_dir())
+            self.assertFalse((temp_dir.path / "src" / "a").exists())
+
+    def test_move_across_devices(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            self.create_move_tree_content(temp_dir.path / "src")
+            os.symlink("b", temp_dir.path / "src" / "a" / "dir_link")
+            move_across_devices(str(temp_dir.path / "src"), str(temp_dir.path / "dst"), 2)
+            dst = temp_dir.path / "dst"
+            self.assertFalse((temp_dir.path / "src").exists())
+            self.assertEqual((dst / "a" / "b" / "file.txt").read_text(encoding="utf-8"), "foo")
+            self.assertEqual(os.readlink(dst / "a" / "dir_link"), "b")
+            self.assertEqual(os.readlink(dst / "link"), "a")
+            self.assertTrue((dst / "c").is_dir())
+
+    @unittest.skipIf(is_windows(), "Windows not supported for this test")
+    def test_copy_tree(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            self.create_move_tree_content(temp_dir.path / "src")
+            os.symlink("b", temp_dir.path / "src" / "a" / "dir_link")
+            dst = temp_dir.path / "dst"
+            dst.joinpath("a", "b").mkdir(parents=True)
+            dst.joinpath("a", "b", "file.txt").write_text("old", encoding="utf-8")
+            dst.joinpath("existing.txt").write_text("keep", encoding="utf-8")
+            copy_tree(str(temp_dir.path / "src"), str(dst), max_workers=2)
+            self.assertEqual((dst / "a" / "b" / "file.txt").read_text(encoding="utf-8"), "foo")
+            self.assertEqual((dst / "existing.txt").read_text(encoding="utf-8"), "keep")
+            self.assertEqual(os.readlink(dst / "a" / "dir_link"), "b")
+            self.assertEqual(os.readlink(dst / "link"), "a")
+            self.assertTrue((dst / "c").is_dir())
+            src_file = temp_dir.path / "src" / "a" / "b" / "file.txt"
+            self.assertEqual(src_file.read_text(encoding="utf-8"), "foo")
+            self.assertNotEqual(src_file.stat().st_ino, (dst / "a" / "b" / "file.txt").stat().st_ino)
+
+    @unittest.skipIf(is_windows(), "Windows not supported for this test")
+    def test_copy_tree_byte_copy_fallback(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            self.create_move_tree_content(temp_dir.path / "src")
+            with patch("bldinstallercommon._reflink", return_value=False), patch(
+                "bldinstallercommon._copy_file_range", return_value=False
+            ):
+                copy_tree(str(temp_dir.path / "src"), str(temp_dir.path / "dst"))
+            result = temp_dir.path / "dst" / "a" / "b" / "file.txt"
+            self.assertEqual(result.read_text(encoding="utf-8"), "foo")
+
+    @data(False, True)  # type: ignore
+    @unittest.skipIf(is_windows(), "Windows not supported for this test")
+    def test_remove_tree(self, background: bool) -> None:
+        with TemporaryDirectory() as temp_dir:
+            self.create_move_tree_content(temp_dir.path / "work")
+            (temp_dir.path / "outside").mkdir()
+            (temp_dir.path / "outside" / "file.txt").write_text("keep", encoding="utf-8")
+            os.symlink(temp_dir.path / "outside", temp_dir.path / "work" / "a" / "outside_link")
+            self.assertTrue(remove_tree(str(temp_dir.path / "work"), background=background))
+            wait_for_removals()
+            self.assertEqual(sorted(os.listdir(temp_dir.path)), ["outside"])
+            self.assertTrue((temp_dir.path / "outside" / "file.txt").is_file())
+
+    @unittest.skipIf(is_windows(), "Windows not supported for this test")
+    def test_remove_tree_nested_background(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            self.create_move_tree_content(temp_dir.path / "work")
+            release = threading.Event()
+            # keep the nested removal pending until the parent is being removed
+            _REMOVER.submit(release.wait)
+            threading.Timer(0.2, release.set).start()
+            with patch("bldinstallercommon.log.warning") as warning:
+                remove_tree(str(temp_dir.path / "work" / "a"), background=True)
+                remove_tree(str(temp_dir.path / "work"), background=True)
+                wait_for_removals()
+            warning.assert_not_called()
+            self.assertEqual(os.listdir(temp_dir.path), [])
+
+    @unittest.skipIf(is_windows(), "Windows not supported for this test")
+    def test_wait_for_removals_concurrent(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            self.create_move_tree_content(temp_dir.path / "first" / "work")
+            (temp_dir.path / "second").mkdir()
+            release = threading.Event()
+            self.addCleanup(release.set)
+            _REMOVER.submit(release.wait)
+            remove_tree(str(temp_dir.path / "first" / "work"), background=True)
+            # the removals of other directories are not waited for
+            wait_for_removals(str(temp_dir.path / "second"))
+            self.assertEqual(len(os.listdir(temp_dir.path / "first")), 1)
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                waiters = [pool.submit(wait_for_removals) for _ in range(4)]
+                release.set()
+                for waiter in waiters:
+                    waiter.result(timeout=30)
+            self.assertEqual(os.listdir(temp_dir.path / "first"), [])
+
+    @unittest.skipIf(is_windows(), "Windows not supported for this test")
+    def test_remove_tree_symlink(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            self.create_move_tree_content(temp_dir.path / "work")
+            self.assertTrue(remove_tree(str(temp_dir.path / "work" / "link")))
+            self.assertTrue((temp_dir.path / "work" / "a" / "b" / "file.txt").is_file())
+
+    @unittest.skipIf(is_windows(), "Windows not supported for this test")
+    def test_wait_for_free_space(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            self.create_move_tree_content(temp_dir.path / "work")
+
+            def _disk_usage(_: str) -> Any:
+                trash = [name for name in os.listdir(temp_dir.path) if name.startswith(".trash-")]
+                return SimpleNamespace(free=0 if trash else 100)
+
+            with patch("bldinstallercommon.shutil.disk_usage", side_effect=_disk_usage):
+                remove_tree(str(temp_dir.path / "work"), background=True)
+                self.assertTrue(wait_for_free_space(str(temp_dir.path), 50, poll_interval=0.01))
+                self.assertEqual(os.listdir(temp_dir.path), [])
+
+    def test_wait_for_free_space_nothing_pending(self) -> None:
+        wait_for_removals()
+        with TemporaryDirectory() as temp_dir:
+            self.assertFalse(wait_for_free_space(str(temp_dir.path), 2**62))
+
+    @data(".tar", ".tar.gz", ".tar.xz", ".tar.bz2")  # type: ignore
+    @unittest.skipIf(shutil.which("tar") is None, reason="Skip tests requiring 'tar' tool")
+    def test_stream_extract_file(self, suffix: str) -> None:
+        with TemporaryDirectory() as temp_dir:
+            source = temp_dir.path / "source"
+            source.joinpath("sub").mkdir(parents=True)
+            source.joinpath("sub", "file.txt").write_text("content", encoding="utf-8")
+            archive = temp_dir.path / f"archive{suffix}"
+            mode = "w" if suffix == ".tar" else f"w:{suffix.rsplit('.', 1)[-1]}"
+            with tarfile.open(archive, mode) as tar:  # type: ignore
+                tar.add(source / "sub", arcname="sub")
+            stream_extract_file(archive.as_uri(), str(temp_dir.path / "out"), block_size=16)
+            result = temp_dir.path / "out" / "sub" / "file.txt"
+            self.assertEqual(result.read_text(encoding="utf-8"), "content")
+
+    @unittest.skipIf(shutil.which("tar") is None, reason="Skip tests requiring 'tar' tool")
+    def test_stream_extract_file_invalid(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            archive = temp_dir.path / "archive.tar.gz"
+            archive.write_bytes(b"not an archive")
+            with self.assertRaises(PackagingError):
+                stream_extract_file(archive.as_uri(), str(temp_dir.path / "out"))
+            with self.assertRaises(PackagingError):
+                stream_extract_file((temp_dir.path / "archive.7z").as_uri(), str(temp_dir.path))
+
+    @unittest.skipIf(shutil.which("tar") is None, reason="Skip tests requiring 'tar' tool")
+    def test_stream_extract_file_truncated(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            source = temp_dir.path / "source"
+            source.mkdir()
+            source.joinpath("first.txt").write_text("first", encoding="utf-8")
+            source.joinpath("second.bin").write_bytes(os.urandom(1024 * 1024))
+            archive = temp_dir.path / "archive.tar"
+            with tarfile.open(archive, "w") as tar:
+                tar.add(source / "first.txt", arcname="first.txt")
+                tar.add(source / "second.bin", arcname="second.bin")
+            content = archive.read_bytes()
+            archive.write_bytes(content[:512 * 1024])
+            out_dir = temp_dir.path / "out"
+            out_dir.mkdir()
+            out_dir.joinpath("existing.txt").write_text("existing", encoding="utf-8")
+            with self.assertRaises(PackagingError):
+                stream_extract_file(archive.as_uri(), str(out_dir))
+            # the entries extracted before the failure are not left in the target directory
+            self.assertEqual(os.listdir(out_dir), ["existing.txt"])
+            self.assertEqual(sorted(os.listdir(temp_dir.path)), ["archive.tar", "out", "source"])
+            # the extracted content is merged with the existing content
+            archive.write_bytes(content)
+            stream_extract_file(archive.as_uri(), str(out_dir))
+            self.assertEqual(sorted(os.listdir(out_dir)), ["existing.txt", "first.txt", "second.bin"])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -38,7 +38,12 @@ from typing import List
 from ddt import data, ddt, unpack  # type: ignore
 from temppathlib import TemporaryDirectory
 
-from content_cleaner import preserve_content, remove_content, remove_empty_directories
+from content_cleaner import (
+    ContentMatcher,
+    preserve_content,
+    remove_content,
+    remove_empty_directories,
+)
 
 
 @ddt
@@ -161,6 +166,48 @@ class TestContentCleaner(unittest.TestCase):
         except FileNotFoundError:
             pass
 
+    @data(  # type: ignore
+        ("bin/tool", ["tool"], True),
+        ("bin/tool.exe", ["tool"], False),
+        ("lib/libfoo.so.1", ["lib/*.so*"], True),
+        ("foo/lib/libfoo.so.1", ["lib/*.so*"], True),
+        ("lib/sub/libfoo.so.1", ["lib/*.so*"], False),
+        ("lib/sub/libfoo.so.1", ["lib/**"], True),
+        ("a/b/c/d.txt", ["a/**/d.txt"], True),
+        ("a/d.txt", ["a/**/d.txt"], True),
+        ("b/d.txt", ["a/**/d.txt"], False),
+        ("bin/a1", ["bin/[!a]?"], False),
+        ("bin/b1", ["bin/[!a]?"], True),
+        ("bin/a.b", ["bin/a?b", "foo"], True),
+        ("bin/a+b", ["bin/a.b"], False),
+        ("lib/cmake", ["cmake/"], False),
+        ("lib/cmake", ["lib/cm*/"], False),
+        ("lib/cmake", ["cmake"], True),
+    )
+    @unpack  # type: ignore
+    def test_content_matcher(self, path: str, rules: List[str], expected: bool) -> None:
+        self.assertEqual(ContentMatcher(rules).matches(path), expected)
+
+    @data(  # type: ignore
+        ("lib/cmake", ["cmake/"], True),
+        ("lib/cmake", ["lib/cm*/"], True),
+        ("lib/cmake", ["cmake"], True),
+        ("lib/cmake", ["foo/"], False),
+    )
+    @unpack  # type: ignore
+    def test_content_matcher_dir(self, path: str, rules: List[str], expected: bool) -> None:
+        self.assertEqual(ContentMatcher(rules).matches(path, is_dir=True), expected)
+
+    def test_remove_content_parallel(self) -> None:
+        with TemporaryDirectory() as tmp_base_dir:
+            test_content = [f"dir{i}/file{j}.{ext}" for i in range(5) for j in range(5) for ext in ("a", "b")]
+            self.generate_test_content(str(tmp_base_dir.path), test_content)
+            remove_content(str(tmp_base_dir.path), ["*.a", "dir4/**"], max_workers=4)
+            for path in test_content:
+                expected = path.endswith(".b") and not path.startswith("dir4")
+                self.assertEqual((tmp_base_dir.path / path).exists(), expected)
+            self.assertFalse((tmp_base_dir.path / "dir4").exists())
+
     @data(  # type: ignore
         (["test/path/test-file", "test/path/.test-file"], False),
         (["test/path/to/remove/", "test/.path/to/remove/"], True),
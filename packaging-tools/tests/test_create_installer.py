@@ -29,13 +29,16 @@
 #
 #############################################################################
 
+import os
 import unittest
+from pathlib import Path
 from typing import Optional, Tuple
+from unittest.mock import patch
 
 from ddt import data, ddt  # type: ignore
 from temppathlib import TemporaryDirectory
 
-from create_installer import CreateInstallerError, read_component_sha
+from create_installer import CreateInstallerError, QtInstallerTask, read_component_sha
 from sdkcomponent import IfwSdkComponent
 
 
@@ -74,6 +77,60 @@ class TestCommon(unittest.TestCase):
             with self.assertRaises(CreateInstallerError):
                 read_component_sha(sdk_comp, tmpdir.path / "invalid")
 
+    def test_installer_task_work_dirs(self) -> None:
+        with TemporaryDirectory() as tmpdir:
+            for name in ("a", "b"):
+                tmpdir.path.joinpath(f"{name}.cfg").write_text(
+                    "[PackageNamespace]\nname: qt\n"
+                    f"[PlatformIdentifier]\nidentifier: {name}\n"
+                    "[PackageTemplates]\ntemplate_dirs: templates\n",
+                    encoding="utf-8",
+                )
+            tasks = [
+                QtInstallerTask(  # type: ignore
+                    configurations_dir=str(tmpdir.path),
+                    configuration_file=str(tmpdir.path / f"{name}.cfg"),
+                    work_dir=str(tmpdir.path / "work" / name),
+                )
+                for name in ("a", "b")
+            ]
+            self.assertEqual(tasks[0].platform_identifier, "a")
+            self.assertEqual(tasks[1].platform_identifier, "b")
+            self.assertEqual(tasks[0].config.get("PlatformIdentifier", "identifier"), "a")
+            for name, task in zip(("a", "b"), tasks):
+                work_dir = str(tmpdir.path / "work" / name)
+                self.assertEqual(task.packages_full_path_dst, os.path.join(work_dir, "pkg"))
+                self.assertEqual(task.config_dir_dst, os.path.join(work_dir, "config"))
+                self.assertEqual(
+                    task.repo_output_dir, os.path.join(work_dir, "online_repository")
+                )
+            self.assertEqual(tasks[0].ifw_tools_dir, tasks[1].ifw_tools_dir)
+
+    def test_install_ifw_tools_replaces_corrupted(self) -> None:
+        def _extract(_: str, target: str) -> None:
+            for tool in ("archivegen", "binarycreator", "installerbase", "repogen"):
+                Path(target, "bin", tool).parent.mkdir(exist_ok=True)
+                Path(target, "bin", tool).write_text("new", encoding="utf-8")
+                Path(target, "bin", tool).chmod(0o755)
+
+        with TemporaryDirectory() as tmpdir, patch(
+            "create_installer.uri_exists", return_value=True
+        ), patch(
+            "create_installer.retrieve_url", side_effect=lambda _, dest: Path(dest).touch()
+        ), patch(
+            "create_installer.extract_file", side_effect=_extract
+        ), patch("create_installer.is_windows", return_value=False):
+            tools_dir = tmpdir.path / "ifwt"
+            (tools_dir / "bin").mkdir(parents=True)
+            (tools_dir / "bin" / "archivegen").write_text("old", encoding="utf-8")
+            task = QtInstallerTask.__new__(QtInstallerTask)
+            task.ifw_tools_uri = "http://foo.bar/ifw.7z"
+            task.ifw_tools_dir = str(tools_dir)
+            task.install_ifw_tools()
+            self.assertEqual(Path(task.archivegen_tool).read_text(encoding="utf-8"), "new")
+            self.assertEqual(task.repogen_tool, str(tools_dir / "bin" / "repogen"))
+            self.assertEqual(os.listdir(tmpdir.path), ["ifwt"])
+
 
 if __name__ == "__main__":
     unittest.main()
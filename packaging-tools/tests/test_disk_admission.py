@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#############################################################################
+#
+# Copyright (C) 2023 The Qt Company Ltd.
+# Contact: https://www.qt.io/licensing/
+#
+# This file is part of the release tools of the Qt Toolkit.
+#
+# $QT_BEGIN_LICENSE:GPL-EXCEPT$
+# Commercial License Usage
+# Licensees holding valid commercial Qt licenses may use this file in
+# accordance with the commercial license agreement provided with the
+# Software or, alternatively, in accordance with the terms contained in
+# a written agreement between you and The Qt Company. For licensing terms
+# and conditions see https://www.qt.io/terms-conditions. For further
+# information use the contact form at https://www.qt.io/contact-us.
+#
+# GNU General Public License Usage
+# Alternatively, this file may be used under the terms of the GNU
+# General Public License version 3 as published by the Free Software
+# Foundation with exceptions as appearing in the file LICENSE.GPL3-EXCEPT
+# included in the packaging of this file. Please review the following
+# information to ensure the GNU General Public License requirements will
+# be met: https://www.gnu.org/licenses/gpl-3.0.html.
+#
+# $QT_END_LICENSE$
+#
+#############################################################################
+
+
+import threading
+import time
+import unittest
+from typing import List
+
+from ddt import data, ddt, unpack  # type: ignore
+
+from disk_admission import (
+    DiskAdmission,
+    DiskAdmissionError,
+    estimate_footprint,
+    expansion_ratio,
+)
+
+
+@ddt
+class TestDiskAdmission(unittest.TestCase):
+    @data(  # type: ignore
+        ("https://foo.com/qtbase.7z", 4.0),
+        ("qtbase.tar.gz", 3.0),
+        ("QTBASE.TAR.XZ", 4.0),
+        ("qtbase.tar", 1.0),
+        ("README.txt", 1.0),
+    )
+    @unpack  # type: ignore
+    def test_expansion_ratio(self, name: str, expected: float) -> None:
+        self.assertEqual(expansion_ratio(name), expected)
+
+    def test_estimate_footprint(self) -> None:
+        self.assertEqual(estimate_footprint("qtbase.7z", 100), 500)
+        self.assertEqual(estimate_footprint("qtbase.7z", 100, extract=False), 100)
+
+    def test_admission_within_budget(self) -> None:
+        admission = DiskAdmission(100)
+        admitted: List[int] = []
+        admission.acquire(60)
+        admission.acquire(40)
+
+        def _admit() -> None:
+            admission.acquire(50)
+            admitted.append(50)
+
+        thread = threading.Thread(target=_admit)
+        thread.start()
+        time.sleep(0.1)
+        self.assertEqual(admitted, [])
+        admission.release(60)
+        thread.join(timeout=5)
+        self.assertEqual(admitted, [50])
+        self.assertEqual(admission.in_use, 90)
+
+    def test_admission_over_budget_alone(self) -> None:
+        admission = DiskAdmission(100)
+        admission.acquire(500)
+        self.assertEqual(admission.in_use, 500)
+        admission.release(500)
+        self.assertEqual(admission.in_use, 0)
+
+    def test_admission_retained(self) -> None:
+        admission = DiskAdmission(100)
+        admission.acquire(80)
+        admission.release(80, retained=30)
+        self.assertEqual(admission.in_use, 30)
+        admission.acquire(70)
+        with self.assertRaises(DiskAdmissionError):
+            admission.acquire(1, cancelled=lambda: True)
+
+    def test_admission_cancelled(self) -> None:
+        admission = DiskAdmission(100)
+        admission.acquire(100)
+        with self.assertRaises(DiskAdmissionError):
+            admission.acquire(1, cancelled=lambda: True)
+
+
+if __name__ == "__main__":
+    unittest.main()
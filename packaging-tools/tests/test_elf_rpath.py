@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#############################################################################
+#
+# Copyright (C) 2023 The Qt Company Ltd.
+# Contact: https://www.qt.io/licensing/
+#
+# This file is part of the release tools of the Qt Toolkit.
+#
+# $QT_BEGIN_LICENSE:GPL-EXCEPT$
+# Commercial License Usage
+# Licensees holding valid commercial Qt licenses may use this file in
+# accordance with the commercial license agreement provided with the
+# Software or, alternatively, in accordance with the terms contained in
+# a written agreement between you and The Qt Company. For licensing terms
+# and conditions see https://www.qt.io/terms-conditions. For further
+# information use the contact form at https://www.qt.io/contact-us.
+#
+# GNU General Public License Usage
+# Alternatively, this file may be used under the terms of the GNU
+# General Public License version 3 as published by the Free Software
+# Foundation with exceptions as appearing in the file LICENSE.GPL3-EXCEPT
+# included in the packaging of this file. Please review the following
+# information to ensure the GNU General Public License requirements will
+# be met: https://www.gnu.org/licenses/gpl-3.0.html.
+#
+# $QT_END_LICENSE$
+#
+#############################################################################
+
+
+import shutil
+import unittest
+from pathlib import Path
+from typing import Optional
+
+from ddt import data, ddt, unpack  # type: ignore
+from temppathlib import TemporaryDirectory
+
+from elf_rpath import DT_RUNPATH, ElfRpathError, read_elf_rpath, write_elf_rpath
+
+ASSETS_DIR = Path(__file__).parent / "assets" / "runpath"
+
+
+@ddt
+class TestElfRpath(unittest.TestCase):
+
+    @data(  # type: ignore
+        ("testbin_empty_rpath", "", 23),
+        ("testbin_no_rpath", None, 0),
+        ("testbin_exist_rpath", "/home/qt/lib", 23),
+        ("testbin_multiple_rpath", "$ORIGIN/bin:/home/qt", 23),
+    )
+    @unpack  # type: ignore
+    def test_read_elf_rpath(self, test_file: str, expected: Optional[str], max_length: int) -> None:
+        rpath = read_elf_rpath(ASSETS_DIR / test_file)
+        if expected is None:
+            self.assertIsNone(rpath)
+        else:
+            assert rpath is not None
+            self.assertEqual((rpath.value, rpath.tag, rpath.max_length), (expected, DT_RUNPATH, max_length))
+            self.assertEqual(rpath.tag_name, "RUNPATH")
+
+    @data(  # type: ignore
+        ("testbin_multiple_rpath", "$ORIGIN/lib"),
+        ("testbin_empty_rpath", "$ORIGIN/../lib:$ORIGIN"),
+        ("testbin_exist_rpath", ""),
+    )
+    @unpack  # type: ignore
+    def test_write_elf_rpath(self, test_file: str, new_rpath: str) -> None:
+        with TemporaryDirectory() as temp_dir:
+            shutil.copy(ASSETS_DIR / test_file, temp_dir.path)
+            old = read_elf_rpath(temp_dir.path / test_file)
+            self.assertEqual(write_elf_rpath(temp_dir.path / test_file, new_rpath), old)
+            rpath = read_elf_rpath(temp_dir.path / test_file)
+            assert rpath is not None and old is not None
+            self.assertEqual(rpath.value, new_rpath)
+            # the space for the path does not change
+            self.assertEqual(rpath.max_length, old.max_length)
+
+    def test_write_elf_rpath_too_large(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            test_file = shutil.copy(ASSETS_DIR / "testbin_exist_rpath", temp_dir.path)
+            with self.assertRaisesRegex(ElfRpathError, "too large; maximum length 23"):
+                write_elf_rpath(Path(test_file), "$ORIGIN/" + "x" * 16)
+            self.assertEqual(read_elf_rpath(Path(test_file)).value, "/home/qt/lib")  # type: ignore
+
+    def test_write_elf_rpath_no_rpath(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            test_file = shutil.copy(ASSETS_DIR / "testbin_no_rpath", temp_dir.path)
+            self.assertIsNone(write_elf_rpath(Path(test_file), "$ORIGIN"))
+            self.assertEqual(
+                Path(test_file).read_bytes(), (ASSETS_DIR / "testbin_no_rpath").read_bytes()
+            )
+
+    def test_read_elf_rpath_invalid(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            temp_dir.path.joinpath("text").write_text("foo", encoding="utf-8")
+            temp_dir.path.joinpath("truncated").write_bytes(
+                (ASSETS_DIR / "testbin_exist_rpath").read_bytes()[:100]
+            )
+            for name in ("text", "truncated"):
+                with self.assertRaises(ElfRpathError):
+                    read_elf_rpath(temp_dir.path / name)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#############################################################################
+#
+# Copyright (C) 2023 The Qt Company Ltd.
+# Contact: https://www.qt.io/licensing/
+#
+# This file is part of the release tools of the Qt Toolkit.
+#
+# $QT_BEGIN_LICENSE:GPL-EXCEPT$
+# Commercial License Usage
+# Licensees holding valid commercial Qt licenses may use this file in
+# accordance with the commercial license agreement provided with the
+# Software or, alternatively, in accordance with the terms contained in
+# a written agreement between you and The Qt Company. For licensing terms
+# and conditions see https://www.qt.io/terms-conditions. For further
+# information use the contact form at https://www.qt.io/contact-us.
+#
+# GNU General Public License Usage
+# Alternatively, this file may be used under the terms of the GNU
+# General Public License version 3 as published by the Free Software
+# Foundation with exceptions as appearing in the file LICENSE.GPL3-EXCEPT
+# included in the packaging of this file. Please review the following
+# information to ensure the GNU General Public License requirements will
+# be met: https://www.gnu.org/licenses/gpl-3.0.html.
+#
+# $QT_END_LICENSE$
+#
+#############################################################################
+
+
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Optional, Tuple
+from unittest.mock import MagicMock, patch
+
+from htmllistparse import FileEntry  # type: ignore
+from temppathlib import TemporaryDirectory
+from urlpath import URL  # type: ignore
+
+from listing_cache import ListingCache
+
+
+def create_listing(url: URL, timeout: int) -> Tuple[Optional[Any], List[FileEntry]]:
+    _ = timeout
+    time.sleep(0.05)
+    return url.path, [
+        FileEntry("a.7z", time.gmtime(0), 10, None), FileEntry("child/", None, None, None)
+    ]
+
+
+class TestListingCache(unittest.TestCase):
+
+    @patch("htmllistparse.fetch_listing", side_effect=create_listing)
+    def test_fetch_cached(self, fetch_listing: MagicMock) -> None:
+        cache = ListingCache()
+        url = URL("http://fileshare.intra/base/")
+        self.assertEqual(cache.fetch(url), create_listing(url, 30))
+        self.assertEqual(cache.fetch(URL("http://fileshare.intra/base")), create_listing(url, 30))
+        fetch_listing.assert_called_once_with(url, 30)
+
+    @patch("htmllistparse.fetch_listing", side_effect=create_listing)
+    def test_fetch_coalesced(self, fetch_listing: MagicMock) -> None:
+        cache = ListingCache()
+        urls = [URL(f"http://fileshare.intra/base/{i % 2}") for i in range(8)]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(cache.fetch, urls))
+        self.assertEqual(fetch_listing.call_count, 2)
+        self.assertEqual([cwd for cwd, _ in results], [url.path for url in urls])
+
+    @patch("htmllistparse.fetch_listing", side_effect=create_listing)
+    def test_fetch_expired(self, fetch_listing: MagicMock) -> None:
+        cache = ListingCache(ttl=0)
+        cache.fetch(URL("http://fileshare.intra/base"))
+        cache.fetch(URL("http://fileshare.intra/base"))
+        self.assertEqual(fetch_listing.call_count, 2)
+
+    @patch("htmllistparse.fetch_listing", side_effect=create_listing)
+    def test_fetch_disk_cache(self, fetch_listing: MagicMock) -> None:
+        url = URL("http://fileshare.intra/base")
+        with TemporaryDirectory() as temp_dir:
+            ListingCache(cache_dir=temp_dir.path).fetch(url)
+            self.assertEqual(
+                ListingCache(cache_dir=temp_dir.path).fetch(url), create_listing(url, 30)
+            )
+            fetch_listing.assert_called_once()
+            ListingCache(cache_dir=temp_dir.path, ttl=0).fetch(url)
+            self.assertEqual(fetch_listing.call_count, 2)
+
+    def test_fetch_error_not_cached(self) -> None:
+        cache = ListingCache()
+        url = URL("http://fileshare.intra/base")
+        with patch("htmllistparse.fetch_listing", side_effect=OSError("failed")):
+            with self.assertRaises(OSError):
+                cache.fetch(url)
+        with patch("htmllistparse.fetch_listing", side_effect=create_listing) as fetch_listing:
+            cache.fetch(url)
+            fetch_listing.assert_called_once()
+
+    def test_fetch_error_coalesced(self) -> None:
+        cache = ListingCache()
+        started = threading.Event()
+
+        def failing_listing(url: URL, timeout: int) -> None:
+            _ = url, timeout
+            started.set()
+            time.sleep(0.1)
+            raise OSError("failed")
+
+        with patch("htmllistparse.fetch_listing", side_effect=failing_listing) as fetch_listing:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                first = executor.submit(cache.fetch, URL("http://fileshare.intra/base"))
+                started.wait()
+                second = executor.submit(cache.fetch, URL("http://fileshare.intra/base"))
+                for future in (first, second):
+                    with self.assertRaises(OSError):
+                        future.result()
+            fetch_listing.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
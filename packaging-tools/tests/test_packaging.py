@@ -31,21 +31,27 @@
 
 import os
 import platform
+import shutil
 import sys
+import time
 import unittest
 from fileinput import FileInput
+from pathlib import Path
 
 from temppathlib import TemporaryDirectory
 
 from create_installer import parse_package_finalize_items
 from patch_qt import (
     patch_absolute_lib_paths_from_line,
+    patch_files,
     patch_qconfig_pri_from_line,
     patch_qmake_prl_build_dir_from_line,
     patch_qt_edition,
 )
 from runner import run_cmd
 
+PATCH_QT_CORPUS = Path(__file__).parent / "assets" / "patch_qt"
+
 
 class TestPackaging(unittest.TestCase):
 
@@ -106,6 +112,76 @@ class TestPackaging(unittest.TestCase):
             result = patch_qconfig_pri_from_line(data[0])
             self.assertEqual(result, data[1], f"Failed to patch: [{data[0]}] as: [{data[1]}]. Got: [{result}]")
 
+    def test_patch_files(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            lib_dir = temp_dir.path / "lib"
+            lib_dir.mkdir()
+            prl_file = lib_dir / "libQt6Core.prl"
+            prl_file.write_bytes(
+                b"QMAKE_PRL_BUILD_DIR = /build/qtbase\r\n"
+                b"QMAKE_PRL_LIBS = /usr/lib/libz.so \xff\r\n"
+                b"\r\n"
+                b"QMAKE_PRL_VERSION = 6.5.0"
+            )
+            pri_file = temp_dir.path / "mkspecs" / "qconfig.pri"
+            pri_file.parent.mkdir()
+            pri_file.write_text(
+                "QMAKE_DEFAULT_LIBDIRS = /usr/lib\nQT_EDITION = OpenSource\n", encoding="utf-8"
+            )
+            pc_file = lib_dir / "Qt6Gui.pc"
+            pc_file.write_text("Libs: -L${libdir} -lQt6Gui\n", encoding="utf-8")
+            header_file = temp_dir.path / "qconfig.h"
+            header_file.write_text("QMAKE_PRL_BUILD_DIR /usr/lib/libz.so\n", encoding="utf-8")
+            for path in (pc_file, header_file):
+                os.utime(path, (0, 0))
+            patch_files(str(temp_dir.path), product="qt_framework", max_workers=2)
+            self.assertEqual(
+                prl_file.read_bytes(),
+                b"QMAKE_PRL_LIBS = -lz \xff\r\n\r\nQMAKE_PRL_VERSION = 6.5.0",
+            )
+            self.assertEqual(
+                pri_file.read_text(encoding="utf-8"),
+                "QMAKE_DEFAULT_LIBDIRS =\nQT_EDITION = OpenSource\n",
+            )
+            # files which are not patched are not rewritten
+            self.assertEqual(pc_file.stat().st_mtime, 0)
+            self.assertEqual(header_file.stat().st_mtime, 0)
+
+    def test_patch_files_corpus(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            corpus_dir = temp_dir.path / "corpus"
+            shutil.copytree(PATCH_QT_CORPUS, corpus_dir)
+            patch_files(str(corpus_dir), product="qt_framework")
+            prl_data = (corpus_dir / "libQt6Gui.prl").read_text(encoding="utf-8")
+            self.assertNotIn("QMAKE_PRL_BUILD_DIR", prl_data)
+            self.assertIn(
+                "QMAKE_PRL_LIBS = -L/usr/local/openssl/lib $$[QT_INSTALL_LIBS]/libQt6Core.so "
+                "-lGL -lpng16 -lz -lharfbuzz -lpthread\n",
+                prl_data,
+            )
+            pri_data = (corpus_dir / "qconfig.pri").read_text(encoding="utf-8")
+            self.assertIn("QMAKE_DEFAULT_LIBDIRS =\n", pri_data)
+            self.assertIn("QMAKE_LIBS_OPENSSL = -lssl -lcrypto\n", pri_data)
+            cmake_data = (corpus_dir / "Qt6GuiConfigExtras.cmake").read_text(encoding="utf-8")
+            self.assertIn('_qt6gui_find_extra_libs(EGL "EGL" "" "/usr/include/libdrm")', cmake_data)
+
+    @unittest.skipUnless(os.environ.get("PKG_TEST_BENCHMARK"), "Skipping because 'PKG_TEST_BENCHMARK' is not set")
+    def test_lib_path_patcher_benchmark(self) -> None:
+        corpus = [
+            (path.read_text(encoding="utf-8").splitlines(), path.suffix.lstrip("."))
+            for path in sorted(PATCH_QT_CORPUS.iterdir())
+        ]
+        rounds = int(os.environ.get("PKG_TEST_BENCHMARK_ROUNDS", "2000"))
+        line_count = rounds * sum(len(lines) for lines, _ in corpus)
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for lines, file_extension in corpus:
+                for line in lines:
+                    patch_absolute_lib_paths_from_line(line, file_extension)
+        elapsed = time.perf_counter() - start
+        print(f"Library path patching: {line_count / elapsed:.0f} lines/sec ({line_count} lines)")
+        self.assertGreater(line_count, 0)
+
     def test_parse_package_finalize_items(self) -> None:
         test_data = (("set_executable=licheck64, foo=bar, set_executable=something", "set_executable", ["licheck64", "something"]),
                      ("set_executable=licheck64,foo=bar,   set_executable = something", "set_executable", ["licheck64", "something"]),
@@ -30,18 +30,28 @@
 #############################################################################
 
 import os
+import shutil
+import subprocess
+import sys
+import threading
 import unittest
 from configparser import ConfigParser
 from pathlib import Path
-from shutil import rmtree
-from typing import List, cast
+from shutil import copytree, rmtree
+from time import sleep
+from types import SimpleNamespace
+from typing import Any, List, cast
+from unittest.mock import patch
 
-from ddt import ddt  # type: ignore
+from ddt import data, ddt  # type: ignore
 from temppathlib import TemporaryDirectory
 
+from bld_utils import is_linux
 from installer_utils import PackagingError, ch_dir
 from read_remote_config import get_pkg_value
 from release_repo_updater import (
+    PublishMode,
+    add_reset_repository_steps,
     build_online_repositories,
     check_repogen_output,
     create_remote_repository_backup,
@@ -51,11 +61,16 @@ from release_repo_updater import (
     parse_ext,
     remote_file_exists,
     reset_new_remote_repository,
+    restore_repository_backups,
+    run_remote_transaction,
     string_to_bool,
+    update_repositories,
     upload_ifw_to_remote,
     upload_pending_repository_content,
 )
 from release_task_reader import IFWReleaseTask, TaskType, append_to_task_filters, parse_data
+from remote_transaction import RemoteTransaction
+from ssh_pool import SshSessionPool
 from tests.testhelpers import (
     asyncio_test,
     asyncio_test_parallel_data,
@@ -102,6 +117,32 @@ def _write_updates_xml(path: str, version: str, release_date: str) -> None:
         handle.write("</Updates>\n")
 
 
+def _write_exchange_mv(bin_dir: Path, exchanges: Path) -> None:
+    """Write a mv with --exchange support (coreutils 9.5) to bin_dir, logging the swaps"""
+    bin_dir.mkdir()
+    (bin_dir / "mv").write_text(
+        "#!/bin/bash\n"
+        'args=("$@") no_target_dir="" exchange=""\n'
+        "while true; do\n"
+        '    case "$1" in\n'
+        '        -T) no_target_dir=1 ;;\n'
+        '        --exchange) exchange=1 ;;\n'
+        "        *) break ;;\n"
+        "    esac\n"
+        "    shift\n"
+        "done\n"
+        f'[ -z "$exchange" ] && exec {shutil.which("mv")} "${{args[@]}}"\n'
+        "# without -T the source would be moved into an existing destination directory\n"
+        '[ -z "$no_target_dir" ] && [ -d "$2" ] && exit 1\n'
+        f'echo "$1" >> {exchanges}\n'
+        f"exec {sys.executable} -c 'import ctypes, os, sys; sys.exit(ctypes.CDLL(None)"
+        ".renameat2(-100, os.fsencode(sys.argv[1]), -100, os.fsencode(sys.argv[2]), 2))'"
+        ' "$1" "$2"\n',
+        encoding="utf-8",
+    )
+    (bin_dir / "mv").chmod(0o755)
+
+
 async def _get_repogen() -> str:
     pkgsrv = get_pkg_value("PACKAGE_STORAGE_SERVER_PATH_HTTP")
     ifw_tools = (
@@ -176,6 +217,145 @@ class TestReleaseRepoUpdater(unittest.TestCase):
             backup_name = remote_target_repo_path.name + "____snapshot_backup"
             self.assertTrue((remote_target_repo_path.with_name(backup_name)).exists())
 
+    @data(PublishMode.COPY, PublishMode.HARDLINK)  # type: ignore
+    def test_reset_repository_steps(self, publish_mode: PublishMode) -> None:
+        run = subprocess.run
+
+        def _run_locally(cmd: List[str], **kwargs: Any) -> Any:
+            return run(cmd[-2:], **kwargs)  # pylint: disable=subprocess-run-check
+
+        with TemporaryDirectory(prefix="_repo_tmp_") as tmp_dir, patch(
+            "remote_transaction.get_ssh_pool", new=lambda: SshSessionPool(enabled=False)
+        ), patch("remote_transaction.subprocess.run", side_effect=_run_locally):
+            source_repo = tmp_dir.path / "repository"
+            target_repo = tmp_dir.path / "destination_online_repository"
+            _write_dummy_file(str(source_repo / "qt.foo.bar1" / "meta" / "package.xml"))
+            _write_dummy_file(str(source_repo / "Updates.xml"))
+            for _ in range(2):
+                transaction = RemoteTransaction(self.server)
+                add_reset_repository_steps(
+                    transaction, str(source_repo), str(target_repo), publish_mode
+                )
+                run_remote_transaction(transaction)
+            self.assertTrue((target_repo / "qt.foo.bar1" / "meta" / "package.xml").is_file())
+            inodes = {(repo / "Updates.xml").stat().st_ino for repo in (source_repo, target_repo)}
+            self.assertEqual(len(inodes) == 1, publish_mode == PublishMode.HARDLINK)
+            self.assertEqual(sorted(os.listdir(tmp_dir.path)), [
+                "destination_online_repository",
+                "destination_online_repository____snapshot_backup",
+                "repository",
+            ])
+            self.assertTrue((target_repo / "Updates.xml").is_file())
+            # existing repository should be automatically be moved as backup
+            backup_repo = target_repo.with_name(target_repo.name + "____snapshot_backup")
+            self.assertTrue((backup_repo / "Updates.xml").is_file())
+            transaction = RemoteTransaction(self.server)
+            add_reset_repository_steps(transaction, str(tmp_dir.path / "missing"), str(target_repo))
+            with self.assertRaises(PackagingError):
+                run_remote_transaction(transaction)
+
+    @unittest.skipUnless(is_linux(), "renameat2() is Linux only")
+    def test_reset_repository_steps_exchange(self) -> None:
+        run = subprocess.run
+
+        def _run_locally(cmd: List[str], **kwargs: Any) -> Any:
+            return run(cmd[-2:], **kwargs)  # pylint: disable=subprocess-run-check
+
+        with TemporaryDirectory(prefix="_repo_tmp_") as tmp_dir, patch(
+            "remote_transaction.get_ssh_pool", new=lambda: SshSessionPool(enabled=False)
+        ), patch("remote_transaction.subprocess.run", side_effect=_run_locally):
+            bin_dir, exchanges = tmp_dir.path / "bin", tmp_dir.path / "exchanges.log"
+            _write_exchange_mv(bin_dir, exchanges)
+            source_repo = tmp_dir.path / "repository"
+            target_repo = tmp_dir.path / "destination_online_repository"
+            backup_repo = target_repo.with_name(target_repo.name + "____snapshot_backup")
+            _write_dummy_file(str(source_repo / "Updates.xml"))
+            (target_repo / "old").mkdir(parents=True)
+            with patch.dict(os.environ, {"PATH": f"{bin_dir}{os.pathsep}{os.environ['PATH']}"}):
+                transaction = RemoteTransaction(self.server)
+                reset = add_reset_repository_steps(transaction, str(source_repo), str(target_repo))
+                run_remote_transaction(transaction)
+            self.assertEqual(exchanges.read_text(encoding="utf-8").split(), [
+                str(target_repo.with_name(target_repo.name + "____publishing"))
+            ])
+            self.assertEqual(transaction.result(reset.publish_step).status, "skipped")
+            self.assertTrue((target_repo / "Updates.xml").is_file())
+            self.assertEqual(os.listdir(backup_repo), ["old"])
+
+    def test_reset_repository_restores_backup(self) -> None:
+        run = subprocess.run
+
+        def _run_locally(cmd: List[str], **kwargs: Any) -> Any:
+            return run(cmd[-2:], **kwargs)  # pylint: disable=subprocess-run-check
+
+        with TemporaryDirectory(prefix="_repo_tmp_") as tmp_dir, patch(
+            "remote_transaction.get_ssh_pool", new=lambda: SshSessionPool(enabled=False)
+        ), patch("remote_transaction.subprocess.run", side_effect=_run_locally):
+            source_repo = tmp_dir.path / "repository"
+            target_repo = tmp_dir.path / "destination_online_repository"
+            _write_dummy_file(str(source_repo / "Updates.xml"))
+            (target_repo / "old").mkdir(parents=True)
+            transaction = RemoteTransaction(self.server)
+            reset = add_reset_repository_steps(transaction, str(source_repo), str(target_repo))
+            reset.publish_step.command = "false"  # fail after the target is moved as backup
+            with self.assertRaises(PackagingError):
+                try:
+                    run_remote_transaction(transaction)
+                except PackagingError:
+                    restore_repository_backups(transaction, [reset])
+                    raise
+            self.assertEqual(os.listdir(target_repo), ["old"])
+            self.assertFalse(Path(reset.backup).exists())
+
+    @data(False, True)  # type: ignore
+    def test_upload_pending_repository_delta(self, exchange: bool) -> None:
+        if exchange and not is_linux():
+            self.skipTest("renameat2() is Linux only")
+        run = subprocess.run
+        rsync_cmds: List[List[str]] = []
+
+        def _run_locally(cmd: List[str], **kwargs: Any) -> Any:
+            return run(cmd[-2:], **kwargs)  # pylint: disable=subprocess-run-check
+
+        def _rsync_locally(cmd: List[str], **_: Any) -> str:
+            rsync_cmds.append(cmd)
+            upload_path = Path(cmd[-1].split(":", 1)[1])
+            upload_path.rmdir()  # created empty by the prepare steps
+            copytree(cmd[-2], upload_path)
+            return ""
+
+        with TemporaryDirectory(prefix="_repo_tmp_") as tmp_dir, patch(
+            "remote_transaction.get_ssh_pool", new=lambda: SshSessionPool(enabled=False)
+        ), patch("remote_transaction.subprocess.run", side_effect=_run_locally), patch(
+            "release_repo_updater.get_ssh_pool", new=lambda: SshSessionPool(enabled=False)
+        ), patch("release_repo_updater.run_cmd", side_effect=_rsync_locally):
+            source_repo = tmp_dir.path / "repository"
+            pending_repo = tmp_dir.path / "pending" / "repository"
+            staging_repo = tmp_dir.path / "staging" / "repository"
+            _write_dummy_file(str(source_repo / "Updates.xml"))
+            bin_dir, exchanges = tmp_dir.path / "bin", tmp_dir.path / "exchanges.log"
+            path = os.environ["PATH"]
+            if exchange:
+                _write_exchange_mv(bin_dir, exchanges)
+                path = f"{bin_dir}{os.pathsep}{path}"
+            with patch.dict(os.environ, {"PATH": path}):
+                for _ in range(2):
+                    upload_pending_repository_content(
+                        self.server, str(source_repo), str(pending_repo), [str(staging_repo)]
+                    )
+            self.assertTrue((pending_repo / "Updates.xml").is_file())
+            self.assertEqual(os.listdir(pending_repo.parent), ["repository"])
+            # only the existing previous content is used for the delta transfer
+            link_dests = [[a for a in cmd if a.startswith("--link-dest=")] for cmd in rsync_cmds]
+            self.assertEqual(link_dests, [[], ["--link-dest=../repository"]])
+            self.assertTrue(rsync_cmds[0][-1].endswith("repository____uploading"))
+            self.assertTrue(any(a.startswith("--skip-compress=") for a in rsync_cmds[0]))
+            if exchange:
+                # the first upload has no previous content to swap with
+                self.assertEqual(exchanges.read_text(encoding="utf-8").split(), [
+                    str(pending_repo.with_name("repository____uploading"))
+                ])
+
     @asyncio_test
     async def test_create_remote_repository_backup(self) -> None:
         with TemporaryDirectory(prefix="_repo_tmp_") as tmp_dir:
@@ -234,6 +414,97 @@ class TestReleaseRepoUpdater(unittest.TestCase):
         task = cast(IFWReleaseTask, tasks[TaskType.IFW_TASK_TYPE].pop())
         self.assertTrue(task.source_online_repository_path.endswith("foo/bar/path_1/online_repository"))
 
+    @asyncio_test
+    async def test_build_online_repositories_concurrent(self) -> None:
+        sample_config = "".join(
+            f"[task.ifw.repository.linux.x86_64.repo{i}]\n"
+            f"config_file: config_{i}\n"
+            f"repo_path: foo/bar/path_{i}\n"
+            for i in range(6)
+        )
+        config = ConfigParser()
+        config.read_string(sample_config)
+        tasks = parse_data(config, task_types=[TaskType.IFW_TASK_TYPE], task_filters=[])
+        lock = threading.Lock()
+        state = {"running": 0, "peak": 0}
+
+        def installer_task(**kwargs: Any) -> SimpleNamespace:
+            return SimpleNamespace(errors=[], **kwargs)
+
+        def create_installer(task: SimpleNamespace) -> None:
+            with lock:
+                state["running"] += 1
+                state["peak"] = max(state["peak"], state["running"])
+            Path(task.repo_output_dir).mkdir(parents=True)
+            sleep(0.05)
+            with lock:
+                state["running"] -= 1
+
+        with TemporaryDirectory() as temp_dir:
+            for i in range(6):
+                temp_dir.path.joinpath(f"config_{i}").touch()
+            with ch_dir(str(temp_dir.path)), \
+                    patch("release_repo_updater.QtInstallerTask", side_effect=installer_task), \
+                    patch("release_repo_updater.create_installer", side_effect=create_installer):
+                done = await build_online_repositories(
+                    tasks=cast(List[IFWReleaseTask], tasks[TaskType.IFW_TASK_TYPE]),
+                    license_="opensource",
+                    installer_config_base_dir=str(temp_dir.path),
+                    artifact_share_base_url="foo",
+                    ifw_tools="foo",
+                    build_repositories=True,
+                    concurrency=3,
+                )
+        self.assertEqual(len(done), 6)
+        self.assertEqual(state["peak"], 3)
+        # every task writes to its own directories
+        self.assertEqual(len(set(done)), 6)
+
+    @asyncio_test
+    async def test_update_repositories_concurrent(self) -> None:
+        tasks = [SimpleNamespace(repo_path=f"foo/bar/path_{i}") for i in range(8)]
+        lock = threading.Lock()
+        state = {"running": 0, "peak": 0}
+        done: List[str] = []
+
+        def update_repository(server: str, _: Any, task: SimpleNamespace, rta: str) -> None:
+            self.assertEqual((server, rta), ("server", "rta"))
+            with lock:
+                state["running"] += 1
+                state["peak"] = max(state["peak"], state["running"])
+            sleep(0.05)
+            with lock:
+                state["running"] -= 1
+                done.append(task.repo_path)
+
+        # the per-server session limit caps the concurrency
+        with patch("release_repo_updater.update_repository", side_effect=update_repository), \
+                patch("release_repo_updater.get_ssh_pool", return_value=SshSessionPool(max_sessions=2)):
+            await update_repositories(cast(Any, tasks), "server", cast(Any, None), "rta", 4)
+        self.assertEqual(len(done), 8)
+        self.assertEqual(state["peak"], 2)
+
+    @asyncio_test
+    async def test_update_repositories_failure(self) -> None:
+        for error in (PackagingError("failed"), subprocess.TimeoutExpired("ssh", 1), OSError()):
+            # no new updates are started after the failure
+            self.assertLess(await self._update_repositories_failing(error), 7)
+
+    async def _update_repositories_failing(self, error: Exception) -> int:
+        tasks = [SimpleNamespace(repo_path=f"foo/bar/path_{i}") for i in range(8)]
+        done: List[str] = []
+
+        def update_repository(_: str, __: Any, task: SimpleNamespace, ___: str) -> None:
+            sleep(0.01)
+            if task.repo_path.endswith("_1"):
+                raise error
+            done.append(task.repo_path)
+
+        with patch("release_repo_updater.update_repository", side_effect=update_repository):
+            with self.assertRaises(type(error)):
+                await update_repositories(cast(Any, tasks), "server", cast(Any, None), "", 2)
+        return len(done)
+
     @asyncio_test
     async def test_ensure_ext_repo_paths(self) -> None:
         with TemporaryDirectory(prefix="_repo_tmp_") as tmp_dir:
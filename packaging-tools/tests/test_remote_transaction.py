@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#############################################################################
+#
+# Copyright (C) 2023 The Qt Company Ltd.
+# Contact: https://www.qt.io/licensing/
+#
+# This file is part of the release tools of the Qt Toolkit.
+#
+# $QT_BEGIN_LICENSE:GPL-EXCEPT$
+# Commercial License Usage
+# Licensees holding valid commercial Qt licenses may use this file in
+# accordance with the commercial license agreement provided with the
+# Software or, alternatively, in accordance with the terms contained in
+# a written agreement between you and The Qt Company. For licensing terms
+# and conditions see https://www.qt.io/terms-conditions. For further
+# information use the contact form at https://www.qt.io/contact-us.
+#
+# GNU General Public License Usage
+# Alternatively, this file may be used under the terms of the GNU
+# General Public License version 3 as published by the Free Software
+# Foundation with exceptions as appearing in the file LICENSE.GPL3-EXCEPT
+# included in the packaging of this file. Please review the following
+# information to ensure the GNU General Public License requirements will
+# be met: https://www.gnu.org/licenses/gpl-3.0.html.
+#
+# $QT_END_LICENSE$
+#
+#############################################################################
+
+
+import shlex
+import subprocess
+import unittest
+from typing import Any, List
+from unittest.mock import patch
+
+from temppathlib import TemporaryDirectory
+
+from bld_utils import is_windows
+from remote_transaction import RemoteTransaction, RemoteTransactionError
+from ssh_pool import SshSessionPool
+
+_run = subprocess.run
+
+
+def _run_locally(cmd: List[str], **kwargs: Any) -> Any:
+    """Run the transaction script with a local shell instead of ssh"""
+    assert cmd[-2:] == ["bash", "-s"]
+    return _run(["bash", "-s"], **kwargs)  # pylint: disable=subprocess-run-check
+
+
+@unittest.skipIf(is_windows(), "Requires bash")
+@patch("remote_transaction.get_ssh_pool", new=lambda: SshSessionPool(enabled=False))
+@patch("remote_transaction.subprocess.run", side_effect=_run_locally)
+class TestRemoteTransaction(unittest.TestCase):
+    def test_run(self, run: Any) -> None:
+        with TemporaryDirectory() as temp_dir:
+            target = str(temp_dir.path / "dir with space")
+            transaction = RemoteTransaction("host")
+            transaction.add("create", ["mkdir", "-p", target])
+            text = shlex.quote("it's \"quoted\"")
+            transaction.add("write", f"echo {text} | tee {shlex.quote(target + '/file.txt')}")
+            transaction.add("skip", ["touch", target + "/skipped"], condition=["test", "-f", "/nope"])
+            unchecked = transaction.add("unchecked", "echo failing; exit 3", check=False)
+            results = transaction.run()
+            self.assertIs(transaction.result(unchecked), results[3])
+            self.assertEqual(run.call_count, 1)
+            self.assertEqual([r.status for r in results], ["ok", "ok", "skipped", "failed"])
+            self.assertEqual(results[1].output, "it's \"quoted\"\n")
+            self.assertEqual((results[3].returncode, results[3].output), (3, "failing\n"))
+            self.assertTrue((temp_dir.path / "dir with space" / "file.txt").is_file())
+            self.assertFalse((temp_dir.path / "dir with space" / "skipped").exists())
+
+    def test_run_stops_at_failure(self, *_: Any) -> None:
+        with TemporaryDirectory() as temp_dir:
+            transaction = RemoteTransaction("host")
+            transaction.add("fail", ["test", "-d", str(temp_dir.path / "missing")])
+            transaction.add("create", ["mkdir", str(temp_dir.path / "created")])
+            with self.assertRaises(RemoteTransactionError):
+                transaction.run()
+            self.assertEqual([r.status for r in transaction.results], ["failed", "not_run"])
+            self.assertFalse((temp_dir.path / "created").exists())
+
+    def test_run_connection_failure(self, run: Any) -> None:
+        run.side_effect = lambda *_, **__: subprocess.CompletedProcess([], 255, "Connection refused")
+        transaction = RemoteTransaction("host")
+        transaction.add("create", ["mkdir", "foo"])
+        with self.assertRaises(RemoteTransactionError):
+            transaction.run()
+        self.assertEqual(transaction.results[0].status, "not_run")
+        self.assertEqual(run.call_args.args[0], ["ssh", "host", "bash", "-s"])
+
+    def test_run_timeout(self, *_: Any) -> None:
+        transaction = RemoteTransaction("host")
+        transaction.add("quick", "echo done")
+        transaction.add("slow", "sleep 5")
+        with self.assertRaises(RemoteTransactionError):
+            transaction.run(timeout=1)
+        self.assertEqual([r.status for r in transaction.results], ["ok", "not_run"])
+
+    def test_run_ssh_not_found(self, run: Any) -> None:
+        run.side_effect = FileNotFoundError("ssh")
+        transaction = RemoteTransaction("host")
+        transaction.add("create", ["mkdir", "foo"])
+        with self.assertRaises(RemoteTransactionError):
+            transaction.run()
+        self.assertEqual(transaction.results[0].status, "not_run")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#############################################################################
+#
+# Copyright (C) 2023 The Qt Company Ltd.
+# Contact: https://www.qt.io/licensing/
+#
+# This file is part of the release tools of the Qt Toolkit.
+#
+# $QT_BEGIN_LICENSE:GPL-EXCEPT$
+# Commercial License Usage
+# Licensees holding valid commercial Qt licenses may use this file in
+# accordance with the commercial license agreement provided with the
+# Software or, alternatively, in accordance with the terms contained in
+# a written agreement between you and The Qt Company. For licensing terms
+# and conditions see https://www.qt.io/terms-conditions. For further
+# information use the contact form at https://www.qt.io/contact-us.
+#
+# GNU General Public License Usage
+# Alternatively, this file may be used under the terms of the GNU
+# General Public License version 3 as published by the Free Software
+# Foundation with exceptions as appearing in the file LICENSE.GPL3-EXCEPT
+# included in the packaging of this file. Please review the following
+# information to ensure the GNU General Public License requirements will
+# be met: https://www.gnu.org/licenses/gpl-3.0.html.
+#
+# $QT_END_LICENSE$
+#
+#############################################################################
+
+
+import argparse
+import threading
+import unittest
+from time import sleep
+
+from resource_governor import (
+    Resource,
+    ResourceGovernor,
+    add_governor_arguments,
+    configure_governor,
+    get_governor,
+)
+
+
+class TestResourceGovernor(unittest.TestCase):
+
+    def test_acquire_limit(self) -> None:
+        governor = ResourceGovernor({Resource.NETWORK: 2, Resource.CPU: 1, Resource.DISK: 1})
+        lock = threading.Lock()
+        peak = {"value": 0}
+
+        def job() -> None:
+            with governor.acquire(Resource.NETWORK):
+                with lock:
+                    peak["value"] = max(peak["value"], governor.in_use(Resource.NETWORK))
+                sleep(0.01)
+
+        threads = [threading.Thread(target=job) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(peak["value"], 2)
+        self.assertEqual(governor.in_use(Resource.NETWORK), 0)
+
+    def test_configure_releases_waiters(self) -> None:
+        governor = ResourceGovernor({Resource.NETWORK: 1, Resource.CPU: 1, Resource.DISK: 1})
+        acquired = threading.Event()
+
+        def job() -> None:
+            with governor.acquire(Resource.CPU):
+                acquired.set()
+
+        with governor.acquire(Resource.CPU):
+            thread = threading.Thread(target=job)
+            thread.start()
+            self.assertFalse(acquired.wait(timeout=0.1))
+            governor.configure({Resource.CPU: 2, Resource.DISK: None})
+            self.assertTrue(acquired.wait(timeout=5))
+        thread.join()
+        self.assertEqual(governor.limit(Resource.CPU), 2)
+        self.assertEqual(governor.limit(Resource.DISK), 1)
+
+    def test_governed_releases_on_error(self) -> None:
+        governor = ResourceGovernor({Resource.NETWORK: 1, Resource.CPU: 1, Resource.DISK: 1})
+
+        def fail() -> None:
+            raise ValueError("failed")
+
+        with self.assertRaises(ValueError):
+            governor.governed(Resource.DISK, fail)()
+        self.assertEqual(governor.in_use(Resource.DISK), 0)
+        self.assertEqual(governor.governed(Resource.DISK, len)("abc"), 3)
+
+    def test_configure_governor_from_args(self) -> None:
+        parser = argparse.ArgumentParser()
+        add_governor_arguments(parser)
+        args = parser.parse_args(["--max-network-jobs", "3"])
+        limits = {res: get_governor().limit(res) for res in Resource}
+        try:
+            configure_governor(args)
+            self.assertEqual(get_governor().limit(Resource.NETWORK), 3)
+        finally:
+            get_governor().configure(limits)
+
+
+if __name__ == "__main__":
+    unittest.main()
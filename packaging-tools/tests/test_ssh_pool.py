@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#############################################################################
+#
+# Copyright (C) 2023 The Qt Company Ltd.
+# Contact: https://www.qt.io/licensing/
+#
+# This file is part of the release tools of the Qt Toolkit.
+#
+# $QT_BEGIN_LICENSE:GPL-EXCEPT$
+# Commercial License Usage
+# Licensees holding valid commercial Qt licenses may use this file in
+# accordance with the commercial license agreement provided with the
+# Software or, alternatively, in accordance with the terms contained in
+# a written agreement between you and The Qt Company. For licensing terms
+# and conditions see https://www.qt.io/terms-conditions. For further
+# information use the contact form at https://www.qt.io/contact-us.
+#
+# GNU General Public License Usage
+# Alternatively, this file may be used under the terms of the GNU
+# General Public License version 3 as published by the Free Software
+# Foundation with exceptions as appearing in the file LICENSE.GPL3-EXCEPT
+# included in the packaging of this file. Please review the following
+# information to ensure the GNU General Public License requirements will
+# be met: https://www.gnu.org/licenses/gpl-3.0.html.
+#
+# $QT_END_LICENSE$
+#
+#############################################################################
+
+
+import socket
+import unittest
+from unittest.mock import patch
+
+from temppathlib import TemporaryDirectory
+
+from bld_utils import is_windows
+from ssh_pool import SshSessionPool
+
+
+@unittest.skipIf(is_windows(), "SSH multiplexing not supported on Windows")
+class TestSshSessionPool(unittest.TestCase):
+    def test_disabled(self) -> None:
+        pool = SshSessionPool(enabled=False)
+        self.assertEqual(pool.login_cmd("user@host"), ["ssh", "-t", "-t", "user@host"])
+        self.assertEqual(pool.rsync_shell("user@host"), "ssh")
+
+    def test_master_started_once(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            pool = SshSessionPool(persist=30, control_dir=str(temp_dir.path))
+            control_path = pool.control_path("user@host")
+            with socket.socket(socket.AF_UNIX) as master:
+
+                def _start_master(*_: object, **__: object) -> None:
+                    master.bind(control_path)
+                    master.listen()
+
+                with patch("ssh_pool.subprocess.run", side_effect=_start_master) as run:
+                    login = pool.login_cmd("user@host")
+                    pool.login_cmd("user@host")
+                    run.assert_called_once()
+                    self.assertIn("ControlMaster=yes", run.call_args.args[0])
+                    self.assertIn("ControlPersist=30", run.call_args.args[0])
+            self.assertIn(f"ControlPath={control_path}", login)
+            self.assertIn("ControlMaster=no", login)
+            self.assertEqual(login[-3:], ["-t", "-t", "user@host"])
+
+    def test_stale_socket_restarted(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            pool = SshSessionPool(control_dir=str(temp_dir.path))
+            control_path = pool.control_path("host")
+            with socket.socket(socket.AF_UNIX) as dead_master:
+                dead_master.bind(control_path)
+            with patch("ssh_pool.subprocess.run") as run:
+                shell = pool.rsync_shell("host")
+                run.assert_called_once()
+            self.assertTrue(shell.startswith("ssh -o ControlMaster=no"))
+
+    def test_reset_keeps_running_sessions(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            pool = SshSessionPool(control_dir=str(temp_dir.path))
+            with patch("ssh_pool.subprocess.run") as run:
+                pool.rsync_shell("host")
+                pool.reset("host")
+                self.assertEqual(run.call_args.args[0][-3:], ["-O", "stop", "host"])
+                pool.rsync_shell("host")
+                pool.close()
+                self.assertEqual(run.call_args.args[0][-3:], ["-O", "exit", "host"])
+
+    def test_unreachable_server(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            pool = SshSessionPool(control_dir=str(temp_dir.path))
+            with patch("ssh_pool.subprocess.run", side_effect=OSError("unreachable")) as run:
+                login = pool.login_cmd("host")
+                pool.login_cmd("host")
+                # not retried before the retry interval
+                run.assert_called_once()
+            # the commands connect directly if the master is not available
+            self.assertEqual(login[0], "ssh")
+            self.assertEqual(login[-1], "host")
+
+
+if __name__ == "__main__":
+    unittest.main()
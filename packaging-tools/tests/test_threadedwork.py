@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#############################################################################
+#
+# Copyright (C) 2023 The Qt Company Ltd.
+# Contact: https://www.qt.io/licensing/
+#
+# This file is part of the release tools of the Qt Toolkit.
+#
+# $QT_BEGIN_LICENSE:GPL-EXCEPT$
+# Commercial License Usage
+# Licensees holding valid commercial Qt licenses may use this file in
+# accordance with the commercial license agreement provided with the
+# Software or, alternatively, in accordance with the terms contained in
+# a written agreement between you and The Qt Company. For licensing terms
+# and conditions see https://www.qt.io/terms-conditions. For further
+# information use the contact form at https://www.qt.io/contact-us.
+#
+# GNU General Public License Usage
+# Alternatively, this file may be used under the terms of the GNU
+# General Public License version 3 as published by the Free Software
+# Foundation with exceptions as appearing in the file LICENSE.GPL3-EXCEPT
+# included in the packaging of this file. Please review the following
+# information to ensure the GNU General Public License requirements will
+# be met: https://www.gnu.org/licenses/gpl-3.0.html.
+#
+# $QT_END_LICENSE$
+#
+#############################################################################
+
+import threading
+import unittest
+from time import sleep
+from typing import List
+
+from resource_governor import Resource, get_governor
+from threadedwork import PipelineError, PipelineStep, PipelineWork, Task, ThreadedWork
+
+
+class TestPipelineWork(unittest.TestCase):
+
+    def test_pipeline_steps_in_order(self) -> None:
+        results: List[str] = []
+        work = PipelineWork("test", {"download": 2, "compress": 2})
+        for name in ("a", "b"):
+            work.add_pipeline(name, [
+                PipelineStep("download", results.append, f"{name}1"),
+                PipelineStep("compress", results.append, f"{name}2"),
+            ])
+        work.run()
+        self.assertEqual(sorted(results), ["a1", "a2", "b1", "b2"])
+        self.assertLess(results.index("a1"), results.index("a2"))
+        self.assertLess(results.index("b1"), results.index("b2"))
+
+    def test_pipelines_not_synchronized(self) -> None:
+        fast_done = threading.Event()
+        results: List[str] = []
+
+        def slow_download() -> None:
+            # the fast pipeline should be able to complete while this one is still downloading
+            self.assertTrue(fast_done.wait(timeout=10))
+            results.append("slow")
+
+        def fast_compress() -> None:
+            results.append("fast")
+            fast_done.set()
+
+        work = PipelineWork("test", {"download": 2, "compress": 1})
+        work.add_pipeline("slow", [PipelineStep("download", slow_download)])
+        work.add_pipeline("fast", [
+            PipelineStep("download", lambda: None), PipelineStep("compress", fast_compress)
+        ])
+        work.run()
+        self.assertEqual(results, ["fast", "slow"])
+
+    def test_stage_limits(self) -> None:
+        lock = threading.Lock()
+        running = {"download": 0, "compress": 0}
+        peak = {"download": 0, "compress": 0}
+
+        def step(stage: str) -> None:
+            with lock:
+                running[stage] += 1
+                peak[stage] = max(peak[stage], running[stage])
+            sleep(0.01)
+            with lock:
+                running[stage] -= 1
+
+        work = PipelineWork("test", {"download": 3, "compress": 1})
+        for i in range(12):
+            work.add_pipeline(str(i), [
+                PipelineStep("download", step, "download"),
+                PipelineStep("compress", step, "compress"),
+            ])
+        work.run()
+        self.assertLessEqual(peak["download"], 3)
+        self.assertEqual(peak["compress"], 1)
+
+    def test_stage_resources(self) -> None:
+        lock = threading.Lock()
+        peak = {"value": 0}
+
+        def step() -> None:
+            with lock:
+                peak["value"] = max(peak["value"], get_governor().in_use(Resource.DISK))
+            sleep(0.01)
+
+        limit = get_governor().limit(Resource.DISK)
+        get_governor().configure({Resource.DISK: 1})
+        try:
+            work = PipelineWork("test", {"extract": 4}, {"extract": Resource.DISK})
+            for i in range(8):
+                work.add_pipeline(str(i), [PipelineStep("extract", step)])
+            work.run()
+        finally:
+            get_governor().configure({Resource.DISK: limit})
+        self.assertEqual(peak["value"], 1)
+
+    def test_failing_step(self) -> None:
+        results: List[str] = []
+
+        def fail() -> None:
+            raise RuntimeError("failed")
+
+        work = PipelineWork("test", {"download": 1, "compress": 1})
+        work.add_pipeline("failing", [
+            PipelineStep("download", fail), PipelineStep("compress", results.append, "x")
+        ])
+        with self.assertRaises(PipelineError):
+            work.run()
+        self.assertEqual(results, [])
+        self.assertEqual(len(work.errors), 1)
+        self.assertIn("RuntimeError: failed", work.errors[0])
+
+    def test_unknown_stage(self) -> None:
+        work = PipelineWork("test", {"download": 1})
+        with self.assertRaises(PipelineError):
+            work.add_pipeline("invalid", [PipelineStep("compress", print)])
+
+
+class TestThreadedWork(unittest.TestCase):
+
+    def test_nested_work(self) -> None:
+        results: List[str] = []
+
+        def container_task(name: str) -> Task:
+            nested_work = ThreadedWork(f"nested {name}", resource=Resource.NETWORK)
+            for i in range(2):
+                nested_work.add_task(f"{name}{i}", results.append, f"{name}{i}")
+            task = Task(f"container {name}", nested_work.run)
+            task.container = True
+            return task
+
+        limit = get_governor().limit(Resource.NETWORK)
+        get_governor().configure({Resource.NETWORK: 2})
+        try:
+            work = ThreadedWork("outer", resource=Resource.NETWORK)
+            for name in ("a", "b"):
+                work.add_task_object(container_task(name))
+            # the outer tasks must not hold tokens needed by the nested ones
+            runner = threading.Thread(target=work.run, args=(2,), daemon=True)
+            runner.start()
+            runner.join(timeout=30)
+            self.assertFalse(runner.is_alive())
+        finally:
+            get_governor().configure({Resource.NETWORK: limit})
+        self.assertEqual(sorted(results), ["a0", "a1", "b0", "b1"])
+        self.assertEqual(get_governor().in_use(Resource.NETWORK), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
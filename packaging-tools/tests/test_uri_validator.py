@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#############################################################################
+#
+# Copyright (C) 2023 The Qt Company Ltd.
+# Contact: https://www.qt.io/licensing/
+#
+# This file is part of the release tools of the Qt Toolkit.
+#
+# $QT_BEGIN_LICENSE:GPL-EXCEPT$
+# Commercial License Usage
+# Licensees holding valid commercial Qt licenses may use this file in
+# accordance with the commercial license agreement provided with the
+# Software or, alternatively, in accordance with the terms contained in
+# a written agreement between you and The Qt Company. For licensing terms
+# and conditions see https://www.qt.io/terms-conditions. For further
+# information use the contact form at https://www.qt.io/contact-us.
+#
+# GNU General Public License Usage
+# Alternatively, this file may be used under the terms of the GNU
+# General Public License version 3 as published by the Free Software
+# Foundation with exceptions as appearing in the file LICENSE.GPL3-EXCEPT
+# included in the packaging of this file. Please review the following
+# information to ensure the GNU General Public License requirements will
+# be met: https://www.gnu.org/licenses/gpl-3.0.html.
+#
+# $QT_END_LICENSE$
+#
+#############################################################################
+
+
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Any, List
+from unittest.mock import patch
+
+from temppathlib import TemporaryDirectory
+
+from uri_validator import UriValidator
+
+
+class HeadHandler(BaseHTTPRequestHandler):
+    """Respond to HEAD requests, the files under /missing/ do not exist"""
+
+    requests: List[str] = []
+
+    def do_HEAD(self) -> None:  # pylint: disable=invalid-name
+        HeadHandler.requests.append(self.path)
+        if self.path.startswith("/missing/"):
+            self.send_response(404)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", "0" if self.path.startswith("/empty/") else "10")
+        self.end_headers()
+
+    def log_message(self, *args: Any) -> None:  # pylint: disable=arguments-differ
+        pass
+
+
+class TestUriValidator(unittest.TestCase):
+    server: HTTPServer
+    base_url: str
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.server = HTTPServer(("127.0.0.1", 0), HeadHandler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self) -> None:
+        HeadHandler.requests.clear()
+
+    def test_local_files(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            temp_dir.path.joinpath("file.7z").write_text("test", encoding="utf-8")
+            validator = UriValidator()
+            self.assertTrue(validator.exists(str(temp_dir.path / "file.7z")))
+            self.assertFalse(validator.exists(str(temp_dir.path / "missing.7z")))
+            self.assertEqual(validator.size(str(temp_dir.path / "file.7z")), 4)
+
+    def test_remote_files(self) -> None:
+        validator = UriValidator(max_concurrency=2)
+        uris = [f"{self.base_url}/files/{i}.7z" for i in range(5)]
+        missing = [f"{self.base_url}/missing/file.7z", f"{self.base_url}/empty/file.7z"]
+        validator.prefetch(uris + missing + uris)
+        self.assertEqual(len(HeadHandler.requests), 7)
+        self.assertTrue(all(validator.exists(uri) for uri in uris))
+        self.assertFalse(any(validator.exists(uri) for uri in missing))
+        self.assertEqual([validator.size(uri) for uri in uris[:2] + missing], [10, 10, None, None])
+        self.assertEqual(len(HeadHandler.requests), 7)
+
+    def test_cache_expired(self) -> None:
+        uri = f"{self.base_url}/files/file.7z"
+        validator = UriValidator(ttl=0)
+        self.assertTrue(validator.exists(uri))
+        self.assertTrue(validator.exists(uri))
+        self.assertEqual(HeadHandler.requests, ["/files/file.7z", "/files/file.7z"])
+
+    def test_prefetch_skips_cached(self) -> None:
+        validator = UriValidator()
+        validator.prefetch([f"{self.base_url}/files/a.7z"])
+        with patch.object(validator, "_check") as check:
+            validator.prefetch([f"{self.base_url}/files/a.7z", f"{self.base_url}/files/b.7z"])
+            check.assert_called_once_with([f"{self.base_url}/files/b.7z"])
+
+
+if __name__ == "__main__":
+    unittest.main()
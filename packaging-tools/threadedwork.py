@@ -33,11 +33,15 @@ import itertools
 import os
 import sys
 import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import suppress
 from multiprocessing import cpu_count
 from queue import Queue
 from time import sleep
-from traceback import format_exc
-from typing import Any, List, Optional
+from traceback import format_exc, format_exception
+from typing import Any, ContextManager, Dict, List, Optional
+
+from resource_governor import Resource, get_governor
 
 # we are using RLock, because threaded_print is using the same lock
 output_lock = threading.RLock()  # pylint: disable=invalid-name
@@ -142,6 +146,11 @@ class Task:
         # exit the complete program with code -1, sys.exit would just close the thread
         self.exit_function = os._exit
         self.exit_function_arguments = [-1]
+        # hold a token of the resource from the process-wide governor while running
+        self.resource: Optional[Resource] = None
+        # a container task only runs nested works which take their own tokens, holding
+        # a token for the container too could use up the limit and deadlock the nested work
+        self.container = False
 
     def add_function(self, function: Any, *arguments) -> None:  # type: ignore
         a_function = TaskFunction(function, *arguments)
@@ -149,8 +158,9 @@ class Task:
 
     def do_task(self) -> None:
         try:
-            for task_function in self.list_of_functions:
-                task_function.function(*(task_function.arguments))
+            with resource_token(None if self.container else self.resource):
+                for task_function in self.list_of_functions:
+                    task_function.function(*(task_function.arguments))
         except Exception:
             print("FAIL")
             with output_lock:
@@ -165,10 +175,18 @@ class Task:
         print("Done")
 
 
+def resource_token(resource: Optional[Resource]) -> ContextManager[None]:
+    """Return a context manager holding a token of the resource, if any, from the governor"""
+    if resource is None:
+        return suppress()  # no-op context manager, contextlib.nullcontext requires Python 3.7
+    return get_governor().acquire(resource)
+
+
 class ThreadedWork:
 
-    def __init__(self, description: str) -> None:
+    def __init__(self, description: str, resource: Optional[Resource] = None) -> None:
         self.description = os.linesep + f"##### {description} #####"
+        self.resource = resource
         self.queue = Queue()  # type: ignore
         self.legend: List[str] = []
         self.task_number = 0
@@ -184,6 +202,8 @@ class ThreadedWork:
 
     def add_task_object(self, task: Any) -> None:
         task.task_number = self.task_number
+        if self.resource is not None and not task.container:
+            task.resource = self.resource
         if self.exit_function:
             task.exit_function = self.exit_function
             task.exit_function_arguments = self.exit_function_arguments
@@ -246,3 +266,132 @@ class Consumer(threading.Thread):
             thread_data.task_number = task.task_number
             task.do_task()
             self.queue.task_done()
+
+
+class PipelineError(Exception):
+    pass
+
+
+class PipelineStep(TaskFunction):
+
+    def __init__(self, stage: str, function: Any, *arguments: Any) -> None:
+        super().__init__(function, *arguments)
+        self.stage = stage
+
+
+class Pipeline:
+
+    def __init__(self, description: str, steps: List[PipelineStep]) -> None:
+        self.description = description
+        self.steps = steps
+
+
+class PipelineWork:
+    """
+    Run chains of dependent steps where each step is executed in the worker pool of its stage
+
+    Unlike with ThreadedWork the pipelines are not synchronized with each other, a pipeline
+    continues to its next step as soon as the previous step is done and a worker of the next
+    stage is free. The number of concurrently running steps is limited separately per stage,
+    and additionally by the process-wide governor for the stages mapped to a resource.
+    A failing step stops scheduling any new steps and PipelineError is raised from run().
+    """
+
+    def __init__(
+        self,
+        description: str,
+        stage_limits: Dict[str, int],
+        stage_resources: Optional[Dict[str, Resource]] = None,
+    ) -> None:
+        self.description = description
+        self.stage_limits = stage_limits
+        self.stage_resources = stage_resources or {}
+        self.pipelines: List[Pipeline] = []
+        self.errors: List[str] = []
+        self._executors: Dict[str, ThreadPoolExecutor] = {}
+        self._futures: List["Future[Any]"] = []
+        self._stopping = False
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._finished = threading.Event()
+
+    def add_pipeline(self, description: str, steps: List[PipelineStep]) -> None:
+        for step in steps:
+            if step.stage not in self.stage_limits:
+                raise PipelineError(f"Unknown stage '{step.stage}' in: {description}")
+        if steps:
+            self.pipelines.append(Pipeline(description, steps))
+
+    def _finish_pipeline(self) -> None:
+        with self._lock:
+            self._pending -= 1
+            if self._pending == 0:
+                self._finished.set()
+
+    def _submit(self, pipeline: Pipeline, index: int) -> None:
+        if self.errors or self._stopping or index == len(pipeline.steps):
+            self._finish_pipeline()
+            return
+        step = pipeline.steps[index]
+        try:
+            future = self._executors[step.stage].submit(self._run_step, step)
+        except RuntimeError:  # executor already shut down, e.g. on KeyboardInterrupt
+            self._finish_pipeline()
+            return
+        with self._lock:
+            self._futures.append(future)
+        future.add_done_callback(lambda f: self._step_done(f, pipeline, index))
+
+    def _run_step(self, step: PipelineStep) -> Any:
+        with resource_token(self.stage_resources.get(step.stage)):
+            return step.function(*step.arguments)
+
+    def _step_done(self, future: "Future[Any]", pipeline: Pipeline, index: int) -> None:
+        if future.cancelled():
+            self._finish_pipeline()
+            return
+        exc = future.exception()
+        if exc is not None:
+            step = pipeline.steps[index]
+            with self._lock:
+                self.errors.append(
+                    f"{pipeline.description} ({step.stage}): {step}{os.linesep}"
+                    + "".join(format_exception(type(exc), exc, exc.__traceback__))
+                )
+            self._finish_pipeline()
+            return
+        self._submit(pipeline, index + 1)
+
+    def run(self) -> None:
+        print(f"{os.linesep}##### {self.description} #####")
+        if not self.pipelines:
+            return
+        self._pending = len(self.pipelines)
+        self._futures = []
+        self._stopping = False
+        self._finished.clear()
+        self._executors = {
+            stage: ThreadPoolExecutor(max_workers=max(1, limit), thread_name_prefix=stage)
+            for stage, limit in self.stage_limits.items()
+        }
+        try:
+            for pipeline in self.pipelines:
+                self._submit(pipeline, 0)
+            while not self._finished.wait(timeout=1):
+                pass
+        except KeyboardInterrupt:
+            raise SystemExit(0) from KeyboardInterrupt
+        finally:
+            # drop the queued steps, the running ones are waited for
+            with self._lock:
+                self._stopping = True
+                futures, self._futures = self._futures, []
+            for future in futures:
+                future.cancel()
+            for executor in self._executors.values():
+                executor.shutdown(wait=True)
+        if self.errors:
+            for error in self.errors:
+                sys.stderr.write(error + os.linesep)
+            raise PipelineError(f"{self.description}: {len(self.errors)} pipeline(s) failed")
+        print(f"{os.linesep}{self.description} ... done")
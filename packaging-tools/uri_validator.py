@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#############################################################################
+#
+# Copyright (C) 2023 The Qt Company Ltd.
+# Contact: https://www.qt.io/licensing/
+#
+# This file is part of the release tools of the Qt Toolkit.
+#
+# $QT_BEGIN_LICENSE:GPL-EXCEPT$
+# Commercial License Usage
+# Licensees holding valid commercial Qt licenses may use this file in
+# accordance with the commercial license agreement provided with the
+# Software or, alternatively, in accordance with the terms contained in
+# a written agreement between you and The Qt Company. For licensing terms
+# and conditions see https://www.qt.io/terms-conditions. For further
+# information use the contact form at https://www.qt.io/contact-us.
+#
+# GNU General Public License Usage
+# Alternatively, this file may be used under the terms of the GNU
+# General Public License version 3 as published by the Free Software
+# Foundation with exceptions as appearing in the file LICENSE.GPL3-EXCEPT
+# included in the packaging of this file. Please review the following
+# information to ensure the GNU General Public License requirements will
+# be met: https://www.gnu.org/licenses/gpl-3.0.html.
+#
+# $QT_END_LICENSE$
+#
+#############################################################################
+
+
+"""Concurrent and cached existence checks for payload URIs"""
+
+import asyncio
+import os
+import sys
+import threading
+from time import monotonic
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from aiohttp import ClientError, ClientSession, ClientTimeout, TCPConnector
+
+from bldinstallercommon import file_uri_to_path, uri_exists
+from logging_util import init_logger
+
+if sys.version_info < (3, 7):
+    from asyncio_backport import run as asyncio_run
+else:
+    from asyncio import run as asyncio_run
+
+log = init_logger(__name__, debug_mode=False)
+
+
+class UriValidator:
+    """
+    Check the existence of payload URIs, remote URIs are checked concurrently with HEAD requests
+
+    The results are cached for a short time, so the same URI used by multiple components or
+    payload items is requested only once. Like in uri_exists(), a remote URI exists if the
+    server responds with a non-error status and a positive Content-Length.
+    The size of the existing files is cached as well.
+    """
+
+    def __init__(self, max_concurrency: int = 16, ttl: float = 300, timeout: float = 30) -> None:
+        self.max_concurrency = max(1, max_concurrency)
+        self.ttl = ttl
+        self.timeout = timeout
+        self._cache: Dict[str, Tuple[float, Optional[int]]] = {}
+        self._lock = threading.Lock()
+
+    def _cached(self, uri: str) -> Tuple[bool, Optional[int]]:
+        """Return whether there is a valid cached result and the cached size, None if missing"""
+        with self._lock:
+            expires, size = self._cache.get(uri, (0.0, None))
+        return expires > monotonic(), size
+
+    def _store(self, uri: str, size: Optional[int]) -> None:
+        with self._lock:
+            self._cache[uri] = (monotonic() + self.ttl, size)
+
+    async def _head(
+        self, session: ClientSession, sem: asyncio.Semaphore, uri: str
+    ) -> Optional[int]:
+        async with sem:
+            try:
+                async with session.head(uri, allow_redirects=False) as res:
+                    if res.status >= 400:
+                        log.error("HTTP %s: %s", res.status, uri)
+                        return None
+                    content_length = int(res.headers.get("content-length", 0))
+                    if content_length > 0:
+                        return content_length
+                    log.error("Invalid content length: %s (%s)", content_length, uri)
+            except (ClientError, asyncio.TimeoutError, ValueError) as err:
+                log.error("Error while checking URI: %s (%s)", uri, repr(err))
+        return None
+
+    async def _check_remote(self, uris: List[str]) -> List[Optional[int]]:
+        sem = asyncio.Semaphore(self.max_concurrency)
+        connector = TCPConnector(limit=self.max_concurrency)
+        timeout = ClientTimeout(total=None, sock_connect=self.timeout, sock_read=self.timeout)
+        # one keep-alive connection pool for all the requests
+        async with ClientSession(connector=connector, timeout=timeout) as session:
+            return await asyncio.gather(*[self._head(session, sem, uri) for uri in uris])
+
+    def _check(self, uris: List[str]) -> Dict[str, Optional[int]]:
+        results: Dict[str, Optional[int]] = {}
+        remote = [uri for uri in uris if uri.startswith(("http://", "https://"))]
+        for uri in uris:
+            if uri not in remote:
+                results[uri] = file_uri_to_path(uri).stat().st_size if uri_exists(uri) else None
+        if remote:
+            log.info("Checking %s payload URIs, concurrency: %s", len(remote), self.max_concurrency)
+            results.update(zip(remote, asyncio_run(self._check_remote(remote))))
+        for uri, size in results.items():
+            self._store(uri, size)
+        return results
+
+    def prefetch(self, uris: Iterable[str]) -> None:
+        """
+        Check the given URIs concurrently and cache the results
+
+        Args:
+            uris: The URIs to check, the ones with a valid cached result are skipped
+        """
+        self._check(sorted({uri for uri in uris if not self._cached(uri)[0]}))
+
+    def exists(self, uri: str) -> bool:
+        """
+        Return whether the URI exists, using the cached result if available
+
+        Args:
+            uri: An URI pointing to a local file or a remote file (HTTP)
+
+        Returns:
+            True if the file exists at the given URI location, otherwise False
+        """
+        return self.size(uri) is not None
+
+    def size(self, uri: str) -> Optional[int]:
+        """
+        Return the size of the file, using the cached result if available
+
+        Args:
+            uri: An URI pointing to a local file or a remote file (HTTP)
+
+        Returns:
+            The file size in bytes, from the Content-Length for remote files, None if missing
+        """
+        valid, size = self._cached(uri)
+        if not valid:
+            size = self._check([uri])[uri]
+        return size
+
+
+_validator = UriValidator(
+    max_concurrency=int(os.getenv("PKG_URI_CHECK_CONCURRENCY", "16")),
+    ttl=float(os.getenv("PKG_URI_CHECK_TTL", "300")),
+)
+
+
+def get_uri_validator() -> UriValidator:
+    """Return the process-wide UriValidator instance"""
+    return _validator